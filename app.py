@@ -1,10 +1,15 @@
 # app.py
 
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from utils import generate_validation_portfolio_data, generate_program_risk_data, generate_revalidation_data
+from data_access import (cache_stats, get_high_risk_count, get_over_allocations, get_portfolio_lanes, get_portfolio_window,
+                         get_risk_matrix_cells, get_risks_in_cell, get_status_counts, invalidate)
+from portfolio_timeline import MAX_DETAIL_BARS, detail_figure, lanes_figure
+from profiling import render_debug_panel, section, start_page
+from risk_matrix import bubble_sizes
+from theme import apply_plotly_theme
+
+MAX_BOTTLENECK_ROWS = 20
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -12,11 +17,16 @@ st.set_page_config(
     page_icon="https://www.grifols.com/o/grifols-theme/images/favicon.ico",
     layout="wide"
 )
+apply_plotly_theme()
+start_page("app")
 
-# --- Data Loading ---
-portfolio_df = generate_validation_portfolio_data()
-risks_df = generate_program_risk_data()
-revalidation_df = generate_revalidation_data()
+with st.sidebar:
+    with st.expander("Data Cache"):
+        st.caption("Shared, TTL-bound cache in front of every data source. Hits are served without calling the backend.")
+        st.dataframe(cache_stats().style.format({'Load Time (s)': '{:.3f}', 'Hit Rate': '{:.0%}'}), use_container_width=True)
+        if st.button("Refresh all data sources"):
+            invalidate()
+            st.rerun()
 
 
 # --- Page Title and Header ---
@@ -55,12 +65,14 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Calculate Managerial KPIs
-completed_projects_df = portfolio_df[portfolio_df['Status'].str.contains('Complete')]
-on_time_completion_pct = (completed_projects_df[completed_projects_df['Status'] == 'Complete - On Time'].shape[0] / len(completed_projects_df)) * 100 if not completed_projects_df.empty else 100.0
-projects_at_risk = portfolio_df[portfolio_df['Status'] == 'At Risk'].shape[0]
-high_priority_risks = risks_df[risks_df['Risk Score'] >= 15].shape[0]
-revals_due = revalidation_df[revalidation_df['Status'] == 'Due'].shape[0]
+# Calculate Managerial KPIs (status counts are aggregated in the database)
+with section("kpis"):
+    portfolio_status = get_status_counts('portfolio')
+    completed_projects = int(portfolio_status[portfolio_status.index.str.contains('Complete')].sum())
+    on_time_completion_pct = (portfolio_status.get('Complete - On Time', 0) / completed_projects) * 100 if completed_projects else 100.0
+    projects_at_risk = int(portfolio_status.get('At Risk', 0))
+    high_priority_risks = get_high_risk_count('risks', 15)
+    revals_due = int(get_status_counts('revalidation').get('Due', 0))
 
 col1, col2, col3, col4 = st.columns(4)
 
@@ -83,7 +95,7 @@ with col2:
             <div class="metric-value">{projects_at_risk}</div>
         </div>
         """, unsafe_allow_html=True)
-        st.progress(int(projects_at_risk / 5 * 100) if projects_at_risk > 0 else 0) # Scale progress bar
+        st.progress(min(int(projects_at_risk / 5 * 100), 100)) # Scale progress bar
         st.markdown("<div class='metric-target'>Target: 0</div>", unsafe_allow_html=True)
 
 
@@ -95,7 +107,7 @@ with col3:
             <div class="metric-value">{high_priority_risks}</div>
         </div>
         """, unsafe_allow_html=True)
-        st.progress(int(high_priority_risks / 5 * 100) if high_priority_risks > 0 else 0)
+        st.progress(min(int(high_priority_risks / 5 * 100), 100))
         st.markdown("<div class='metric-target'>Target: 0</div>", unsafe_allow_html=True)
 
 with col4:
@@ -106,7 +118,7 @@ with col4:
             <div class="metric-value">{revals_due}</div>
         </div>
         """, unsafe_allow_html=True)
-        st.progress(int(revals_due / 5 * 100) if revals_due > 0 else 0)
+        st.progress(min(int(revals_due / 5 * 100), 100))
         st.markdown("<div class='metric-target'>Target: 0</div>", unsafe_allow_html=True)
 
 st.divider()
@@ -114,44 +126,52 @@ st.divider()
 # --- Main Content Area: Portfolio and Resource Management ---
 col_gantt, col_risk = st.columns(2)
 
+# --- Portfolio Timeline (fragment: window and view changes rerun only this block) ---
+@st.fragment
+@section("portfolio_timeline")
+def render_portfolio_timeline():
+    """Renders per-lead lanes or individual project bars, depending on how many projects fall in the chosen window."""
+    with section("gantt:lanes"):
+        lanes = get_portfolio_lanes()
+    span = (lanes['Start Date'].min().date(), lanes['End Date'].max().date())
+    window = st.slider("Visible window", min_value=span[0], max_value=span[1], value=span, format="YYYY-MM-DD", key="gantt_window")
+    view = st.radio("View", ["Auto", "Lanes by Lead", "Project Detail"], horizontal=True, key="gantt_view",
+                    help=f"Auto draws individual projects when at most {MAX_DETAIL_BARS} fall in the window, otherwise one lane per lead.")
+
+    with section("gantt:window"):
+        projects, total = get_portfolio_window(window[0], window[1])
+    with section("gantt"):
+        if view == "Project Detail" or (view == "Auto" and total <= MAX_DETAIL_BARS):
+            fig = detail_figure(projects)
+            if total > len(projects):
+                st.caption(f"Showing the first {len(projects)} of {total} projects in this window; narrow the window to see the rest.")
+        else:
+            visible = lanes[(lanes['Start Date'].dt.date <= window[1]) & (lanes['End Date'].dt.date >= window[0])]
+            fig = lanes_figure(visible)
+            st.caption(f"{total} projects in this window, merged into {len(visible)} busy blocks across {visible['Project Lead'].nunique()} leads.")
+        fig.update_xaxes(range=[window[0], window[1]])
+    with section("gantt:render"):
+        st.plotly_chart(fig, use_container_width=True)
+
 with col_gantt:
     st.header("Portfolio Timeline & Resource Allocation")
-    st.caption("Gantt chart overview grouped by project lead to visualize team workload and project timelines.")
-    
-    portfolio_df_sorted = portfolio_df.sort_values(by='Project Lead')
-    
-    fig = px.timeline(
-        portfolio_df_sorted, x_start="Start Date", x_end="End Date", y="Project Name",
-        color="Status", facet_row="Project Lead", title="Active Projects by Lead Engineer",
-        hover_name="Project Name", color_discrete_map={
-            'In Progress': '#007A33', 'At Risk': '#DA291C', 'On Hold': '#6C6F70', 'Complete - On Time': '#0033A0'
-        }
-    )
-    fig.update_yaxes(autorange="reversed")
-    fig.update_layout(height=600)
-    st.plotly_chart(fig, use_container_width=True)
+    st.caption("Timeline grouped by project lead to visualize team workload. Wide windows collapse into one lane per lead.")
+    render_portfolio_timeline()
 
-with col_risk:
-    st.header("Program Risk Bubble Matrix")
-    st.caption("Prioritizing risks based on impact and probability. Color indicates max severity; size indicates volume.")
-
-    risk_agg = risks_df.groupby(['Impact', 'Probability']).apply(lambda g: pd.Series({
-        'Risk Count': len(g),
-        'Max Risk Score': g['Risk Score'].max(),
-        'Risk Details': '<br>'.join(f"<b>{row['Risk ID']}</b> (Score: {row['Risk Score']}): {row['Risk Description']}"
-                                    for _, row in g.iterrows())
-    }), include_groups=False).reset_index()
+# --- Risk Matrix (fragment: selecting a bubble reruns only this block) ---
+RISK_QUADRANTS = [
+    (0.5, 0.5, 3.5, 3.5, "rgba(0, 122, 51, 0.1)", "rgba(0, 122, 51, 0.3)"),
+    (3.5, 0.5, 5.5, 3.5, "rgba(255, 199, 44, 0.1)", "rgba(255, 199, 44, 0.3)"),
+    (0.5, 3.5, 3.5, 5.5, "rgba(255, 199, 44, 0.1)", "rgba(255, 199, 44, 0.3)"),
+    (3.5, 3.5, 5.5, 5.5, "rgba(218, 41, 28, 0.15)", "rgba(218, 41, 28, 0.4)"),
+]
 
+@section("risk_matrix")
+def build_risk_matrix(risk_agg):
+    """Bubble matrix of the aggregated risk cells; hover text carries only each cell's top risks."""
     fig_risk = go.Figure()
-
-    fig_risk.add_shape(type="rect", xref="x", yref="y", x0=0.5, y0=0.5, x1=3.5, y1=3.5,
-                      fillcolor="rgba(0, 122, 51, 0.1)", line_color="rgba(0, 122, 51, 0.3)")
-    fig_risk.add_shape(type="rect", xref="x", yref="y", x0=3.5, y0=0.5, x1=5.5, y1=3.5,
-                      fillcolor="rgba(255, 199, 44, 0.1)", line_color="rgba(255, 199, 44, 0.3)")
-    fig_risk.add_shape(type="rect", xref="x", yref="y", x0=0.5, y0=3.5, x1=3.5, y1=5.5,
-                      fillcolor="rgba(255, 199, 44, 0.1)", line_color="rgba(255, 199, 44, 0.3)")
-    fig_risk.add_shape(type="rect", xref="x", yref="y", x0=3.5, y0=3.5, x1=5.5, y1=5.5,
-                      fillcolor="rgba(218, 41, 28, 0.15)", line_color="rgba(218, 41, 28, 0.4)")
+    for x0, y0, x1, y1, fill, line in RISK_QUADRANTS:
+        fig_risk.add_shape(type="rect", xref="x", yref="y", x0=x0, y0=y0, x1=x1, y1=y1, fillcolor=fill, line_color=line)
 
     fig_risk.add_trace(go.Scatter(
         x=risk_agg['Probability'],
@@ -160,7 +180,7 @@ with col_risk:
         marker=dict(
             color=risk_agg['Max Risk Score'],
             colorscale='YlOrRd',
-            size=risk_agg['Risk Count'] * 20,
+            size=bubble_sizes(risk_agg['Risk Count']),
             sizemin=15,
             showscale=True,
             colorbar=dict(title='Max Risk Score', x=1.15),
@@ -174,10 +194,10 @@ with col_risk:
             "<b>Impact:</b> %{y}<br>"
             "<b>Probability:</b> %{x}<br>"
             "<b>Risk Count:</b> %{customdata}<br>"
-            "<hr><b>Risks in this Category:</b><br>%{hovertext}<extra></extra>"
+            "<hr><b>Top Risks in this Category:</b><br>%{hovertext}<extra></extra>"
         )
     ))
-    
+
     fig_risk.update_layout(
         title="Risk Matrix: Severity (Color), Volume (Size), and Impact",
         xaxis_title="Probability",
@@ -202,18 +222,72 @@ with col_risk:
         showlegend=False,
         margin=dict(t=50, l=50, r=50, b=50)
     )
+    return fig_risk
+
+@st.fragment
+@section("risk_matrix_panel")
+def render_risk_matrix():
+    """Renders the bubble matrix and, for a selected bubble, the full list of its risks."""
+    with section("risk_agg"):
+        risk_agg = get_risk_matrix_cells()
+    fig_risk = build_risk_matrix(risk_agg)
+    with section("risk_matrix:render"):
+        event = st.plotly_chart(fig_risk, use_container_width=True, on_select="rerun",
+                                selection_mode="points", key="risk_matrix")
+
+    points = event.selection.points if event else []
+    if not points:
+        st.caption("Select a bubble to list every risk in that category.")
+        return
+    impact, probability = int(points[0]['y']), int(points[0]['x'])
+    with section("risk_cell_details"):
+        cell_risks = get_risks_in_cell(impact, probability)
+    st.subheader(f"Risks with Impact {impact} × Probability {probability} ({len(cell_risks)})")
+    st.dataframe(cell_risks[['Risk ID', 'Project', 'Risk Description', 'Risk Score', 'Owner', 'Status']],
+                 hide_index=True, use_container_width=True)
+
+with col_risk:
+    st.header("Program Risk Bubble Matrix")
+    st.caption("Prioritizing risks based on impact and probability. Color indicates max severity; size indicates volume.")
+    render_risk_matrix()
+
+st.divider()
+
+# --- Resource Bottlenecks (derived from project dates and allocations) ---
+st.header("Resource Bottleneck Analysis")
+st.caption("Periods in which a lead's summed project allocation exceeds 100%, swept from every project interval in the portfolio.")
+with section("bottlenecks"):
+    bottlenecks = get_over_allocations()
+if bottlenecks.empty:
+    st.success("No lead is allocated above 100% at any point in the plan.")
+else:
+    col_b1, col_b2 = st.columns([1, 3])
+    col_b1.metric("Over-Allocated Leads", bottlenecks['Person'].nunique())
+    col_b1.metric("Worst Peak Load", f"{bottlenecks['Peak Load (%)'].max():.0f}%")
+    col_b2.dataframe(
+        bottlenecks.head(MAX_BOTTLENECK_ROWS),
+        column_config={
+            "Person": st.column_config.TextColumn("Lead"),
+            "From": st.column_config.DateColumn("From", format="YYYY-MM-DD"),
+            "To": st.column_config.DateColumn("To", format="YYYY-MM-DD"),
+            "Peak Load (%)": st.column_config.NumberColumn("Peak Load", format="%d%%"),
+        },
+        hide_index=True, use_container_width=True
+    )
+    if len(bottlenecks) > MAX_BOTTLENECK_ROWS:
+        col_b2.caption(f"Showing the {MAX_BOTTLENECK_ROWS} most severe of {len(bottlenecks)} over-allocation periods.")
 
-    st.plotly_chart(fig_risk, use_container_width=True)
-    
 st.divider()
 
 with st.container(border=True):
     st.header("Managerial Analysis & Action Plan")
     st.markdown("""
     - **Performance Analysis:** The visual KPIs provide an instant health check. While our **On-Time Completion Rate** is slightly below target, the more pressing issues are the **2 Projects At-Risk** and **2 Overdue Revalidations**. These represent immediate compliance and timeline risks.
-    - **Resource Allocation Insights:** The timeline, faceted by lead, clearly shows that **Anna K.** is managing two large, overlapping projects. This represents a **resource bottleneck** and a key-person dependency risk, which is also flagged as our single highest-priority risk on the risk matrix.
+    - **Resource Allocation Insights:** The timeline and the bottleneck analysis clearly show that **Anna K.** is managing two large, overlapping projects, putting her at 120% allocation from August to November. This represents a **resource bottleneck** and a key-person dependency risk, which is also flagged as our single highest-priority risk on the risk matrix.
     - **Risk Mitigation Focus:** The risk matrix instantly focuses our attention on the top-right, red quadrant. Our primary risk mitigation efforts must be directed at the resource bottleneck.
     - **Strategic Action Plan:**
         1. **At-Risk Projects:** My top priority is to drill down into the two at-risk items using the dedicated dashboards to formulate mitigation plans with the team leads.
         2. **Resource Balancing:** I will meet with Anna K. to review her workload. The data strongly supports re-assigning one of her upcoming projects (e.g., the CPV Automation) to another team member, like Maria S., as a development opportunity. This addresses the risk and develops my team.
     """)
+
+render_debug_panel()
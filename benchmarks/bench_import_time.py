@@ -0,0 +1,89 @@
+# benchmarks/bench_import_time.py
+"""Cold-start import benchmark.
+
+Each measurement runs in a fresh interpreter, so nothing is shared between samples,
+which matches a page load after a container restart. Three groups are reported:
+
+- shared modules (utils, data_access, theme)
+- the top-level import set of every page, with streamlit excluded because the server
+  has it loaded already
+- the plotly layers, for reference
+
+Usage:
+    python benchmarks/bench_import_time.py [--repeat 5] [--json results.json]
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PRELOADED = {'streamlit'}
+
+TIMER = """
+import sys, time
+sys.path.insert(0, {root!r})
+started = time.perf_counter()
+{statements}
+print(time.perf_counter() - started)
+"""
+
+def page_imports(path):
+    """Returns the top-level import statements of a page, excluding modules the server has already loaded."""
+    with open(path, encoding='utf-8') as handle:
+        tree = ast.parse(handle.read())
+    statements = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [a for a in node.names if a.name.split('.')[0] not in PRELOADED]
+            if names:
+                statements.append(ast.unparse(ast.Import(names=names)))
+        elif isinstance(node, ast.ImportFrom) and node.module.split('.')[0] not in PRELOADED:
+            statements.append(ast.unparse(node))
+    return statements
+
+def time_statements(statements, repeat):
+    """Median wall time (s) of running `statements` in `repeat` fresh interpreters."""
+    code = TIMER.format(root=ROOT, statements='\n'.join(statements) or 'pass')
+    samples = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, check=True)
+        samples.append(float(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per target (median is reported)')
+    parser.add_argument('--json', help='write results to this file')
+    args = parser.parse_args()
+
+    targets = {
+        'utils': ['import utils'],
+        'data_access': ['import data_access'],
+        'theme (import only)': ['import theme'],
+        'theme (registered)': ['import theme', 'theme.apply_plotly_theme()'],
+        'plotly.graph_objects': ['import plotly.graph_objects'],
+        'plotly.express': ['import plotly.express'],
+    }
+    for path in sorted(glob.glob(os.path.join(ROOT, 'app.py')) + glob.glob(os.path.join(ROOT, 'pages', '*.py'))):
+        targets[os.path.relpath(path, ROOT)] = page_imports(path)
+
+    baseline = time_statements([], args.repeat)
+    results = {}
+    print(f"{'Target':<45}{'Import time (ms)':>18}")
+    for name, statements in targets.items():
+        elapsed = max(time_statements(statements, args.repeat) - baseline, 0.0)
+        results[name] = round(elapsed * 1000, 1)
+        print(f"{name:<45}{results[name]:>18.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump({'python': sys.version.split()[0], 'repeat': args.repeat, 'import_ms': results}, handle, indent=2)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# benchmarks/bench_pages.py
+"""Headless page benchmark.
+
+Renders app.py and every page under pages/ through Streamlit's AppTest against
+data sets scaled 1x, 10x, 100x and 1000x. The scaled copies cover projects, risks,
+batches, systems, findings and the other seeded tables. Each scale runs in its own
+subprocess with a fresh SQLite database and CPV store under a temporary directory,
+so the scales never share caches or data files.
+
+Recorded per page and scale:
+- cold and warm rerun time
+- peak traced memory
+- figure and table payload size (serialized protobuf bytes)
+
+Results can be saved as a baseline and compared on later runs; a metric that grows
+past the tolerance counts as a regression, and the script exits with status 1.
+The baseline records the host it was measured on. Wall times are only compared
+against a baseline from the same host (or with --compare-times); payload and
+memory are compared everywhere.
+
+Usage:
+    python benchmarks/bench_pages.py [--scales 1,10,100,1000] [--pages app.py,pages/CPV_Dashboard.py]
+                                     [--baseline benchmarks/page_baseline.json] [--save-baseline]
+                                     [--tolerance 0.25] [--compare-times]
+"""
+
+import argparse
+import glob
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, 'benchmarks', 'page_baseline.json')
+DEFAULT_SCALES = (1, 10, 100, 1000)
+METRICS = ['Cold Run (s)', 'Warm Rerun (s)', 'Peak Memory (MB)', 'Figure Payload (KB)', 'Table Payload (KB)']
+# Wall times depend on the machine; they are only gated against a baseline from the same host.
+TIMING_METRICS = ['Cold Run (s)', 'Warm Rerun (s)']
+# Absolute slack per metric so tiny values (a few ms or KB) do not flag on noise.
+MIN_DELTA = {'Cold Run (s)': 0.05, 'Warm Rerun (s)': 0.05, 'Peak Memory (MB)': 1.0,
+             'Figure Payload (KB)': 1.0, 'Table Payload (KB)': 1.0}
+
+def all_pages():
+    """app.py followed by every page, relative to the repository root."""
+    return ['app.py'] + sorted(os.path.relpath(p, ROOT) for p in glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+
+# --- Worker (one scale, one process) ---
+def payload_kb(at, element_type):
+    """Serialized size of all elements of one type in the rendered page."""
+    return sum(element.proto.ByteSize() for element in at.get(element_type)) / 1024
+
+def measure_page(page, timeout):
+    """Renders a page twice (cold, then a warm rerun) and returns its metrics."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=timeout)
+    tracemalloc.start()
+    started = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    started = time.perf_counter()
+    at.run()
+    warm = time.perf_counter() - started
+    return {
+        'Cold Run (s)': round(cold, 3),
+        'Warm Rerun (s)': round(warm, 3),
+        'Peak Memory (MB)': round(peak / 2**20, 2),
+        'Figure Payload (KB)': round(payload_kb(at, 'plotly_chart'), 1),
+        'Table Payload (KB)': round(payload_kb(at, 'dataframe'), 1),
+        'Error': str(at.exception[0].value) if at.exception else None,
+    }
+
+def run_worker(pages, timeout, out_path):
+    logging.disable(logging.CRITICAL)
+    sys.path.insert(0, ROOT)
+    # Shared modules are imported up front so the first page's cold run measures page work, not start-up.
+    import plotly.express, data_access, theme  # noqa: F401
+    results = {page: measure_page(page, timeout) for page in pages}
+    with open(out_path, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle)
+
+def run_scale(scale, pages, timeout):
+    """Runs the worker for one scale in a subprocess with an isolated database and CPV store."""
+    with tempfile.TemporaryDirectory(prefix=f'grifols-bench-{scale}x-') as workdir:
+        env = dict(os.environ,
+                   GRIFOLS_DATA_SCALE=str(scale),
+                   GRIFOLS_DB_PATH=os.path.join(workdir, 'grifols.db'),
+                   GRIFOLS_CPV_STORE=os.path.join(workdir, 'cpv_store'),
+                   GRIFOLS_PROFILE_LOG=os.path.join(workdir, 'profile.jsonl'))
+        out_path = os.path.join(workdir, 'results.json')
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', '--pages', ','.join(pages),
+                        '--timeout', str(timeout), '--out', out_path], cwd=ROOT, env=env, check=True)
+        with open(out_path, encoding='utf-8') as handle:
+            return json.load(handle)
+
+# --- Baseline Comparison ---
+def host_fingerprint():
+    """Identifies the machine a baseline was measured on (wall times are not portable across hosts)."""
+    return {'host': platform.node(), 'machine': platform.machine(), 'processor': platform.processor(),
+            'cpus': os.cpu_count(), 'python': platform.python_version()}
+
+def compare(results, baseline, tolerance, metrics=METRICS):
+    """Lists (scale, page, metric, baseline, current) for every metric that grew beyond the tolerance."""
+    regressions = []
+    for scale, pages in results.items():
+        for page, values in pages.items():
+            reference = baseline.get(scale, {}).get(page)
+            if not reference:
+                continue
+            for metric in metrics:
+                old, new = reference.get(metric), values.get(metric)
+                if old is None or new is None:
+                    continue
+                if new > old * (1 + tolerance) and new - old > MIN_DELTA[metric]:
+                    regressions.append((scale, page, metric, old, new))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default=','.join(map(str, DEFAULT_SCALES)), help='comma-separated data scale factors')
+    parser.add_argument('--pages', help='comma-separated page files (default: app.py and all pages)')
+    parser.add_argument('--timeout', type=float, default=600, help='AppTest timeout per run in seconds')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='write these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative growth before flagging')
+    parser.add_argument('--compare-times', action='store_true', help='gate wall times even if the baseline is from another host')
+    parser.add_argument('--json', help='also write the results to this file')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--out', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    pages = args.pages.split(',') if args.pages else all_pages()
+
+    if args.worker:
+        run_worker(pages, args.timeout, args.out)
+        return 0
+
+    results = {}
+    for scale in (int(s) for s in args.scales.split(',')):
+        print(f"\n=== {scale}x ===")
+        results[f"{scale}x"] = run_scale(scale, pages, args.timeout)
+        print(f"{'Page':<45}" + ''.join(f"{m:>21}" for m in METRICS))
+        for page, metrics in results[f"{scale}x"].items():
+            row = ''.join(f"{metrics[m]:>21}" for m in METRICS)
+            print(f"{page:<45}{row}" + (f"  ERROR: {metrics['Error']}" if metrics['Error'] else ''))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as handle:
+            json.dump(results, handle, indent=2)
+    # A page that fails to render fails the run, with or without a baseline to compare against.
+    failed = [(scale, page) for scale, pages in results.items() for page, m in pages.items() if m['Error']]
+    for scale, page in failed:
+        print(f"FAILED {scale} {page}: {results[scale][page]['Error']}")
+    if failed:
+        return 1
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as handle:
+            json.dump({'host': host_fingerprint(), 'results': results}, handle, indent=2)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; rerun with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    metrics = METRICS
+    if baseline.get('host') != host_fingerprint() and not args.compare_times:
+        metrics = [m for m in METRICS if m not in TIMING_METRICS]
+        print(f"\nBaseline was recorded on another host ({baseline.get('host', {}).get('host', 'unknown')}); "
+              "wall times are reported but not compared (use --compare-times to gate them).")
+    regressions = compare(results, baseline['results'], args.tolerance, metrics)
+    for scale, page, metric, old, new in regressions:
+        print(f"REGRESSION {scale} {page}: {metric} {old} -> {new}")
+    if not regressions:
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}.")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
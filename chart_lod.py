@@ -0,0 +1,70 @@
+# chart_lod.py
+
+import numpy as np
+
+LOD_THRESHOLD = 5000      # series longer than this switch to WebGL + downsampling
+LOD_MAX_POINTS = 2000     # points sent to the browser per downsampled trace
+
+# --- Shape-Preserving Downsampling ---
+def minmax_indices(y, n_buckets):
+    """Keeps the first, last, minimum and maximum point of each equal-width bucket (fully vectorized)."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 2 * n_buckets:
+        return np.arange(n)
+    size = int(np.ceil(n / n_buckets))
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lo = np.argmin(np.where(np.isnan(blocks), np.inf, blocks), axis=1) + offsets
+    hi = np.argmax(np.where(np.isnan(blocks), -np.inf, blocks), axis=1) + offsets
+    keep = np.concatenate([[0, n - 1], lo, hi])
+    return np.unique(keep[keep < n])
+
+def lttb_indices(x, y, n_out):
+    """Largest-Triangle-Three-Buckets selection of `n_out` representative points."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = edges[i + 1], edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_stop].mean() if next_stop > next_start else x[-1]
+        avg_y = np.nanmean(y[next_start:next_stop]) if next_stop > next_start else y[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:stop] - y[a]) - (x[a] - x[start:stop]) * (avg_y - y[a]))
+        a = start + int(np.nanargmax(area)) if np.isfinite(area).any() else start
+        selected[i + 1] = a
+    return selected
+
+def downsample_indices(x, y, max_points=LOD_MAX_POINTS, method='minmax', keep=None):
+    """Returns sorted row positions to render: a downsampled outline plus every position in `keep`."""
+    if method == 'lttb':
+        idx = lttb_indices(x, y, max_points)
+    else:
+        idx = minmax_indices(y, max(1, max_points // 2))
+    if keep is not None:
+        idx = np.union1d(idx, np.flatnonzero(keep))
+    return idx
+
+def thin_markers(mask, max_points=LOD_MAX_POINTS, score=None):
+    """Row positions flagged in `mask`, thinned to at most `max_points` (the highest `score` per equal-width bucket).
+
+    All flagged positions are returned when they fit; otherwise the series is split into
+    `max_points` buckets and each bucket keeps its most extreme flagged point.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    hits = np.flatnonzero(mask)
+    if len(hits) <= max_points:
+        return hits
+    score = np.zeros(len(mask)) if score is None else np.asarray(score, dtype=float)
+    bucket = hits * max_points // len(mask)
+    order = np.lexsort((-score[hits], bucket))
+    _, first = np.unique(bucket[order], return_index=True)
+    return np.sort(hits[order[first]])
@@ -0,0 +1,141 @@
+# cpv_capability.py
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+D2_MOVING_RANGE = 1.128  # d2 constant for moving ranges of span 2 (individuals charts)
+
+# --- Moment Helpers ---
+def _nan_moments(x, axis):
+    """Returns count, mean and sample std along `axis`, ignoring NaN values."""
+    valid = ~np.isnan(x)
+    n = valid.sum(axis=axis)
+    total = np.where(valid, x, 0.0).sum(axis=axis)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / n
+        centered = np.where(valid, x - np.expand_dims(mean, axis), 0.0)
+        std = np.sqrt((centered ** 2).sum(axis=axis) / (n - 1))
+    return n, mean, std
+
+def _indices(mean, sigma, lsl, usl):
+    """Returns the spread index (Pp/Cp) and the centering index (Ppk/Cpk) for the given sigma."""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        spread = (usl - lsl) / (6 * sigma)
+        upper = (usl - mean) / (3 * sigma)
+        lower = (mean - lsl) / (3 * sigma)
+    # fmin ignores NaN, so one-sided specs fall back to the available side.
+    return spread, np.fmin(upper, lower)
+
+# --- Batched Capability Engine ---
+def capability_table(data, specs, ci='analytic', confidence=0.95, n_boot=2000,
+                     max_chunk_bytes=64 * 2**20, seed=None):
+    """Calculates Pp, Ppk, Cp and Cpk with confidence intervals for every parameter in one call.
+
+    `data` is a batches × parameters DataFrame in batch order; `specs` is indexed by
+    parameter with 'LSL' and 'USL' columns (NaN for a one-sided specification).
+    Pp/Ppk use the overall standard deviation; Cp/Cpk use the within-process sigma
+    estimated from the average moving range. With ci='bootstrap', Pp/Ppk intervals are
+    percentile bootstraps computed in chunks of at most `max_chunk_bytes`; Cp/Cpk keep
+    analytic intervals because resampling batches destroys the moving-range order.
+    """
+    from scipy.stats import chi2, norm
+
+    specs = specs.loc[[p for p in specs.index if p in data.columns]]
+    parameters = list(specs.index)
+    x = data[parameters].to_numpy(dtype=float)
+    lsl = specs['LSL'].to_numpy(dtype=float)
+    usl = specs['USL'].to_numpy(dtype=float)
+    alpha = 1 - confidence
+
+    n, mean, sigma_overall = _nan_moments(x, axis=0)
+    _, mean_moving_range, _ = _nan_moments(np.abs(np.diff(x, axis=0)), axis=0)
+    sigma_within = mean_moving_range / D2_MOVING_RANGE
+    pp, ppk = _indices(mean, sigma_overall, lsl, usl)
+    cp, cpk = _indices(mean, sigma_within, lsl, usl)
+
+    # Analytic intervals: chi-square for the spread indices, Bissell's approximation for the centered ones.
+    dof = np.maximum(n - 1, 1)
+    z = norm.ppf(1 - alpha / 2)
+    spread_lo = np.sqrt(chi2.ppf(alpha / 2, dof) / dof)
+    spread_hi = np.sqrt(chi2.ppf(1 - alpha / 2, dof) / dof)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ppk_half = z * np.sqrt(1 / (9 * n) + ppk ** 2 / (2 * dof))
+        cpk_half = z * np.sqrt(1 / (9 * n) + cpk ** 2 / (2 * dof))
+    bounds = {
+        'Pp': (pp * spread_lo, pp * spread_hi), 'Ppk': (ppk - ppk_half, ppk + ppk_half),
+        'Cp': (cp * spread_lo, cp * spread_hi), 'Cpk': (cpk - cpk_half, cpk + cpk_half),
+    }
+    if ci == 'bootstrap':
+        bounds['Pp'], bounds['Ppk'] = bootstrap_ppk_intervals(x, lsl, usl, confidence, n_boot, max_chunk_bytes, seed)
+    elif ci != 'analytic':
+        raise ValueError(f"Unknown confidence interval method: {ci!r}")
+
+    table = pd.DataFrame({
+        'N': n, 'Mean': mean, 'Std Dev (Overall)': sigma_overall, 'Std Dev (Within)': sigma_within,
+        'LSL': lsl, 'USL': usl,
+    }, index=pd.Index(parameters, name='Parameter'))
+    for name, value in (('Pp', pp), ('Ppk', ppk), ('Cp', cp), ('Cpk', cpk)):
+        table[name] = value
+        table[f'{name} Lower'], table[f'{name} Upper'] = bounds[name]
+    return table
+
+def bootstrap_ppk_intervals(x, lsl, usl, confidence=0.95, n_boot=2000, max_chunk_bytes=64 * 2**20, seed=None):
+    """Percentile bootstrap intervals for Pp and Ppk of every column, resampled in memory-bounded chunks.
+
+    Each resample is represented by its multinomial row counts, so the resampled
+    moments of all parameters come from three matrix products per chunk instead of
+    materializing a (replicates × batches × parameters) array.
+    """
+    rng = np.random.default_rng(seed)
+    n_rows, n_params = x.shape
+    valid = ~np.isnan(x)
+    shift = np.nan_to_num(_nan_moments(x, axis=0)[1])  # centering keeps the sums of squares well conditioned
+    centered = np.where(valid, x - shift, 0.0)
+    chunk = max(1, int(max_chunk_bytes // max(1, 8 * (n_rows + 3 * n_params))))
+    pp_draws = np.empty((n_boot, n_params))
+    ppk_draws = np.empty((n_boot, n_params))
+    for start in range(0, n_boot, chunk):
+        size = min(chunk, n_boot - start)
+        weights = rng.multinomial(n_rows, np.full(n_rows, 1 / n_rows), size=size).astype(float)
+        n = weights @ valid
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (weights @ centered) / n
+            var = ((weights @ centered ** 2) - n * mean ** 2) / (n - 1)
+        sigma = np.sqrt(np.maximum(var, 0.0))
+        pp_draws[start:start + size], ppk_draws[start:start + size] = _indices(mean + shift, sigma, lsl, usl)
+    alpha = 1 - confidence
+    quantiles = [100 * alpha / 2, 100 * (1 - alpha / 2)]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)  # one-sided specs leave Pp all-NaN
+        pp_lo, pp_hi = np.nanpercentile(pp_draws, quantiles, axis=0)
+        ppk_lo, ppk_hi = np.nanpercentile(ppk_draws, quantiles, axis=0)
+    return (pp_lo, pp_hi), (ppk_lo, ppk_hi)
+
+# --- Rolling Capability Trend ---
+def rolling_ppk(data, specs, window=30):
+    """Ppk over a sliding window of `window` batches for every specified parameter, in one O(n) pass.
+
+    Window means and standard deviations come from differences of cumulative sums
+    and sums of squares (centered on each column's mean for numerical stability),
+    so the whole trajectory costs the same as a single pass over the history.
+    The first `window - 1` batches have no full window and are NaN.
+    """
+    specs = specs.loc[[p for p in specs.index if p in data.columns]]
+    x = data[list(specs.index)].to_numpy(dtype=float)
+    n_rows = len(x)
+    if n_rows < window:
+        return pd.DataFrame(np.nan, index=data.index, columns=specs.index)
+    valid = ~np.isnan(x)
+    shift = np.nan_to_num(_nan_moments(x, axis=0)[1])
+    centered = np.where(valid, x - shift, 0.0)
+    zeros = np.zeros((1, x.shape[1]))
+    sums = [np.vstack([zeros, np.cumsum(a, axis=0)]) for a in (valid.astype(float), centered, centered ** 2)]
+    n, s1, s2 = (c[window:] - c[:-window] for c in sums)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = s1 / n
+        sigma = np.sqrt(np.maximum(s2 - n * mean ** 2, 0.0) / (n - 1))
+    _, ppk = _indices(mean + shift, sigma, specs['LSL'].to_numpy(dtype=float), specs['USL'].to_numpy(dtype=float))
+    trajectory = np.vstack([np.full((window - 1, x.shape[1]), np.nan), ppk])
+    return pd.DataFrame(trajectory, index=data.index, columns=specs.index)
@@ -0,0 +1,108 @@
+# cpv_drift.py
+
+import numpy as np
+import pandas as pd
+
+# --- Vectorized CUSUM / EWMA Recurrences ---
+def tabular_cusum(z, k=0.5, initial=None):
+    """Upper and lower tabular CUSUM of standardized values `z` (batches × parameters).
+
+    C_t = max(0, C_{t-1} + z_t - k) is a Lindley recursion, so it equals the running
+    sum of increments minus its running minimum (seeded with -C_0); both are single
+    cumulative scans over the batch axis. Missing values leave the statistic unchanged.
+    """
+    z = np.atleast_2d(np.asarray(z, dtype=float))
+    n_params = z.shape[1]
+    hi0, lo0 = (np.zeros(n_params), np.zeros(n_params)) if initial is None else initial
+
+    def lindley(increments, c0):
+        walk = np.cumsum(np.where(np.isnan(increments), 0.0, increments), axis=0)
+        floor = np.minimum(np.minimum.accumulate(walk, axis=0), -c0)
+        return walk - floor
+
+    return lindley(z - k, hi0), lindley(-z - k, lo0)
+
+def ewma(z, lam=0.2, initial=None):
+    """Exponentially weighted moving average of standardized values along the batch axis (linear filter).
+
+    Missing values are treated as on-target (0) so the recurrence stays a single linear filter.
+    """
+    from scipy.signal import lfilter
+    z = np.atleast_2d(np.asarray(z, dtype=float))
+    z0 = np.zeros(z.shape[1]) if initial is None else initial
+    return lfilter([lam], [1.0, -(1.0 - lam)], np.nan_to_num(z), axis=0, zi=((1.0 - lam) * z0)[None, :])[0]
+
+def ewma_limit(t, lam=0.2, L=3.0):
+    """Time-varying EWMA control limit (in σ units) for batch numbers `t` (1-based)."""
+    return L * np.sqrt(lam / (2 - lam) * (1 - (1 - lam) ** (2 * np.asarray(t, dtype=float))))
+
+# --- Incremental Drift Monitor ---
+class DriftMonitor:
+    """CUSUM and EWMA drift statistics for every monitored parameter, updated as batches arrive.
+
+    Values are standardized with the supplied center line and sigma (e.g. the Phase I
+    control limits). `sync(df)` only processes batches appended since the last call,
+    continuing the recurrences from the stored end state.
+    """
+
+    def __init__(self, parameters, center, sigma, k=0.5, h=5.0, lam=0.2, L=3.0):
+        self.parameters = list(parameters)
+        self.center = np.asarray(center, dtype=float)
+        self.sigma = np.asarray(sigma, dtype=float)
+        self.k, self.h, self.lam, self.L = k, h, lam, L
+        n_params = len(self.parameters)
+        self.state = (np.zeros(n_params), np.zeros(n_params), np.zeros(n_params))
+        self.n_batches = 0
+        self._chunks = []
+
+    def update(self, block):
+        """Processes a block of new batches (rows) and returns their CUSUM/EWMA statistics."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            z = (np.atleast_2d(np.asarray(block, dtype=float)) - self.center) / self.sigma
+        hi0, lo0, ewma0 = self.state
+        cusum_hi, cusum_lo = tabular_cusum(z, self.k, (hi0, lo0))
+        smoothed = ewma(z, self.lam, ewma0)
+        t = np.arange(self.n_batches + 1, self.n_batches + len(z) + 1)
+        limit = ewma_limit(t, self.lam, self.L)[:, None]
+        chunk = {'cusum_hi': cusum_hi, 'cusum_lo': cusum_lo, 'ewma': smoothed, 'ewma_limit': np.broadcast_to(limit, smoothed.shape)}
+        self.state = (cusum_hi[-1], cusum_lo[-1], smoothed[-1])
+        self.n_batches += len(z)
+        self._chunks.append(chunk)
+        return chunk
+
+    def sync(self, df):
+        """Folds in the batches of `df` not processed yet."""
+        if len(df) > self.n_batches:
+            self.update(df[self.parameters].iloc[self.n_batches:].to_numpy(dtype=float))
+        return self
+
+    def history(self):
+        """Returns the full CUSUM/EWMA history as arrays of shape (batches, parameters)."""
+        if len(self._chunks) > 1:
+            self._chunks = [{key: np.concatenate([c[key] for c in self._chunks]) for key in self._chunks[0]}]
+        return self._chunks[0] if self._chunks else {}
+
+    def alarms(self):
+        """Boolean alarm masks (batches × parameters) for the CUSUM and EWMA statistics."""
+        hist = self.history()
+        return {
+            'CUSUM High': hist['cusum_hi'] > self.h, 'CUSUM Low': hist['cusum_lo'] > self.h,
+            'EWMA High': hist['ewma'] > hist['ewma_limit'], 'EWMA Low': hist['ewma'] < -hist['ewma_limit'],
+        }
+
+    def summary(self, batch_ids):
+        """Per-parameter drift status: first alarm batch and direction for each method, plus current statistics."""
+        hist, masks = self.history(), self.alarms()
+        batch_ids = np.asarray(batch_ids)
+        rows = {}
+        for method in ('CUSUM', 'EWMA'):
+            high, low = masks[f'{method} High'], masks[f'{method} Low']
+            any_alarm = high | low
+            first = np.where(any_alarm.any(axis=0), any_alarm.argmax(axis=0), -1)
+            rows[f'{method} First Alarm'] = np.where(first >= 0, batch_ids[np.maximum(first, 0)], None)
+            rows[f'{method} Direction'] = np.select(
+                [high.any(axis=0) & low.any(axis=0), high.any(axis=0), low.any(axis=0)], ['Both', 'Upward', 'Downward'], 'None')
+        rows['Current C+'] = hist['cusum_hi'][-1]
+        rows['Current C−'] = hist['cusum_lo'][-1]
+        rows['Current EWMA (σ)'] = hist['ewma'][-1]
+        return pd.DataFrame(rows, index=pd.Index(self.parameters, name='Parameter'))
@@ -0,0 +1,84 @@
+# cpv_mspc.py
+
+import numpy as np
+import pandas as pd
+
+# --- PCA-Based Multivariate Statistical Process Control ---
+class PCAMonitor:
+    """PCA model fitted on a reference window and used to score batches for Hotelling T² and SPE.
+
+    The reference data are autoscaled (mean-centered, unit variance); the number of
+    retained components is either fixed or the smallest number explaining
+    `explained_variance` of the reference variance. Scoring, limits and contribution
+    calculations are plain matrix products, so any number of batches is scored in
+    one vectorized call.
+    """
+
+    def __init__(self, n_components=None, explained_variance=0.9, confidence=0.99):
+        self.n_components = n_components
+        self.explained_variance = explained_variance
+        self.confidence = confidence
+
+    def fit(self, reference):
+        """Fits the model on the reference batches (rows with missing values are dropped)."""
+        from scipy.stats import chi2, f
+
+        self.parameters = list(reference.columns)
+        x = reference.to_numpy(dtype=float)
+        x = x[~np.isnan(x).any(axis=1)]
+        n, k = x.shape
+        if n < 3:
+            raise ValueError("At least three complete reference batches are required to fit the PCA model.")
+        self.mean_ = x.mean(axis=0)
+        std = x.std(axis=0, ddof=1)
+        self.std_ = np.where(std > 0, std, 1.0)
+        z = (x - self.mean_) / self.std_
+        _, singular, vt = np.linalg.svd(z, full_matrices=False)
+        eigenvalues = singular ** 2 / (n - 1)
+        max_components = min(n - 1, k)
+        if self.n_components is None:
+            cumulative = np.cumsum(eigenvalues) / eigenvalues.sum()
+            a = int(np.searchsorted(cumulative, self.explained_variance) + 1)
+        else:
+            a = self.n_components
+        a = max(1, min(a, max_components))
+        self.n_components_ = a
+        self.loadings_ = vt[:a].T
+        self.eigenvalues_ = eigenvalues[:a]
+        self.explained_variance_ratio_ = eigenvalues[:a] / eigenvalues.sum()
+        self.n_reference_ = n
+
+        # Phase II T² limit (F distribution) and Box's chi-square approximation for SPE.
+        self.t2_limit_ = a * (n - 1) * (n + 1) / (n * (n - a)) * f.ppf(self.confidence, a, n - a)
+        residual = eigenvalues[a:]
+        theta1, theta2 = residual.sum(), (residual ** 2).sum()
+        self.spe_limit_ = (theta2 / theta1) * chi2.ppf(self.confidence, theta1 ** 2 / theta2) if theta2 > 0 else np.nan
+        return self
+
+    def _decompose(self, data):
+        z = (data[self.parameters].to_numpy(dtype=float) - self.mean_) / self.std_
+        scores = z @ self.loadings_
+        residuals = z - scores @ self.loadings_.T
+        return z, scores, residuals
+
+    def score(self, data):
+        """Returns T², SPE and their alarm flags for every batch in `data`."""
+        _, scores, residuals = self._decompose(data)
+        t2 = np.sum(scores ** 2 / self.eigenvalues_, axis=1)
+        spe = np.sum(residuals ** 2, axis=1)
+        result = pd.DataFrame({
+            'T²': t2, 'SPE': spe, 'T² Alarm': t2 > self.t2_limit_, 'SPE Alarm': spe > self.spe_limit_
+        }, index=data.index)
+        components = pd.DataFrame(scores, index=data.index, columns=[f'PC{a + 1}' for a in range(self.n_components_)])
+        return pd.concat([result, components], axis=1)
+
+    def contributions(self, data, statistic='SPE'):
+        """Per-variable contributions to T² or SPE for every batch (rows sum to the statistic)."""
+        z, scores, residuals = self._decompose(data)
+        if statistic == 'SPE':
+            values = residuals ** 2
+        elif statistic == 'T²':
+            values = z * ((scores / self.eigenvalues_) @ self.loadings_.T)
+        else:
+            raise ValueError(f"Unknown statistic: {statistic!r}")
+        return pd.DataFrame(values, index=data.index, columns=self.parameters)
@@ -0,0 +1,87 @@
+# cpv_rules.py
+
+import numpy as np
+import pandas as pd
+
+# --- Nelson Rule Definitions ---
+NELSON_RULES = {
+    1: "1 point beyond 3σ",
+    2: "9 points in a row on the same side of the mean",
+    3: "6 points in a row steadily increasing or decreasing",
+    4: "14 points in a row alternating up and down",
+    5: "2 of 3 points beyond 2σ on the same side",
+    6: "4 of 5 points beyond 1σ on the same side",
+    7: "15 points in a row within 1σ",
+    8: "8 points in a row beyond 1σ on either side",
+}
+
+def _window_count(cond, window):
+    """Counts True values in the trailing `window` rows ending at each row (0 until a full window exists)."""
+    n = cond.shape[0]
+    counts = np.zeros(cond.shape, dtype=np.int32)
+    if n < window:
+        return counts
+    csum = np.cumsum(cond, axis=0, dtype=np.int32)
+    counts[window - 1] = csum[window - 1]
+    counts[window:] = csum[window:] - csum[:-window]
+    return counts
+
+def _run_of(cond, window):
+    """Flags rows that end a run of `window` consecutive True values."""
+    return _window_count(cond, window) == window
+
+# --- Vectorized Rules Engine ---
+def evaluate_nelson_rules(values, center, sigma):
+    """Evaluates all eight Nelson rules over a batches × parameters matrix in one NumPy pass.
+
+    Returns a uint8 array of the same shape where bit (r - 1) is set when a batch
+    completes a rule-r pattern for that parameter. NaN values never trigger a rule.
+    """
+    x = np.asarray(values, dtype=float)
+    if x.ndim == 1:
+        x = x[:, None]
+    n, k = x.shape
+    with np.errstate(invalid='ignore', divide='ignore'):
+        z = (x - np.asarray(center, dtype=float)) / np.asarray(sigma, dtype=float)
+    valid = ~np.isnan(z)
+    above, below = valid & (z > 0), valid & (z < 0)
+    mask = np.zeros((n, k), dtype=np.uint8)
+
+    def set_rule(rule, hits):
+        np.bitwise_or(mask, hits.view(np.uint8) << np.uint8(rule - 1), out=mask)
+
+    set_rule(1, valid & (np.abs(z) > 3))
+    set_rule(2, _run_of(above, 9) | _run_of(below, 9))
+
+    # Rules 3 and 4 look at point-to-point changes; row i of `diff` ends at batch i + 1.
+    diff = np.diff(x, axis=0)
+    pad = np.zeros((1, k), dtype=bool)
+    rising = np.vstack([pad, diff > 0])
+    falling = np.vstack([pad, diff < 0])
+    set_rule(3, _run_of(rising, 5) | _run_of(falling, 5))
+    alternating = np.vstack([pad, pad, (diff[1:] * diff[:-1]) < 0]) if n > 1 else np.zeros((n, k), dtype=bool)
+    set_rule(4, _run_of(alternating, 12))
+
+    set_rule(5, (_window_count(z > 2, 3) >= 2) & (z > 2) | (_window_count(z < -2, 3) >= 2) & (z < -2))
+    set_rule(6, (_window_count(z > 1, 5) >= 4) & (z > 1) | (_window_count(z < -1, 5) >= 4) & (z < -1))
+    set_rule(7, _run_of(valid & (np.abs(z) < 1), 15))
+    set_rule(8, _run_of(valid & (np.abs(z) > 1), 8))
+    return mask
+
+def rule_hits(mask, rule):
+    """Extracts the boolean violation mask for a single rule from a packed rule mask."""
+    return (mask & np.uint8(1 << (rule - 1))) > 0
+
+def describe_violations(mask_column):
+    """Converts a packed mask column into comma-separated rule numbers per batch (for hover text)."""
+    bits = (np.asarray(mask_column)[:, None] >> np.arange(8, dtype=np.uint8)) & 1
+    return [", ".join(str(r + 1) for r in np.flatnonzero(row)) for row in bits]
+
+def rule_summary(mask, parameters):
+    """Summarizes violation counts per parameter and rule as a DataFrame."""
+    bits = (mask[..., None] >> np.arange(8, dtype=np.uint8)) & 1
+    counts = bits.sum(axis=0)
+    summary = pd.DataFrame(counts, index=pd.Index(parameters, name='Parameter'),
+                           columns=[f"Rule {r}" for r in NELSON_RULES])
+    summary['Total Signals'] = summary.sum(axis=1)
+    return summary
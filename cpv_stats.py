@@ -0,0 +1,215 @@
+# cpv_stats.py
+
+import numpy as np
+import pandas as pd
+
+# --- Running Sufficient Statistics for CPV Control Limits ---
+class RunningStats:
+    """Keeps per-parameter count, mean and M2 so limits update in O(1) per appended batch.
+
+    Statistics are accumulated with Welford's update (single batches) and Chan's
+    pairwise merge (blocks of batches). NaN values are ignored per parameter.
+    Calling `freeze()` captures the current limits as a Phase I baseline; the
+    running statistics keep updating, but `limits()` reports the frozen baseline
+    until `unfreeze()` is called (Phase II monitoring).
+    """
+
+    def __init__(self, parameters):
+        self.parameters = list(parameters)
+        n_params = len(self.parameters)
+        self.count = np.zeros(n_params)
+        self.mean = np.zeros(n_params)
+        self.m2 = np.zeros(n_params)
+        self.n_batches = 0
+        self.baseline = None
+
+    @classmethod
+    def from_frame(cls, df, parameters=None):
+        """Builds the running statistics from an existing batch history."""
+        stats = cls(parameters if parameters is not None else df.select_dtypes(include=np.number).columns)
+        stats.extend(df[stats.parameters].to_numpy(dtype=float))
+        return stats
+
+    def update(self, values):
+        """Appends a single batch (one value per parameter) with Welford's update."""
+        x = np.asarray(values, dtype=float)
+        valid = ~np.isnan(x)
+        self.count += valid
+        delta = np.where(valid, x - self.mean, 0.0)
+        self.mean += np.divide(delta, self.count, out=np.zeros_like(delta), where=valid)
+        self.m2 += np.where(valid, delta * (x - self.mean), 0.0)
+        self.n_batches += 1
+
+    def extend(self, block):
+        """Appends a block of batches (rows) by merging its moments in one vectorized step."""
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        if block.shape[0] == 0:
+            return
+        n_b = np.sum(~np.isnan(block), axis=0).astype(float)
+        mean_b = np.nansum(block, axis=0) / np.maximum(n_b, 1.0)
+        m2_b = np.nansum((block - mean_b) ** 2, axis=0)
+        total = self.count + n_b
+        delta = mean_b - self.mean
+        safe_total = np.where(total > 0, total, 1.0)
+        self.mean = self.mean + delta * n_b / safe_total
+        self.m2 = self.m2 + m2_b + delta ** 2 * self.count * n_b / safe_total
+        self.count = total
+        self.n_batches += block.shape[0]
+
+    def sync(self, df):
+        """Appends only the batches of `df` that have not been seen yet."""
+        if len(df) > self.n_batches:
+            self.extend(df[self.parameters].iloc[self.n_batches:].to_numpy(dtype=float))
+        return self
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1), matching pandas' `Series.std()`."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, np.sqrt(self.m2 / (self.count - 1)), np.nan)
+
+    def freeze(self):
+        """Captures the current mean/std as the Phase I baseline for control limits."""
+        self.baseline = {'mean': self.mean.copy(), 'std': self.std.copy(), 'count': self.count.copy()}
+
+    def unfreeze(self):
+        """Returns to live (Phase I) limits computed from the full running history."""
+        self.baseline = None
+
+    @property
+    def is_frozen(self):
+        return self.baseline is not None
+
+    def limits(self, sigma=3.0):
+        """Returns center line, standard deviation and control limits per parameter."""
+        if self.is_frozen:
+            mean, std, count = self.baseline['mean'], self.baseline['std'], self.baseline['count']
+        else:
+            mean, std, count = self.mean, self.std, self.count
+        return pd.DataFrame({
+            'N': count.astype(int), 'Mean': mean, 'Std Dev': std,
+            'LCL': mean - sigma * std, 'UCL': mean + sigma * std
+        }, index=pd.Index(self.parameters, name='Parameter'))
+
+
+def ppk_from_moments(mean, std_dev, usl, lsl):
+    """Calculates Ppk from precomputed mean and standard deviation."""
+    if std_dev == 0: return np.inf
+    ppu = (usl - mean) / (3 * std_dev)
+    ppl = (mean - lsl) / (3 * std_dev)
+    return min(ppu, ppl)
+
+
+# --- Streaming Covariance / Correlation ---
+class StreamingCovariance:
+    """Keeps the mean vector and co-moment matrix of a set of parameters for incremental correlation.
+
+    Appending a batch costs O(k²) for k parameters instead of a full `DataFrame.corr()`.
+    With `window=N` the engine tracks only the last N batches, removing the oldest
+    batch with an inverse Welford step as each new one arrives. Batches with any
+    missing value are skipped (complete-case correlation).
+    """
+
+    def __init__(self, parameters, window=None):
+        self.parameters = list(parameters)
+        self.window = window
+        n_params = len(self.parameters)
+        self.count = 0
+        self.mean = np.zeros(n_params)
+        self.comoment = np.zeros((n_params, n_params))
+        self.n_batches = 0
+
+    def update(self, values):
+        """Adds one batch to the running co-moment matrix."""
+        x = np.asarray(values, dtype=float)
+        if np.isnan(x).any():
+            return
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.comoment += np.outer(delta, x - self.mean)
+
+    def remove(self, values):
+        """Removes one previously added batch (inverse Welford step)."""
+        x = np.asarray(values, dtype=float)
+        if np.isnan(x).any() or self.count == 0:
+            return
+        if self.count == 1:
+            self.__init__(self.parameters, self.window)
+            return
+        self.count -= 1
+        delta = x - self.mean
+        self.mean -= delta / self.count
+        self.comoment -= np.outer(delta, x - self.mean)
+
+    def extend(self, block):
+        """Adds a block of batches by merging its co-moments in one vectorized step."""
+        block = np.atleast_2d(np.asarray(block, dtype=float))
+        block = block[~np.isnan(block).any(axis=1)]
+        n_b = len(block)
+        if n_b == 0:
+            return
+        mean_b = block.mean(axis=0)
+        centered = block - mean_b
+        delta = mean_b - self.mean
+        total = self.count + n_b
+        self.comoment += centered.T @ centered + np.outer(delta, delta) * self.count * n_b / total
+        self.mean += delta * n_b / total
+        self.count = total
+
+    def sync(self, df):
+        """Folds in the batches of `df` not seen yet, sliding the window forward if one is set."""
+        n_rows, seen = len(df), self.n_batches
+        if n_rows <= seen:
+            return self
+        frame = df[self.parameters]
+        if self.window is None:
+            self.extend(frame.iloc[seen:].to_numpy(dtype=float))
+        elif seen == 0 or n_rows - seen >= self.window:
+            self.__init__(self.parameters, self.window)
+            self.extend(frame.iloc[-self.window:].to_numpy(dtype=float))
+        else:
+            added = frame.iloc[seen:].to_numpy(dtype=float)
+            dropped = frame.iloc[max(0, seen - self.window):max(0, n_rows - self.window)].to_numpy(dtype=float)
+            offset = len(added) - len(dropped)
+            for i, row in enumerate(added):
+                self.update(row)
+                if i >= offset:
+                    self.remove(dropped[i - offset])
+        self.n_batches = n_rows
+        return self
+
+    def cov(self):
+        """Sample covariance matrix (ddof=1) as a DataFrame."""
+        scale = self.count - 1 if self.count > 1 else np.nan
+        return pd.DataFrame(self.comoment / scale, index=self.parameters, columns=self.parameters)
+
+    def corr(self):
+        """Pearson correlation matrix as a DataFrame."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(np.diag(self.comoment))
+            corr = self.comoment / np.outer(std, std)
+        return pd.DataFrame(np.clip(corr, -1, 1), index=self.parameters, columns=self.parameters)
+
+
+def rolling_correlation(df, pairs, window):
+    """Computes the rolling Pearson correlation of each (x, y) column pair over the last `window` batches.
+
+    Uses cumulative sums of x, y, x², y² and the cross-product x·y, so every window of
+    every pair comes out of a single O(n) pass instead of one recompute per window.
+    """
+    result = {}
+    for x_col, y_col in pairs:
+        x = df[x_col].to_numpy(dtype=float)
+        y = df[y_col].to_numpy(dtype=float)
+        valid = ~(np.isnan(x) | np.isnan(y))
+        # Centering on the global means keeps the sums of squares well conditioned.
+        xc = np.where(valid, x - np.nanmean(x), 0.0)
+        yc = np.where(valid, y - np.nanmean(y), 0.0)
+        sums = np.cumsum(np.vstack([valid, xc, yc, xc * xc, yc * yc, xc * yc]), axis=1)
+        sums = np.hstack([np.zeros((6, 1)), sums])
+        n, sx, sy, sxx, syy, sxy = sums[:, window:] - sums[:, :-window] if len(x) >= window else np.empty((6, 0))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+        result[f"{x_col} × {y_col}"] = np.concatenate([np.full(min(len(x), window - 1), np.nan), np.clip(r, -1, 1)])
+    return pd.DataFrame(result, index=df.index)
@@ -0,0 +1,94 @@
+# cpv_store.py
+
+import os
+
+import pandas as pd
+
+DEFAULT_STORE_ROOT = os.environ.get(
+    'GRIFOLS_CPV_STORE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cpv_store')
+)
+SEQ_COLUMN = 'Batch Seq'
+ROW_GROUP_SIZE = 4096
+
+# --- Columnar, Partitioned CPV Batch Store ---
+class CPVBatchStore:
+    """Parquet-backed CPV history, partitioned by product line and unit operation.
+
+    Each partition is a hive-style directory (`product_line=.../unit_operation=...`)
+    of append-only part files. Every row carries a monotonically increasing
+    `Batch Seq`, so batch-range requests are pushed down to Parquet row-group
+    statistics; only the requested columns and row groups are read, through a
+    memory-mapped local filesystem.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_ROOT):
+        import pyarrow.fs as pafs
+        self.root = root
+        self.filesystem = pafs.LocalFileSystem(use_mmap=True)
+
+    def partition_path(self, product_line, unit_operation):
+        return os.path.join(self.root, f"product_line={product_line}", f"unit_operation={unit_operation}")
+
+    def _part_files(self, product_line, unit_operation):
+        path = self.partition_path(product_line, unit_operation)
+        if not os.path.isdir(path):
+            return []
+        return sorted(os.path.join(path, f) for f in os.listdir(path) if f.endswith('.parquet'))
+
+    def partitions(self):
+        """Lists the stored (product line, unit operation) partitions with their batch counts."""
+        rows = []
+        if os.path.isdir(self.root):
+            for product_dir in sorted(os.listdir(self.root)):
+                if not product_dir.startswith('product_line='):
+                    continue
+                product_line = product_dir.split('=', 1)[1]
+                for unit_dir in sorted(os.listdir(os.path.join(self.root, product_dir))):
+                    if unit_dir.startswith('unit_operation='):
+                        unit_operation = unit_dir.split('=', 1)[1]
+                        rows.append({'Product Line': product_line, 'Unit Operation': unit_operation,
+                                     'Batches': self.n_batches(product_line, unit_operation)})
+        return pd.DataFrame(rows, columns=['Product Line', 'Unit Operation', 'Batches'])
+
+    def n_batches(self, product_line, unit_operation):
+        """Returns the number of stored batches from Parquet footers, without reading any column data."""
+        import pyarrow.parquet as pq
+        return sum(pq.ParquetFile(f).metadata.num_rows for f in self._part_files(product_line, unit_operation))
+
+    def columns(self, product_line, unit_operation):
+        """Returns the stored column names of a partition (read from the schema only)."""
+        import pyarrow.parquet as pq
+        files = self._part_files(product_line, unit_operation)
+        return [c for c in pq.read_schema(files[0]).names if c != SEQ_COLUMN] if files else []
+
+    def append(self, df, product_line, unit_operation):
+        """Appends new batches to a partition as a new part file, continuing the batch sequence."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        start = self.n_batches(product_line, unit_operation)
+        table = pa.Table.from_pandas(df.reset_index(drop=True), preserve_index=False)
+        table = table.append_column(SEQ_COLUMN, pa.array(range(start, start + len(df)), type=pa.int64()))
+        path = self.partition_path(product_line, unit_operation)
+        os.makedirs(path, exist_ok=True)
+        pq.write_table(table, os.path.join(path, f"part-{start:012d}.parquet"),
+                       row_group_size=ROW_GROUP_SIZE, write_statistics=True)
+        return start + len(df)
+
+    def load(self, product_line, unit_operation, columns=None, batch_range=None):
+        """Loads a slice of a partition: only `columns`, and only batches with start <= Batch Seq < stop."""
+        import pyarrow.dataset as ds
+        files = self._part_files(product_line, unit_operation)
+        if not files:
+            return pd.DataFrame(columns=list(columns or []))
+        dataset = ds.dataset(files, format='parquet', filesystem=self.filesystem)
+        predicate = None
+        if batch_range is not None:
+            start, stop = batch_range
+            if start is not None:
+                predicate = ds.field(SEQ_COLUMN) >= start
+            if stop is not None:
+                upper = ds.field(SEQ_COLUMN) < stop
+                predicate = upper if predicate is None else predicate & upper
+        read_columns = None if columns is None else list(dict.fromkeys(list(columns) + [SEQ_COLUMN]))
+        table = dataset.to_table(columns=read_columns, filter=predicate)
+        return table.to_pandas().set_index(SEQ_COLUMN).sort_index()
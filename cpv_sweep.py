@@ -0,0 +1,94 @@
+# cpv_sweep.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from cpv_capability import capability_table
+from cpv_rules import evaluate_nelson_rules, rule_hits
+from cpv_stats import RunningStats
+from cpv_store import DEFAULT_STORE_ROOT, CPVBatchStore
+
+SWEEP_COLUMNS = [
+    'Product Line', 'Unit Operation', 'Parameter', 'Batches', 'N', 'Mean', 'Std Dev', 'LCL', 'UCL',
+    'OOC Batches', 'Rule Signals', 'Ppk', 'Ppk Lower', 'Cpk', 'Status'
+]
+
+# --- Partition Worker ---
+def evaluate_partition(root, product_line, unit_operation, specs=None, baseline_batches=None):
+    """Evaluates one (product line, unit operation) partition: control limits, Nelson rules and capability.
+
+    Runs in a worker process, so it opens the store itself from `root` and returns a
+    plain DataFrame with one row per numeric parameter. Limits come from the first
+    `baseline_batches` batches when given (Phase II), otherwise from the full history.
+    """
+    df = CPVBatchStore(root).load(product_line, unit_operation)
+    parameters = list(df.select_dtypes(include=np.number).columns)
+    if not parameters or len(df) < 2:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+
+    stats = RunningStats.from_frame(df.iloc[:baseline_batches] if baseline_batches else df, parameters)
+    if baseline_batches:
+        stats.freeze()
+    limits = stats.limits()
+    mask = evaluate_nelson_rules(df[parameters].to_numpy(dtype=float), limits['Mean'].to_numpy(), limits['Std Dev'].to_numpy())
+
+    summary = limits.copy()
+    # N is the limit sample (the baseline in Phase II); Batches is the partition's full history.
+    summary['Batches'] = len(df)
+    summary['OOC Batches'] = rule_hits(mask, 1).sum(axis=0)
+    summary['Rule Signals'] = (mask > 0).sum(axis=0)
+    summary['Ppk'] = summary['Ppk Lower'] = summary['Cpk'] = np.nan
+    if specs is not None:
+        specs = specs.loc[[p for p in specs.index if p in parameters]]
+        if len(specs):
+            capability = capability_table(df, specs)
+            summary.loc[capability.index, ['Ppk', 'Ppk Lower', 'Cpk']] = capability[['Ppk', 'Ppk Lower', 'Cpk']]
+    summary['Status'] = np.select(
+        [summary['OOC Batches'] > 0, summary['Ppk'] < 1.33, summary['Rule Signals'] > 0],
+        ['Out of Control', 'Not Capable', 'Run-Rule Signal'], 'In Control'
+    )
+    summary.insert(0, 'Product Line', product_line)
+    summary.insert(1, 'Unit Operation', unit_operation)
+    return summary.reset_index()[SWEEP_COLUMNS]
+
+# --- Site-Wide Sweep ---
+def run_site_sweep(root=DEFAULT_STORE_ROOT, partitions=None, specs=None, baseline_batches=None, max_workers=None):
+    """Fans the evaluation of every partition out across a process pool and merges the results.
+
+    `partitions` is a list of (product line, unit operation) pairs (default: every
+    partition in the store); `specs` maps those pairs to spec-limit DataFrames. With
+    `max_workers=1`, or a single partition, the sweep runs in-process.
+    """
+    if partitions is None:
+        listing = CPVBatchStore(root).partitions()
+        partitions = list(zip(listing['Product Line'], listing['Unit Operation']))
+    specs = specs or {}
+    jobs = [(root, pl, uo, specs.get((pl, uo)), baseline_batches) for pl, uo in partitions]
+    workers = min(max_workers or os.cpu_count() or 1, len(jobs))
+
+    if workers <= 1:
+        results = [evaluate_partition(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(evaluate_partition, *job) for job in jobs]
+            results = [future.result() for future in as_completed(futures)]
+    results = [r for r in results if len(r)]
+    if not results:
+        return pd.DataFrame(columns=SWEEP_COLUMNS)
+    return pd.concat(results, ignore_index=True).sort_values(['Product Line', 'Unit Operation', 'Parameter'], ignore_index=True)
+
+def sweep_overview(sweep):
+    """Rolls the per-parameter sweep up to one status row per partition."""
+    severity = {'Out of Control': 3, 'Not Capable': 2, 'Run-Rule Signal': 1, 'In Control': 0}
+    ranked = sweep.assign(Severity=sweep['Status'].map(severity))
+    overview = ranked.groupby(['Product Line', 'Unit Operation']).agg(
+        Parameters=('Parameter', 'size'), Batches=('Batches', 'max'),
+        OOC_Batches=('OOC Batches', 'sum'), Rule_Signals=('Rule Signals', 'sum'),
+        Min_Ppk=('Ppk', 'min'), Severity=('Severity', 'max'),
+    )
+    overview['Status'] = overview['Severity'].map({v: k for k, v in severity.items()})
+    overview.columns = [c.replace('_', ' ') for c in overview.columns]
+    return overview.drop(columns='Severity').reset_index()
@@ -0,0 +1,212 @@
+# critical_path.py
+
+import numpy as np
+import pandas as pd
+
+# Started or finished tasks keep their recorded start; later tasks start no earlier than planned.
+FIXED_START_STATUSES = ('Complete', 'In Progress')
+
+def parse_predecessors(value):
+    """Splits a 'TT-01, TT-02' style predecessor list into task IDs."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return []
+    return [p.strip() for p in str(value).split(',') if p.strip()]
+
+# --- CPM Schedule ---
+class Schedule:
+    """Critical-path schedule over the task networks of one or more projects.
+
+    Tasks are nodes and finish-to-start dependencies are edges of a DAG. Durations are whole
+    calendar days taken from the planned Start/Finish. The forward pass computes early
+    start/finish (a task starts no earlier than its planned start or its predecessors'
+    finish). The backward pass computes late start/finish against the task's project
+    finish. Total float is LS - ES, and tasks with zero float that are not complete form
+    the critical path.
+
+    Both passes run level by level over a topological levelling of the DAG. Each level is
+    a single vectorized max/min over its incoming edges, so cost grows with network depth,
+    not with the number of parallel projects. `update_task` recomputes only the changed
+    task's descendants (forward) and, unless its project finish moved, its ancestors (backward).
+    """
+
+    def __init__(self, tasks, task_column='Task ID', predecessor_column='Predecessors', project_column='Project'):
+        tasks = tasks.reset_index(drop=True)
+        projects = tasks[project_column] if project_column in tasks else pd.Series('', index=tasks.index)
+        self.tasks = tasks
+        self.task_column = task_column
+        self._keys = pd.MultiIndex.from_arrays([projects, tasks[task_column]])
+        if self._keys.has_duplicates:
+            raise ValueError("Task IDs must be unique within a project.")
+        self._project_codes, self.projects = pd.factorize(projects)
+        self.anchor = tasks['Start'].min()
+        self._start = self._days(tasks['Start'])
+        self._duration = self._days(tasks['Finish']) - self._start + 1
+        self._fixed = np.array(tasks['Status'].isin(FIXED_START_STATUSES))
+        self._build_edges(projects, tasks[task_column], tasks[predecessor_column])
+        self._levels = self._topological_levels()
+        self._es = np.zeros(len(tasks), dtype=np.int64)
+        self._ls = np.zeros(len(tasks), dtype=np.int64)
+        self._forward(np.ones(len(tasks), dtype=bool))
+        self._backward(np.ones(len(tasks), dtype=bool))
+
+    def _days(self, dates):
+        return np.array((pd.to_datetime(dates) - self.anchor) // pd.Timedelta(days=1), dtype=np.int64)
+
+    def _build_edges(self, projects, task_ids, predecessors):
+        pairs = [(project, pred, i) for i, (project, value) in enumerate(zip(projects, predecessors))
+                 for pred in parse_predecessors(value)]
+        if pairs:
+            src = self._keys.get_indexer(pd.MultiIndex.from_tuples([(p, pred) for p, pred, _ in pairs]))
+            if (src < 0).any():
+                missing = sorted({f"{p}/{pred}" for (p, pred, _), s in zip(pairs, src) if s < 0})
+                raise ValueError(f"Unknown predecessor task(s): {', '.join(missing[:5])}")
+            dst = np.array([i for _, _, i in pairs], dtype=np.int64)
+        else:
+            src = dst = np.array([], dtype=np.int64)
+        self._src, self._dst = src.astype(np.int64), dst
+        n = len(task_ids)
+        # CSR adjacency in both directions for the incremental reachability walks.
+        order = np.argsort(self._src, kind='stable')
+        self._succ_ptr = np.concatenate([[0], np.cumsum(np.bincount(self._src, minlength=n))])
+        self._succ = self._dst[order]
+        order = np.argsort(self._dst, kind='stable')
+        self._pred_ptr = np.concatenate([[0], np.cumsum(np.bincount(self._dst, minlength=n))])
+        self._pred = self._src[order]
+
+    def _topological_levels(self):
+        """Longest-path depth of every task (Kahn's algorithm, one frontier per step); rejects cycles."""
+        n = len(self._start)
+        indegree = np.bincount(self._dst, minlength=n)
+        level = np.full(n, -1, dtype=np.int64)
+        frontier = np.flatnonzero(indegree == 0)
+        depth = 0
+        while frontier.size:
+            level[frontier] = depth
+            successors = self._gather(self._succ_ptr, self._succ, frontier)
+            np.subtract.at(indegree, successors, 1)
+            frontier = np.unique(successors[indegree[successors] == 0])
+            depth += 1
+        if (level < 0).any():
+            cyclic = self._keys[level < 0]
+            raise ValueError(f"Dependency cycle; tasks that cannot be scheduled: {', '.join(f'{p}/{t}' for p, t in cyclic[:5])}")
+        # Edges grouped by the level of their target (forward) and of their source (backward).
+        self._in_edges = [np.flatnonzero(level[self._dst] == d) for d in range(depth)]
+        self._out_edges = [np.flatnonzero(level[self._src] == d) for d in range(depth)]
+        self._level_nodes = [np.flatnonzero(level == d) for d in range(depth)]
+        return level
+
+    @staticmethod
+    def _gather(ptr, values, nodes):
+        """Concatenated adjacency lists of `nodes` from a CSR structure."""
+        if nodes.size == 0:
+            return values[:0]
+        counts = ptr[nodes + 1] - ptr[nodes]
+        offsets = np.repeat(ptr[nodes] - np.cumsum(counts) + counts, counts)
+        return values[offsets + np.arange(counts.sum())]
+
+    def _reachable(self, ptr, values, start):
+        """`start` plus every task reachable from it along the given CSR direction."""
+        seen = np.zeros(len(self._start), dtype=bool)
+        frontier = np.array([start])
+        while frontier.size:
+            seen[frontier] = True
+            frontier = np.unique(self._gather(ptr, values, frontier))
+            frontier = frontier[~seen[frontier]]
+        return seen
+
+    # --- Passes ---
+    def _forward(self, mask):
+        self._es[mask] = self._start[mask]
+        for depth, edges in enumerate(self._in_edges):
+            edges = edges[mask[self._dst[edges]]]
+            if edges.size:
+                src, dst = self._src[edges], self._dst[edges]
+                np.maximum.at(self._es, dst, self._es[src] + self._duration[src])
+            nodes = self._level_nodes[depth]
+            fixed = nodes[self._fixed[nodes] & mask[nodes]]
+            self._es[fixed] = self._start[fixed]
+
+    def _project_finish(self):
+        finish = np.full(len(self.projects), np.iinfo(np.int64).min)
+        np.maximum.at(finish, self._project_codes, self._es + self._duration)
+        return finish
+
+    def _backward(self, mask):
+        self._finish = self._project_finish()
+        lf = self._finish[self._project_codes]
+        self._ls[mask] = lf[mask] - self._duration[mask]
+        for edges in reversed(self._out_edges):
+            edges = edges[mask[self._src[edges]]]
+            if edges.size:
+                src, dst = self._src[edges], self._dst[edges]
+                np.minimum.at(self._ls, src, self._ls[dst] - self._duration[src])
+
+    # --- Incremental Updates ---
+    def copy(self):
+        """Independent copy for what-if analysis (the task network is shared, the schedule arrays are not)."""
+        clone = object.__new__(Schedule)
+        clone.__dict__.update(self.__dict__)
+        for name in ('_start', '_duration', '_fixed', '_es', '_ls', '_finish'):
+            setattr(clone, name, getattr(self, name).copy())
+        clone.tasks = self.tasks.copy()
+        return clone
+
+    def update_task(self, project, task_id, start=None, finish=None, status=None):
+        """Changes one task's planned dates and/or status and reschedules the affected part of the network.
+
+        Returns the number of tasks whose early or late dates were recomputed.
+        """
+        node = self._keys.get_loc((project, task_id))
+        if start is not None or finish is not None:
+            old_finish = self._start[node] + self._duration[node] - 1
+            new_start = self._days(pd.Series([start]))[0] if start is not None else self._start[node]
+            new_finish = self._days(pd.Series([finish]))[0] if finish is not None else old_finish
+            self._start[node], self._duration[node] = new_start, new_finish - new_start + 1
+            self.tasks.loc[node, ['Start', 'Finish']] = [self.anchor + pd.Timedelta(days=int(new_start)),
+                                                         self.anchor + pd.Timedelta(days=int(new_finish))]
+        if status is not None:
+            self._fixed[node] = status in FIXED_START_STATUSES
+            self.tasks.loc[node, 'Status'] = status
+        descendants = self._reachable(self._succ_ptr, self._succ, node)
+        previous = self._finish[self._project_codes[node]]
+        self._forward(descendants)
+        if self._project_finish()[self._project_codes[node]] != previous:
+            affected = self._project_codes == self._project_codes[node]
+        else:
+            affected = self._reachable(self._pred_ptr, self._pred, node)
+        self._backward(affected)
+        return int((descendants | affected).sum())
+
+    # --- Results ---
+    def _date(self, days):
+        return self.anchor + pd.to_timedelta(days, unit='D')
+
+    def to_frame(self, project=None):
+        """Tasks (optionally of one project) with Early/Late Start/Finish, Total Float (days) and a Critical flag."""
+        rows = np.arange(len(self.tasks)) if project is None else np.flatnonzero(self.projects[self._project_codes] == project)
+        es, ls, duration = self._es[rows], self._ls[rows], self._duration[rows]
+        df = self.tasks.iloc[rows].copy()
+        df['Early Start'] = self._date(es)
+        df['Early Finish'] = self._date(es + duration - 1)
+        df['Late Start'] = self._date(ls)
+        df['Late Finish'] = self._date(ls + duration - 1)
+        df['Total Float (days)'] = ls - es
+        df['Critical'] = (df['Total Float (days)'] <= 0) & (df['Status'] != 'Complete')
+        return df
+
+    def project_summary(self, project=None):
+        """Planned vs projected finish per project, with the slip in days and the number of critical tasks."""
+        df = self.to_frame(project)
+        projects = pd.Series(self.projects[self._project_codes], index=self.tasks.index).loc[df.index]
+        summary = df.groupby(projects).agg(**{
+            'Planned Finish': ('Finish', 'max'),
+            'Projected Finish': ('Early Finish', 'max'),
+            'Critical Tasks': ('Critical', 'sum'),
+        })
+        summary['Slip (days)'] = (summary['Projected Finish'] - summary['Planned Finish']).dt.days
+        return summary.rename_axis('Project')
+
+    def critical_path(self, project):
+        """Critical task IDs of one project in early-start order."""
+        df = self.to_frame(project)
+        return df[df['Critical']].sort_values('Early Start')[self.task_column].tolist()
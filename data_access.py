@@ -0,0 +1,217 @@
+# data_access.py
+
+import functools
+import os
+import threading
+import time
+
+import pandas as pd
+
+import critical_path
+import portfolio_timeline
+import resource_loading
+import risk_matrix
+import utils
+from interval_index import IntervalIndex
+from repository import get_repository
+
+SOURCE_VERSION = os.environ.get('GRIFOLS_DATA_VERSION', 'mock-1')
+DEFAULT_TTL_SECONDS = 600
+COPY_ON_WRITE = int(pd.__version__.split('.')[0]) >= 3
+
+# --- Process-Wide Result Cache ---
+_cache = {}
+_stats = {}
+_key_locks = {}
+_lock = threading.Lock()
+
+def _shared_view(value):
+    """Hands out a cached result without letting callers mutate the shared copy.
+
+    With pandas copy-on-write (pandas >= 3) a shallow copy shares memory until a caller
+    writes to it. Older pandas versions get a deep copy, so every cache hit copies the
+    full frame; expect hits on large tables to cost a full copy there. Other objects
+    (schedules, interval indexes) are returned by reference and are read-only by
+    convention or flag; callers copy() them before editing.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy(deep=not COPY_ON_WRITE)
+    if isinstance(value, tuple):
+        return tuple(_shared_view(v) for v in value)
+    if isinstance(value, dict):
+        return {k: _shared_view(v) for k, v in value.items()}
+    return value
+
+def _record(name, event):
+    with _lock:
+        counters = _stats.setdefault(name, {'Hits': 0, 'Misses': 0, 'Expired': 0, 'Invalidated': 0, 'Load Time (s)': 0.0})
+        counters[event] += 1
+
+def cached_source(ttl=DEFAULT_TTL_SECONDS):
+    """Caches a data-source function process-wide, keyed on its arguments and the current SOURCE_VERSION.
+
+    Entries expire after `ttl` seconds. Concurrent misses for the same key wait on a
+    per-key lock so the backend is called once, not once per session.
+    """
+    def decorator(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (name, SOURCE_VERSION, args, tuple(sorted(kwargs.items())))
+            entry = _cache.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                _record(name, 'Hits')
+                return _shared_view(entry[1])
+            with _lock:
+                key_lock = _key_locks.setdefault(key, threading.Lock())
+            with key_lock:
+                entry = _cache.get(key)
+                if entry is not None and entry[0] > time.monotonic():
+                    _record(name, 'Hits')
+                    return _shared_view(entry[1])
+                _record(name, 'Expired' if entry is not None else 'Misses')
+                started = time.perf_counter()
+                value = func(*args, **kwargs)
+                with _lock:
+                    _stats[name]['Load Time (s)'] += time.perf_counter() - started
+                    _cache[key] = (time.monotonic() + ttl, value)
+            return _shared_view(value)
+
+        wrapper.invalidate = lambda: invalidate(name)
+        return wrapper
+    return decorator
+
+def invalidate(name=None):
+    """Drops cached entries for one source (by function name) or for every source."""
+    with _lock:
+        for key in [k for k in _cache if name is None or k[0] == name]:
+            del _cache[key]
+            counters = _stats.get(key[0])
+            if counters is not None:
+                counters['Invalidated'] += 1
+
+def set_source_version(version):
+    """Switches the source version (e.g. after a data refresh); entries cached under older versions are dropped."""
+    global SOURCE_VERSION
+    with _lock:
+        SOURCE_VERSION = str(version)
+        for key in [k for k in _cache if k[1] != SOURCE_VERSION]:
+            del _cache[key]
+
+def cache_stats():
+    """Hit/miss counters per data source as a DataFrame."""
+    with _lock:
+        stats = pd.DataFrame.from_dict(_stats, orient='index')
+        entries = pd.Series([k[0] for k in _cache]).value_counts()
+    if stats.empty:
+        return pd.DataFrame(columns=['Hits', 'Misses', 'Expired', 'Invalidated', 'Load Time (s)', 'Entries', 'Hit Rate'])
+    stats['Entries'] = entries.reindex(stats.index, fill_value=0)
+    calls = stats['Hits'] + stats['Misses'] + stats['Expired']
+    stats['Hit Rate'] = stats['Hits'] / calls.where(calls > 0)
+    return stats.rename_axis('Source')
+
+# --- Cached Data Sources ---
+def _table_source(table, name):
+    """Builds a loader that reads a whole repository table."""
+    def load():
+        return get_repository().table(table)
+    load.__name__ = name
+    return load
+
+get_validation_portfolio_data = cached_source()(_table_source('portfolio', 'get_validation_portfolio_data'))
+get_program_risk_data = cached_source()(_table_source('risks', 'get_program_risk_data'))
+get_staff_performance_data = cached_source()(_table_source('staff', 'get_staff_performance_data'))
+get_budget_data = cached_source()(_table_source('budget', 'get_budget_data'))
+get_pv_data = cached_source()(_table_source('pv_results', 'get_pv_data'))
+get_cpv_data = cached_source()(_table_source('cpv_batches', 'get_cpv_data'))
+get_improvement_data = cached_source()(_table_source('improvements', 'get_improvement_data'))
+get_revalidation_data = cached_source()(_table_source('revalidation', 'get_revalidation_data'))
+get_audit_findings_data = cached_source()(_table_source('audit_findings', 'get_audit_findings_data'))
+get_key_documents_data = cached_source()(_table_source('key_documents', 'get_key_documents_data'))
+get_travel_plan_data = cached_source()(_table_source('travel', 'get_travel_plan_data'))
+get_vendor_list_data = cached_source()(_table_source('vendors', 'get_vendor_list_data'))
+# Multi-partition and design-generated sources stay in code.
+get_site_cpv_data = cached_source()(utils.generate_site_cpv_data)
+get_site_cpv_specs = cached_source()(utils.generate_site_cpv_specs)
+get_doe_data = cached_source()(utils.generate_doe_data)
+
+# --- Date Indexes ---
+# Interval indexes are built over the cached table frames, so their labels address those frames' rows.
+DATE_INDEX_SOURCES = {
+    'portfolio': get_validation_portfolio_data, 'revalidation': get_revalidation_data, 'travel': get_travel_plan_data,
+}
+
+@cached_source()
+def get_date_index(table, start_column, end_column=None):
+    """Shared, read-only IntervalIndex over one table's [start, end] columns (a single column indexes point dates)."""
+    index = IntervalIndex.from_frame(DATE_INDEX_SOURCES[table](), start_column, end_column)
+    index.read_only = True
+    return index
+
+# --- Filtered and Aggregated Queries (evaluated in SQL) ---
+@cached_source()
+def get_tech_transfer_tasks(project):
+    """Checklist tasks of one tech transfer project, ordered by start date."""
+    return get_repository().table('tech_transfer_tasks', where='"Project" = ?', params=(project,), order_by=['Start'])
+
+@cached_source()
+def get_status_counts(table, column='Status'):
+    """Row counts per status value of a repository table."""
+    return get_repository().status_counts(table, column)
+
+@cached_source()
+def get_high_risk_count(table, min_score, status=None):
+    """Number of rows with a Risk Score of at least `min_score` (optionally in one status)."""
+    where, params = '"Risk Score" >= ?', (min_score,)
+    if status is not None:
+        where, params = where + ' AND "Status" = ?', params + (status,)
+    return get_repository().count(table, where, params)
+
+@cached_source()
+def get_due_within(table, date_column, days, as_of=None):
+    """Rows whose `date_column` falls within the next `days` days."""
+    return get_repository().due_within(table, date_column, days, as_of=as_of)
+
+@cached_source()
+def get_risk_matrix_cells(top_n=risk_matrix.DETAIL_TOP_N):
+    """Risk matrix cells (count, max score, bounded hover details) built from the risk register."""
+    return risk_matrix.aggregate_cells(get_program_risk_data(), top_n)
+
+@cached_source()
+def get_risks_in_cell(impact, probability):
+    """Every risk of one Impact/Probability cell, highest score first (loaded when a bubble is selected)."""
+    return get_repository().table('risks', where='"Impact" = ? AND "Probability" = ?', params=(impact, probability),
+                                  order_by=['-Risk Score', 'Risk ID'])
+
+@cached_source()
+def get_portfolio_lanes():
+    """Per-lead busy blocks of the validation portfolio (coarse timeline view)."""
+    return portfolio_timeline.lead_lanes(get_validation_portfolio_data())
+
+def get_portfolio_window(start, end, limit=portfolio_timeline.MAX_DETAIL_BARS):
+    """Projects overlapping [start, end] (at most `limit`, by lead and start) and the total number in the window."""
+    portfolio = get_validation_portfolio_data()
+    labels = get_date_index('portfolio', 'Start Date', 'End Date').overlapping(start, end)
+    projects = portfolio.loc[labels].sort_values(['Project Lead', 'Start Date']).head(limit)
+    return projects, len(labels)
+
+@cached_source()
+def get_load_segments():
+    """Per-lead load segments swept from the portfolio's project intervals and allocations."""
+    return resource_loading.load_segments(get_validation_portfolio_data())
+
+@cached_source()
+def get_load_curve(freq='W', how='mean'):
+    """Person x period load (%) matrix for the whole portfolio horizon."""
+    return resource_loading.load_curve(get_load_segments(), freq=freq, how=how)
+
+@cached_source()
+def get_over_allocations(threshold=resource_loading.OVER_ALLOCATION_THRESHOLD):
+    """Periods in which a lead's summed allocation exceeds `threshold`."""
+    return resource_loading.over_allocations(get_load_segments(), threshold)
+
+@cached_source()
+def get_transfer_schedule():
+    """Shared CPM schedule over every tech transfer project's checklist; callers copy() it before updating tasks."""
+    return critical_path.Schedule(get_repository().table('tech_transfer_tasks', order_by=['Project', 'Start']))
@@ -0,0 +1,163 @@
+# doe.py
+
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+FACTOR_LETTERS = 'ABCDEFGHJKLMNOPQRSTUVWXYZ'  # 'I' is reserved for the identity in defining relations
+
+# Standard generators (minimum aberration) for 2^(k-p) fractional factorials, keyed by (k, p).
+STANDARD_GENERATORS = {
+    (3, 1): ['C=AB'],
+    (4, 1): ['D=ABC'],
+    (5, 1): ['E=ABCD'], (5, 2): ['D=AB', 'E=AC'],
+    (6, 1): ['F=ABCDE'], (6, 2): ['E=ABC', 'F=BCD'], (6, 3): ['D=AB', 'E=AC', 'F=BC'],
+    (7, 1): ['G=ABCDEF'], (7, 2): ['F=ABCD', 'G=ABDE'], (7, 3): ['E=ABC', 'F=BCD', 'G=ACD'], (7, 4): ['D=AB', 'E=AC', 'F=BC', 'G=ABC'],
+    (8, 2): ['G=ABCD', 'H=ABEF'], (8, 3): ['F=ABC', 'G=ABD', 'H=BCDE'], (8, 4): ['E=BCD', 'F=ACD', 'G=ABC', 'H=ABD'],
+    (9, 4): ['F=BCDE', 'G=ACDE', 'H=ABDE', 'J=ABCE'], (9, 5): ['E=ABC', 'F=BCD', 'G=ACD', 'H=ABD', 'J=ABCD'],
+    (10, 5): ['F=ABCD', 'G=ABCE', 'H=ABDE', 'J=ACDE', 'K=BCDE'], (10, 6): ['E=ABC', 'F=BCD', 'G=ACD', 'H=ABD', 'J=ABCD', 'K=AB'],
+    (11, 6): ['F=ABC', 'G=BCD', 'H=CDE', 'J=ACD', 'K=ADE', 'L=BDE'], (11, 7): ['E=ABC', 'F=BCD', 'G=ACD', 'H=ABD', 'J=ABCD', 'K=AB', 'L=AC'],
+}
+
+# --- Effect Words as Bitmasks ---
+def word_to_mask(word):
+    """Converts an effect word such as 'ABD' into a bitmask over factor letters."""
+    mask = 0
+    for letter in word:
+        mask |= 1 << FACTOR_LETTERS.index(letter)
+    return mask
+
+def mask_to_word(mask):
+    """Converts a bitmask back into an effect word ('I' for the identity)."""
+    return ''.join(FACTOR_LETTERS[i] for i in range(mask.bit_length()) if mask >> i & 1) or 'I'
+
+def _columns_for_masks(base, masks):
+    """Products of base-factor columns selected by each bitmask (vectorized over runs)."""
+    bits = (np.asarray(masks)[None, :] >> np.arange(base.shape[1])[:, None]) & 1
+    return np.prod(np.where(bits[None, :, :] == 1, base[:, :, None], 1.0), axis=1)
+
+# --- Factorial Designs ---
+def full_factorial(k, levels=2):
+    """Full factorial in coded units (-1..+1), standard (Yates) order with the first factor changing fastest."""
+    if levels == 2:
+        return (((np.arange(2 ** k)[:, None] >> np.arange(k)) & 1) * 2 - 1).astype(float)
+    grid = np.indices((levels,) * k).reshape(k, -1).T[:, ::-1]
+    return grid * (2.0 / (levels - 1)) - 1.0
+
+def defining_relation(generators):
+    """All words of the defining relation (the group generated by the generator words), as bitmasks."""
+    words = [0]
+    for gen in generators:
+        target, expression = gen.replace(' ', '').split('=')
+        generator_word = word_to_mask(expression) ^ word_to_mask(target)
+        words = words + [w ^ generator_word for w in words]
+    return sorted(set(words) - {0}, key=lambda w: (bin(w).count('1'), w))
+
+def fractional_factorial(k, p=None, generators=None):
+    """2^(k-p) fractional factorial in coded units built from base-factor products.
+
+    Uses `generators` (e.g. ['D=ABC']) or the standard generators for (k, p).
+    Returns the design (runs × k) and the generator list used.
+    """
+    if generators is None:
+        if not p:
+            return full_factorial(k), []
+        if (k, p) not in STANDARD_GENERATORS:
+            raise ValueError(f"No standard generators for a 2^({k}-{p}) design; pass generators explicitly.")
+        generators = STANDARD_GENERATORS[(k, p)]
+    n_base = k - len(generators)
+    base = full_factorial(n_base)
+    masks = [word_to_mask(g.replace(' ', '').split('=')[1]) for g in generators]
+    return np.hstack([base, _columns_for_masks(base, masks)]), list(generators)
+
+def resolution(generators):
+    """Design resolution: the length of the shortest word in the defining relation."""
+    words = defining_relation(generators)
+    return min(bin(w).count('1') for w in words) if words else np.inf
+
+def alias_structure(k, generators, max_order=2):
+    """Alias chains for main effects and interactions up to `max_order`.
+
+    Chains list aliases up to order `max_order + 1`. Returns a DataFrame with the effect,
+    its aliases, and whether it is clear of aliasing with other effects of order <= `max_order`.
+    """
+    words = defining_relation(generators)
+    rows = []
+    for order in range(1, max_order + 1):
+        for combo in combinations(FACTOR_LETTERS[:k], order):
+            effect = word_to_mask(''.join(combo))
+            aliases = sorted({effect ^ w for w in words if bin(effect ^ w).count('1') <= max_order + 1},
+                             key=lambda w: (bin(w).count('1'), w))
+            low_order = [mask_to_word(a) for a in aliases if bin(a).count('1') <= max_order]
+            rows.append({'Effect': ''.join(combo), 'Aliases': ' = '.join(mask_to_word(a) for a in aliases) or '—',
+                         'Clear': not low_order})
+    return pd.DataFrame(rows)
+
+# --- Response Surface Designs ---
+def central_composite(k, alpha='rotatable', center_points=(4, 2), generators=None):
+    """Central composite design: (fractional) factorial cube, 2k axial points and center points.
+
+    `alpha` is 'rotatable' ((2^(k-p))^(1/4)), 'face' (1.0) or a number; `center_points` gives the
+    number of centers in the cube and axial portions. Returns the design and a portion label per run.
+    """
+    cube, _ = fractional_factorial(k, generators=generators) if generators else (full_factorial(k), [])
+    if alpha == 'rotatable':
+        alpha = len(cube) ** 0.25
+    elif alpha == 'face':
+        alpha = 1.0
+    axial = np.vstack([np.eye(k) * -alpha, np.eye(k) * alpha])[np.argsort(np.tile(np.arange(k), 2), kind='stable')] + 0.0
+    n_cube_center, n_axial_center = (center_points, 0) if np.isscalar(center_points) else center_points
+    design = np.vstack([cube, np.zeros((n_cube_center, k)), axial, np.zeros((n_axial_center, k))])
+    portion = (['Cube'] * len(cube) + ['Center'] * n_cube_center + ['Axial'] * len(axial) + ['Center'] * n_axial_center)
+    return design, np.array(portion)
+
+def box_behnken(k, center_points=3):
+    """Box-Behnken design: a 2² factorial on every pair of factors with the rest at the center, plus center points."""
+    if k < 3:
+        raise ValueError("Box-Behnken designs need at least three factors.")
+    pairs = np.array(list(combinations(range(k), 2)))
+    square = full_factorial(2)
+    design = np.zeros((len(pairs), 4, k))
+    rows = np.arange(len(pairs))[:, None]
+    design[rows, :, pairs[:, 0][:, None]] = square[:, 0]
+    design[rows, :, pairs[:, 1][:, None]] = square[:, 1]
+    return np.vstack([design.reshape(-1, k), np.zeros((center_points, k))])
+
+# --- Blocking, Randomization and Real Units ---
+def factorial_blocks(design, block_words):
+    """Assigns blocks by confounding the given interaction words (e.g. ['ABC']) with blocks; 2^len(words) blocks."""
+    masks = [word_to_mask(w) for w in block_words]
+    if any(m.bit_length() > design.shape[1] for m in masks):
+        raise ValueError("Block words reference factors outside the design.")
+    signs = _columns_for_masks(np.where(design == 0, 1.0, np.sign(design)), masks)
+    return ((signs > 0).astype(int) << np.arange(len(block_words))).sum(axis=1) + 1
+
+def to_real_units(coded, factors):
+    """Converts a coded design to real units; `factors` maps names to (low, high) at coded -1/+1."""
+    names = list(factors)
+    low = np.array([factors[f][0] for f in names], dtype=float)
+    high = np.array([factors[f][1] for f in names], dtype=float)
+    return pd.DataFrame((high + low) / 2 + np.asarray(coded) * (high - low) / 2, columns=names)
+
+def design_table(coded, factors, blocks=None, randomize=True, seed=None):
+    """Builds the run sheet: standard order, run order, block, real-unit settings and coded settings.
+
+    With randomize=True the run order is randomized within each block.
+    """
+    coded = np.asarray(coded, dtype=float)
+    n = len(coded)
+    blocks = np.ones(n, dtype=int) if blocks is None else np.asarray(blocks)
+    order = np.arange(n)
+    if randomize:
+        rng = np.random.default_rng(seed)
+        order = np.lexsort((rng.random(n), blocks))
+    else:
+        order = np.lexsort((order, blocks))
+    table = to_real_units(coded[order], factors)
+    table.insert(0, 'Std Order', order + 1)
+    table.insert(1, 'Run Order', np.arange(1, n + 1))
+    table.insert(2, 'Block', blocks[order])
+    for i, name in enumerate(factors):
+        table[f"{name} (coded)"] = coded[order, i]
+    return table
@@ -0,0 +1,138 @@
+# interval_index.py
+
+import numpy as np
+import pandas as pd
+
+# --- Interval Index ---
+class IntervalIndex:
+    """Static sorted-array index over closed [start, end] intervals with a small delta buffer for edits.
+
+    Two sorted arrays answer counts in O(log n): an interval overlaps [a, b] unless it
+    starts after b or ends before a. Listing overlaps binary-searches the start-sorted
+    array: a running maximum of the ends bounds the prefix that ends before a, and the
+    starts bound the suffix that begins after b. The slice between them (the candidates)
+    is then filtered on its ends, so a listing costs O(log n + candidates), where
+    candidates can exceed the matches when long intervals keep the running maximum
+    high. Point data (a single due date) is an interval with start == end.
+
+    Edits go to a buffer (upserts and removals keyed by row label) that queries merge in;
+    once the buffer outgrows `max_buffer` the sorted arrays are rebuilt. A shared instance
+    is marked `read_only`; callers copy() it before editing.
+    """
+
+    def __init__(self, starts, ends=None, labels=None, max_buffer=256):
+        starts = pd.to_datetime(pd.Series(starts)).to_numpy()
+        ends = starts if ends is None else pd.to_datetime(pd.Series(ends)).to_numpy()
+        labels = np.arange(len(starts)) if labels is None else np.asarray(labels)
+        self.max_buffer = max_buffer
+        self.read_only = False
+        self._build(labels, starts, ends)
+
+    @classmethod
+    def from_frame(cls, df, start_column, end_column=None, **kwargs):
+        """Indexes one row per interval of `df`; query results are labels of `df.index`."""
+        return cls(df[start_column], df[end_column] if end_column else None, df.index, **kwargs)
+
+    def _build(self, labels, starts, ends):
+        valid = ~(pd.isna(starts) | pd.isna(ends))
+        labels, starts, ends = labels[valid], starts[valid], ends[valid]
+        order = np.argsort(starts, kind='stable')
+        self._labels, self._starts, self._ends = labels[order], starts[order], ends[order]
+        self._max_end = np.maximum.accumulate(self._ends) if len(self._ends) else self._ends
+        self._sorted_ends = np.sort(ends)
+        self._upserts = {}
+        self._removed = set()
+
+    def __len__(self):
+        # Live membership: indexed labels not removed or moved, plus every buffered upsert.
+        stale = self._stale()
+        kept = len(self._labels) - (int(np.isin(self._labels, list(stale)).sum()) if stale else 0)
+        return kept + len(self._upserts)
+
+    # --- Incremental Updates ---
+    def copy(self):
+        """Independent, editable copy (the sorted arrays are shared; edits and rebuilds never modify them in place)."""
+        clone = object.__new__(IntervalIndex)
+        clone.__dict__.update(self.__dict__)
+        clone._upserts, clone._removed, clone.read_only = dict(self._upserts), set(self._removed), False
+        return clone
+
+    def _check_writable(self):
+        if self.read_only:
+            raise ValueError("This IntervalIndex is shared and read-only; edit a copy() instead.")
+
+    def upsert(self, label, start, end=None):
+        """Adds or moves the interval of `label`; `end` defaults to `start` for point data."""
+        self._check_writable()
+        start = pd.Timestamp(start).to_datetime64()
+        self._upserts[label] = (start, start if end is None else pd.Timestamp(end).to_datetime64())
+        self._removed.discard(label)
+        self._maybe_rebuild()
+
+    def remove(self, label):
+        """Drops the interval of `label` (no-op if it is not indexed)."""
+        self._check_writable()
+        self._upserts.pop(label, None)
+        self._removed.add(label)
+        self._maybe_rebuild()
+
+    def _stale(self):
+        # Labels in the sorted arrays that were removed or moved since the last rebuild.
+        return self._removed | set(self._upserts)
+
+    def _maybe_rebuild(self):
+        if len(self._upserts) + len(self._removed) > self.max_buffer:
+            self.rebuild()
+
+    def rebuild(self):
+        """Merges the delta buffer into the sorted arrays."""
+        self._check_writable()
+        keep = ~np.isin(self._labels, list(self._stale()))
+        labels = np.concatenate([self._labels[keep], np.array(list(self._upserts), dtype=self._labels.dtype)])
+        starts = np.concatenate([self._starts[keep], np.array([s for s, _ in self._upserts.values()], dtype=self._starts.dtype)])
+        ends = np.concatenate([self._ends[keep], np.array([e for _, e in self._upserts.values()], dtype=self._ends.dtype)])
+        self._build(labels, starts, ends)
+
+    # --- Queries ---
+    def _bounds(self, start, end):
+        lo = np.datetime64('NaT') if start is None else pd.Timestamp(start).to_datetime64()
+        hi = np.datetime64('NaT') if end is None else pd.Timestamp(end).to_datetime64()
+        return lo, hi
+
+    def _buffer_matches(self, lo, hi):
+        return [label for label, (s, e) in self._upserts.items()
+                if (np.isnat(hi) or s <= hi) and (np.isnat(lo) or e >= lo)]
+
+    def count_overlapping(self, start=None, end=None):
+        """Number of intervals overlapping [start, end] (None = unbounded); O(log n) without pending edits."""
+        lo, hi = self._bounds(start, end)
+        started = len(self._starts) if np.isnat(hi) else np.searchsorted(self._starts, hi, side='right')
+        ended_before = 0 if np.isnat(lo) else np.searchsorted(self._sorted_ends, lo, side='left')
+        count = int(started - ended_before)
+        stale = self._stale()
+        if stale:
+            count -= int(np.isin(self._positions(lo, hi, self._labels), list(stale)).sum())
+        return count + len(self._buffer_matches(lo, hi))
+
+    def _positions(self, lo, hi, values):
+        # Two binary searches bound the candidate slice; filtering it on the ends is linear in its length.
+        stop = len(self._starts) if np.isnat(hi) else np.searchsorted(self._starts, hi, side='right')
+        if np.isnat(lo):
+            return values[:stop]
+        first = np.searchsorted(self._max_end, lo, side='left')
+        candidates = slice(first, max(first, stop))
+        return values[candidates][self._ends[candidates] >= lo]
+
+    def overlapping(self, start=None, end=None):
+        """Labels of intervals overlapping [start, end], ordered by start (buffered edits last); O(log n + candidates)."""
+        lo, hi = self._bounds(start, end)
+        labels = self._positions(lo, hi, self._labels)
+        stale = self._stale()
+        if stale:
+            labels = labels[~np.isin(labels, list(stale))]
+        extra = self._buffer_matches(lo, hi)
+        return np.concatenate([labels, np.array(extra, dtype=labels.dtype)]) if extra else labels
+
+    def active_on(self, when):
+        """Labels of intervals containing the date `when` (stabbing query)."""
+        return self.overlapping(when, when)
@@ -5,35 +5,186 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-from scipy.stats import norm
+from plotly.subplots import make_subplots
+from cpv_stats import RunningStats, StreamingCovariance, ppk_from_moments, rolling_correlation
+from cpv_store import CPVBatchStore
+from cpv_sweep import run_site_sweep, sweep_overview
+from data_access import get_cpv_data, get_site_cpv_data, get_site_cpv_specs
+from chart_lod import LOD_MAX_POINTS, LOD_THRESHOLD, downsample_indices, thin_markers
+from cpv_capability import capability_table, rolling_ppk
+from cpv_drift import DriftMonitor, ewma_limit
+from cpv_mspc import PCAMonitor
+from cpv_rules import NELSON_RULES, evaluate_nelson_rules, rule_hits, rule_summary
+from theme import apply_plotly_theme
+from utils import DATA_SCALE, scale_dataset
+from profiling import render_debug_panel, section, start_page
 
 # --- HELPER FUNCTIONS ---
-def calculate_ppk(data_series, usl, lsl):
-    """Calculates the Ppk for a given series of data and spec limits."""
-    mean = data_series.mean()
-    std_dev = data_series.std()
-    if std_dev == 0: return np.inf
-    ppu = (usl - mean) / (3 * std_dev)
-    ppl = (mean - lsl) / (3 * std_dev)
-    return min(ppu, ppl)
-
-def create_control_chart(df, parameter, color):
-    """Generates a standardized I-Chart for a given parameter."""
-    mean = df[parameter].mean()
-    ucl = mean + 3 * df[parameter].std()
-    lcl = mean - 3 * df[parameter].std()
+def session_entry(key, signature):
+    """Returns the object stored under `key` if it was built for `signature` (e.g. the window start), else None.
+
+    Each key holds a single (signature, object) entry, so moving the batch window (or changing a
+    setting in the signature) replaces the previous full-history object instead of adding another.
+    """
+    entry = st.session_state.get(key)
+    return entry[1] if entry is not None and entry[0] == signature else None
+
+def get_cpv_stats(df, parameters, baseline_batches=None):
+    """Returns the session's running CPV statistics, appending only batches not seen on earlier reruns."""
+    signature = (df.index[0] if len(df) else 0, baseline_batches)
+    key = f"cpv_stats::{'|'.join(parameters)}::{'frozen' if baseline_batches else 'live'}"
+    stats = session_entry(key, signature)
+    if stats is None or len(df) < stats.n_batches:
+        stats = RunningStats(parameters)
+        if baseline_batches:
+            stats.sync(df.iloc[:baseline_batches])
+            stats.freeze()
+        st.session_state[key] = (signature, stats)
+    return stats.sync(df)
+
+def get_drift_monitor(df, parameters, limits, settings, scope):
+    """Returns the session's CUSUM/EWMA monitor for the current limits, processing only new batches."""
+    signature = (df.index[0] if len(df) else 0, tuple(sorted(settings.items())))
+    key = f"cpv_drift::{scope}"
+    monitor = session_entry(key, signature)
+    center, sigma = limits.loc[parameters, 'Mean'].to_numpy(), limits.loc[parameters, 'Std Dev'].to_numpy()
+    if (monitor is None or len(df) < monitor.n_batches
+            or not (np.array_equal(monitor.center, center) and np.array_equal(monitor.sigma, sigma))):
+        monitor = DriftMonitor(parameters, center, sigma, **settings)
+        st.session_state[key] = (signature, monitor)
+    return monitor.sync(df)
+
+def drift_badge(summary, parameter):
+    """Formats the CUSUM/EWMA status of a parameter as a one-line caption for its I-chart."""
+    row = summary.loc[parameter]
+    parts = []
+    for method in ('CUSUM', 'EWMA'):
+        if row[f'{method} Direction'] == 'None':
+            parts.append(f"{method}: ✅ no drift")
+        else:
+            direction = {'Upward': "upward", 'Downward': "downward", 'Both': "two-sided"}[row[f'{method} Direction']]
+            parts.append(f"{method}: ⚠️ {direction} drift from {row[f'{method} First Alarm']}")
+    return " · ".join(parts)
+
+def get_correlation_engine(df, parameters, window=None):
+    """Returns the session's streaming covariance engine, folding in only new batches on each rerun."""
+    signature = (df.index[0] if len(df) else 0, window)
+    key = f"cpv_cov::{'|'.join(parameters)}"
+    engine = session_entry(key, signature)
+    if engine is None or len(df) < engine.n_batches:
+        engine = StreamingCovariance(parameters, window)
+        st.session_state[key] = (signature, engine)
+    return engine.sync(df)
+
+@st.cache_resource(show_spinner=False)
+def fit_pca_monitor(reference_df):
+    """Fits (once per reference window) the PCA model used for multivariate monitoring."""
+    return PCAMonitor(explained_variance=0.85).fit(reference_df)
+
+def get_mspc_scores(model, df):
+    """Returns T²/SPE scores for all batches, scoring only batches added since the last rerun."""
+    signature = (id(model), df.index[0] if len(df) else 0)
+    scores = session_entry('cpv_mspc', signature)
+    if scores is None or len(df) < len(scores):
+        scores = model.score(df)
+    elif len(df) > len(scores):
+        scores = pd.concat([scores, model.score(df.iloc[len(scores):])])
+    st.session_state['cpv_mspc'] = (signature, scores)
+    return scores
+
+@st.cache_data(show_spinner=False)
+def run_cached_site_sweep(root, partitions, baseline_batches):
+    """Runs the site-wide sweep across a process pool; `partitions` (with batch counts) keys the cache so appends re-run it."""
+    pairs = list(zip(partitions['Product Line'], partitions['Unit Operation']))
+    return run_site_sweep(root, pairs, specs=get_site_specs(), baseline_batches=baseline_batches)
+
+def get_site_specs():
+    """Spec limits for every stored partition that has a registered specification."""
+    specs = get_site_cpv_specs()
+    specs[(PRODUCT_LINE, UNIT_OPERATION)] = SPEC_LIMITS
+    return specs
+
+@st.cache_data(show_spinner=False)
+def compute_capability_review(df, specs, ci):
+    """Computes Pp/Ppk/Cp/Cpk with confidence intervals for every specified parameter in one vectorized call."""
+    return capability_table(df, specs, ci=ci, seed=2024)
+
+def calculate_ppk(stats, parameter, usl, lsl):
+    """Calculates the Ppk for a parameter from its running statistics and spec limits."""
+    i = stats.parameters.index(parameter)
+    return ppk_from_moments(stats.mean[i], stats.std[i], usl, lsl)
+
+def create_ppk_trend_chart(df, trend, parameter, color, window, render_mode='auto'):
+    """Generates the rolling Ppk trajectory for a parameter against the 1.33 capability target."""
+    values = trend[parameter].to_numpy()
+    long_series = render_mode == 'lod' or (render_mode == 'auto' and len(df) > LOD_THRESHOLD)
+    if long_series:
+        Trace, x_values = go.Scattergl, df.index.to_numpy()
+        shown = downsample_indices(x_values, values, LOD_MAX_POINTS)
+    else:
+        Trace, x_values = go.Scatter, df['Batch ID'].to_numpy()
+        shown = np.arange(len(df))
+    fig = go.Figure()
+    fig.add_hrect(y0=0, y1=1.0, fillcolor="rgba(218, 41, 28, 0.08)", line_width=0)
+    fig.add_hline(y=1.33, line_dash="dash", line_color="green", annotation_text="Target 1.33")
+    fig.add_trace(Trace(
+        x=x_values[shown], y=values[shown], mode='lines', line_color=color, name='Rolling Ppk',
+        hovertemplate=f"%{{x}}: Ppk %{{y:.2f}}<extra>last {window} batches</extra>"
+    ))
+    fig.update_layout(height=200, margin=dict(t=10, b=20, l=10, r=10), showlegend=False, yaxis_title="Ppk")
+    return fig
+
+def create_control_chart(df, parameter, color, limits, rule_mask=None, render_mode='auto', lod_method='minmax'):
+    """Generates a standardized I-Chart for a given parameter from precomputed control limits and Nelson rule signals.
+
+    Long series (or render_mode='lod') are drawn with WebGL traces on a numeric batch-sequence axis and
+    downsampled to a bounded number of points. Rule 1 (out-of-control) batches are forced into the outline,
+    thinned to LOD_MAX_POINTS; run-rule markers are drawn only where they fall on the rendered points.
+    """
+    mean, ucl, lcl = limits.loc[parameter, ['Mean', 'UCL', 'LCL']]
+    if rule_mask is None:
+        rule_mask = evaluate_nelson_rules(df[[parameter]].to_numpy(), mean, (ucl - mean) / 3)[:, 0]
+    long_series = render_mode == 'lod' or (render_mode == 'auto' and len(df) > LOD_THRESHOLD)
+    values = df[parameter].to_numpy()
+    batch_ids = df['Batch ID'].to_numpy()
+    out_of_control = np.flatnonzero(rule_hits(rule_mask, 1))
+    if long_series:
+        Trace, x_values = go.Scattergl, df.index.to_numpy()
+        out_of_control = thin_markers(rule_hits(rule_mask, 1), LOD_MAX_POINTS, np.abs(values - mean))
+        keep = np.zeros(len(df), dtype=bool)
+        keep[out_of_control] = True
+        shown = downsample_indices(x_values, values, LOD_MAX_POINTS, lod_method, keep=keep)
+        line_mode = 'lines'
+    else:
+        Trace, x_values = go.Scatter, batch_ids
+        shown = np.arange(len(df))
+        line_mode = 'lines+markers'
     
     fig = go.Figure()
     fig.add_hline(y=mean, line_dash="solid", line_color="green", opacity=0.8)
     fig.add_hline(y=ucl, line_dash="dash", line_color="red", opacity=0.8, annotation_text="UCL")
     fig.add_hline(y=lcl, line_dash="dash", line_color="red", opacity=0.8, annotation_text="LCL")
-    fig.add_trace(go.Scatter(x=df['Batch ID'], y=df[parameter], mode='lines+markers', name=parameter, line_color=color))
+    fig.add_trace(Trace(
+        x=x_values[shown], y=values[shown], mode=line_mode, name=parameter, line_color=color,
+        customdata=batch_ids[shown], hovertemplate="%{customdata}: %{y:.2f}<extra></extra>"
+    ))
     
-    out_of_control = df[(df[parameter] > ucl) | (df[parameter] < lcl)]
-    if not out_of_control.empty:
-        fig.add_trace(go.Scatter(x=out_of_control['Batch ID'], y=out_of_control[parameter], mode='markers', marker=dict(color='red', size=12, symbol='x'), name='OOC'))
+    # One marker trace per run rule, so the rule text lives in the trace's hover template, not in every point.
+    shown_mask = rule_mask[shown]
+    for rule in list(NELSON_RULES)[1:]:
+        hits = shown[rule_hits(shown_mask, rule)]
+        if hits.size:
+            fig.add_trace(Trace(
+                x=x_values[hits], y=values[hits], mode='markers',
+                marker=dict(color='orange', size=10, symbol='circle-open', line=dict(width=2)), name=f'Rule {rule}',
+                customdata=batch_ids[hits], hovertemplate=f"%{{customdata}}: %{{y:.2f}}<extra>Rule {rule}: {NELSON_RULES[rule]}</extra>"
+            ))
+    if out_of_control.size:
+        fig.add_trace(Trace(x=x_values[out_of_control], y=values[out_of_control], mode='markers', marker=dict(color='red', size=12, symbol='x'), name='OOC', customdata=batch_ids[out_of_control], hovertemplate="%{customdata}: %{y:.2f}<extra>OOC</extra>"))
         
     fig.update_layout(height=300, margin=dict(t=10, b=20, l=10, r=10), showlegend=False)
+    if long_series:
+        fig.update_xaxes(title_text=f"Batch sequence ({len(shown):,} of {len(df):,} points shown)", title_font_size=11)
     return fig
 
 # --- Data Generation ---
@@ -58,40 +209,146 @@ def generate_full_cpv_data():
         'CPP - IEX Pool Conductivity (mS/cm)': conductivity, 'CPP - IEX Load Density (g/L)': load_density,
         'CPP - Elution Buffer pH': elution_ph, 'CMA - Resin Age (cycles)': resin_age, 'CMA - Buffer Lot ID': buffer_lot_id
     })
-cpv_df = generate_full_cpv_data()
+
+@st.cache_resource(show_spinner=False)
+def get_cpv_store():
+    """Opens the shared CPV batch store, seeding the demo partitions on first use."""
+    store = CPVBatchStore()
+    if store.n_batches(PRODUCT_LINE, UNIT_OPERATION) == 0:
+        store.append(scale_dataset(generate_full_cpv_data(), DATA_SCALE, ['Batch ID']), PRODUCT_LINE, UNIT_OPERATION)
+    if store.n_batches(PRODUCT_LINE, FILLING_OPERATION) == 0:
+        store.append(get_cpv_data(), PRODUCT_LINE, FILLING_OPERATION)
+    for (product_line, unit_operation), site_df in get_site_cpv_data().items():
+        if store.n_batches(product_line, unit_operation) == 0:
+            store.append(site_df, product_line, unit_operation)
+    return store
+
+PRODUCT_LINE, UNIT_OPERATION, FILLING_OPERATION = 'NAT', 'IEX Chromatography', 'Reagent Filling'
+MSPC_MIN_REFERENCE_BATCHES = 3   # fewest reference batches fit_pca_monitor accepts
+CONTRIBUTION_ALARM_OPTIONS = 25  # most recent MSPC alarms offered in the contribution-plot selector
+MONITORED_PARAMETERS = [
+    'CQA - Purity (%)', 'CQA - Step Yield (%)',
+    'CPP - IEX Pool Conductivity (mS/cm)', 'CPP - IEX Load Density (g/L)', 'CPP - Elution Buffer pH'
+]
+# CQA limits are release specifications; CPP limits are the proven acceptable ranges (PARs).
+SPEC_LIMITS = pd.DataFrame({
+    'LSL': [97.5, 85.0, 14.0, 23.5, 6.30],
+    'USL': [100.0, 100.0, 16.5, 27.5, 6.70],
+}, index=pd.Index(MONITORED_PARAMETERS, name='Parameter'))
 
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(page_title="CPV Dashboard | Grifols", layout="wide")
+apply_plotly_theme()
+start_page("CPV_Dashboard")
 st.title("📊 Continued Process Verification (CPV) Dashboard")
 st.markdown("### Ongoing monitoring of the commercial Reagent Filling process for a key NAT product.")
 
 # --- Control Strategy Definition ---
 st.header("IEX Chromatography Control Strategy Monitoring")
 st.caption("This dashboard holistically tracks all defined parameters for the Ion Exchange unit operation, linking process inputs (CMAs, CPPs) to quality outputs (CQAs).")
+
+# --- Data Loading (column and batch-range pushdown into the CPV store) ---
+with section("load_data"):
+    cpv_store = get_cpv_store()
+    total_batches = cpv_store.n_batches(PRODUCT_LINE, UNIT_OPERATION)
+    with st.sidebar:
+        st.subheader("Evaluation Window")
+        batch_window = st.slider("Batch sequence range", 0, total_batches, (0, total_batches),
+                                 help="Only the selected batches are read from the CPV store.")
+    cpv_df = cpv_store.load(
+        PRODUCT_LINE, UNIT_OPERATION, batch_range=batch_window,
+        columns=['Batch ID'] + MONITORED_PARAMETERS + ['CMA - Resin Age (cycles)', 'CMA - Buffer Lot ID']
+    )
+if len(cpv_df) < 2:
+    st.warning("Select at least two batches to evaluate.")
+    st.stop()
+
+# --- Chart Rendering Mode ---
+with st.sidebar:
+    st.subheader("Chart Rendering")
+    render_mode = st.radio(
+        "Control chart detail", ['auto', 'full', 'lod'], horizontal=True,
+        format_func={'auto': "Auto", 'full': "Full", 'lod': "Level of detail"}.get,
+        help=f"Auto switches to WebGL with downsampling above {LOD_THRESHOLD:,} batches. Narrow the batch range to re-fetch full detail for a window."
+    )
+    lod_method = st.selectbox("Downsampling", ['minmax', 'lttb'], format_func={'minmax': "Min/max buckets", 'lttb': "LTTB"}.get)
+
+# --- Control Limit Mode (Phase I / Phase II) ---
+with st.sidebar:
+    st.subheader("Control Limits")
+    limit_mode = st.radio(
+        "Limit mode", ["Phase I - Live limits", "Phase II - Frozen baseline"],
+        help="Phase I recalculates limits from the full history. Phase II freezes limits from a baseline set of batches and monitors new batches against them."
+    )
+    baseline_batches = None
+    if limit_mode.startswith("Phase II"):
+        baseline_batches = st.number_input("Baseline batches", min_value=2, max_value=len(cpv_df), value=min(30, len(cpv_df)), step=5)
+with section("control_limits"):
+    live_stats = get_cpv_stats(cpv_df, MONITORED_PARAMETERS)
+    limit_stats = get_cpv_stats(cpv_df, MONITORED_PARAMETERS, baseline_batches) if baseline_batches else live_stats
+    control_limits = limit_stats.limits()
+    rule_masks = evaluate_nelson_rules(
+        cpv_df[MONITORED_PARAMETERS].to_numpy(dtype=float),
+        control_limits['Mean'].to_numpy(), control_limits['Std Dev'].to_numpy()
+    )
+    rule_mask_by_param = dict(zip(MONITORED_PARAMETERS, rule_masks.T))
+
+# --- Drift Detection Settings (CUSUM / EWMA) ---
+with st.sidebar:
+    with st.expander("Drift Detection (CUSUM / EWMA)"):
+        drift_settings = {
+            'k': st.number_input("CUSUM reference value k (σ)", 0.1, 2.0, 0.5, 0.1),
+            'h': st.number_input("CUSUM decision interval h (σ)", 1.0, 10.0, 5.0, 0.5),
+            'lam': st.number_input("EWMA weight λ", 0.05, 1.0, 0.2, 0.05),
+            'L': st.number_input("EWMA limit width L (σ)", 2.0, 4.0, 3.0, 0.1),
+        }
+with section("drift_monitor"):
+    drift_monitor = get_drift_monitor(cpv_df, MONITORED_PARAMETERS, control_limits, drift_settings, 'iex')
+    drift_summary = drift_monitor.summary(cpv_df['Batch ID'])
 st.divider()
 
 # --- 1. Critical Quality Attributes (CQAs) ---
 st.subheader("I. Critical Quality Attribute (CQA) Monitoring")
+ppk_window = st.number_input(
+    "Rolling Ppk window (batches)", min_value=5, max_value=max(5, len(cpv_df)), value=min(30, max(5, len(cpv_df))), step=5,
+    help="Ppk is recomputed over every sliding window of this many batches in a single cumulative-sum pass."
+)
+with section("rolling_ppk"):
+    ppk_trend = rolling_ppk(cpv_df[MONITORED_PARAMETERS], SPEC_LIMITS, int(ppk_window))
 cqa_col1, cqa_col2 = st.columns(2)
 with cqa_col1:
     parameter = 'CQA - Purity (%)'
-    lsl, usl = 97.5, 100.0
+    lsl, usl = SPEC_LIMITS.loc[parameter, ['LSL', 'USL']]
     st.markdown(f"**{parameter}**")
-    ppk = calculate_ppk(cpv_df[parameter], usl, lsl)
-    st.metric(label="Process Performance (Ppk)", value=f"{ppk:.2f}")
+    ppk = calculate_ppk(live_stats, parameter, usl, lsl)
+    metric_col, trend_col = st.columns([1, 2])
+    latest_ppk = ppk_trend[parameter].iloc[-1]
+    metric_col.metric(label="Process Performance (Ppk)", value=f"{ppk:.2f}",
+                      delta=None if np.isnan(latest_ppk) else f"{latest_ppk - ppk:+.2f} last {int(ppk_window)}")
+    with section(f"ppk_trend:{parameter}"):
+        trend_col.plotly_chart(create_ppk_trend_chart(cpv_df, ppk_trend, parameter, '#005EB8', int(ppk_window), render_mode), use_container_width=True)
     if ppk < 1.33: st.warning("Capability is marginal or poor.")
-    fig = create_control_chart(cpv_df, parameter, '#005EB8')
-    st.plotly_chart(fig, use_container_width=True)
+    with section(f"control_chart:{parameter}"):
+        fig = create_control_chart(cpv_df, parameter, '#005EB8', control_limits, rule_mask_by_param[parameter], render_mode, lod_method)
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption(drift_badge(drift_summary, parameter))
 with cqa_col2:
     parameter = 'CQA - Step Yield (%)'
-    lsl, usl = 85.0, 100.0
+    lsl, usl = SPEC_LIMITS.loc[parameter, ['LSL', 'USL']]
     st.markdown(f"**{parameter}**")
-    ppk = calculate_ppk(cpv_df[parameter], usl, lsl)
-    st.metric(label="Process Performance (Ppk)", value=f"{ppk:.2f}")
+    ppk = calculate_ppk(live_stats, parameter, usl, lsl)
+    metric_col, trend_col = st.columns([1, 2])
+    latest_ppk = ppk_trend[parameter].iloc[-1]
+    metric_col.metric(label="Process Performance (Ppk)", value=f"{ppk:.2f}",
+                      delta=None if np.isnan(latest_ppk) else f"{latest_ppk - ppk:+.2f} last {int(ppk_window)}")
+    with section(f"ppk_trend:{parameter}"):
+        trend_col.plotly_chart(create_ppk_trend_chart(cpv_df, ppk_trend, parameter, '#00A9E0', int(ppk_window), render_mode), use_container_width=True)
     if ppk < 1.33: st.warning("Capability is marginal or poor.")
-    fig = create_control_chart(cpv_df, parameter, '#00A9E0')
-    st.plotly_chart(fig, use_container_width=True)
+    with section(f"control_chart:{parameter}"):
+        fig = create_control_chart(cpv_df, parameter, '#00A9E0', control_limits, rule_mask_by_param[parameter], render_mode, lod_method)
+        st.plotly_chart(fig, use_container_width=True)
+    st.caption(drift_badge(drift_summary, parameter))
 st.divider()
 
 # --- 2. Critical Process Parameters (CPPs) ---
@@ -105,23 +362,113 @@ cpps_to_plot = {
 for col, info in cpps_to_plot.items():
     with col:
         st.markdown(f"**{info['param']}**")
-        fig = create_control_chart(cpv_df, info['param'], info['color'])
-        st.plotly_chart(fig, use_container_width=True)
+        with section(f"control_chart:{info['param']}"):
+            fig = create_control_chart(cpv_df, info['param'], info['color'], control_limits, rule_mask_by_param[info['param']], render_mode, lod_method)
+            st.plotly_chart(fig, use_container_width=True)
+        st.caption(drift_badge(drift_summary, info['param']))
+st.divider()
+
+# --- Statistical Rule Signals (Nelson Rules) ---
+st.subheader("Run-Rule Signal Summary (Nelson Rules)")
+st.caption("All eight Nelson rules are evaluated across every monitored CQA and CPP in a single pass. Red ✕ markers on the charts are Rule 1 (beyond 3σ) excursions; orange circles flag the remaining run and trend rules.")
+signal_col1, signal_col2 = st.columns([2, 1])
+with signal_col1:
+    st.dataframe(rule_summary(rule_masks, MONITORED_PARAMETERS), use_container_width=True)
+with signal_col2:
+    st.dataframe(
+        pd.DataFrame({'Rule': [f"Rule {r}" for r in NELSON_RULES], 'Description': list(NELSON_RULES.values())}),
+        use_container_width=True, hide_index=True
+    )
+st.divider()
+
+# --- Drift Detection (CUSUM / EWMA) ---
+st.subheader("Drift Detection: CUSUM & EWMA")
+st.caption("Tabular CUSUM and EWMA statistics are computed for every monitored parameter at once and catch small, sustained shifts that Shewhart limits miss. Settings are in the sidebar.")
+drift_scope = st.radio("Unit operation", [UNIT_OPERATION, FILLING_OPERATION], horizontal=True)
+with section("drift_scope"):
+    if drift_scope == UNIT_OPERATION:
+        scope_df, scope_params, scope_monitor, scope_summary = cpv_df, MONITORED_PARAMETERS, drift_monitor, drift_summary
+    else:
+        # The filling history is monitored against a frozen baseline of its first batches (Phase II).
+        scope_df = cpv_store.load(PRODUCT_LINE, FILLING_OPERATION)
+        scope_params = [c for c in scope_df.columns if c != 'Batch ID']
+        filling_limits = get_cpv_stats(scope_df, scope_params, baseline_batches=min(20, len(scope_df))).limits()
+        scope_monitor = get_drift_monitor(scope_df, scope_params, filling_limits, drift_settings, 'filling')
+        scope_summary = scope_monitor.summary(scope_df['Batch ID'])
+drift_col1, drift_col2 = st.columns([1, 1])
+with drift_col1:
+    st.dataframe(scope_summary.style.format(precision=2), use_container_width=True)
+with drift_col2:
+    drift_param = st.selectbox("Parameter", scope_params)
+    j = scope_params.index(drift_param)
+    with section("drift_chart"):
+        hist = scope_monitor.history()
+        fig_drift = make_subplots(rows=2, cols=1, shared_xaxes=True, vertical_spacing=0.08, subplot_titles=("Tabular CUSUM", "EWMA (σ units)"))
+        long_scope = render_mode == 'lod' or (render_mode == 'auto' and len(scope_df) > LOD_THRESHOLD)
+        if long_scope:
+            # Each statistic is downsampled on the batch-sequence axis; the EWMA limits are drawn at their steady state.
+            Trace, x_values = go.Scattergl, scope_df.index.to_numpy()
+            downsample = lambda y: downsample_indices(x_values, y, LOD_MAX_POINTS, lod_method)
+        else:
+            Trace, x_values = go.Scatter, scope_df['Batch ID'].to_numpy()
+            downsample = lambda y: np.arange(len(y))
+        for row, key, name, color in ((1, 'cusum_hi', 'C+', '#DA291C'), (1, 'cusum_lo', 'C−', '#0033A0'), (2, 'ewma', 'EWMA', '#007A33')):
+            y = hist[key][:, j]
+            shown = downsample(y)
+            fig_drift.add_trace(Trace(x=x_values[shown], y=y[shown], mode='lines', name=name, line_color=color), row=row, col=1)
+        fig_drift.add_hline(y=scope_monitor.h, line_dash="dash", line_color="red", row=1, col=1)
+        if long_scope:
+            steady_limit = ewma_limit(np.inf, scope_monitor.lam, scope_monitor.L)
+            for limit in (steady_limit, -steady_limit):
+                fig_drift.add_hline(y=limit, line_dash="dash", line_color="red", row=2, col=1)
+            fig_drift.update_xaxes(title_text=f"Batch sequence ({len(scope_df):,} batches, downsampled)", title_font_size=11, row=2, col=1)
+        else:
+            fig_drift.add_trace(Trace(x=x_values, y=hist['ewma_limit'][:, j], name='UCL', line=dict(color='red', dash='dash')), row=2, col=1)
+            fig_drift.add_trace(Trace(x=x_values, y=-hist['ewma_limit'][:, j], name='LCL', line=dict(color='red', dash='dash')), row=2, col=1)
+        fig_drift.update_layout(height=450, showlegend=False, margin=dict(t=40, b=20))
+        st.plotly_chart(fig_drift, use_container_width=True)
+st.divider()
+
+# --- Process Capability Review ---
+st.subheader("Process Capability Review (All Specified CQAs & CPPs)")
+st.caption("Pp/Ppk use the overall standard deviation; Cp/Cpk use the short-term (moving range) sigma. Intervals are 95% confidence bounds.")
+ci_method = st.radio("Confidence interval method", ["analytic", "bootstrap"], horizontal=True,
+                     format_func=lambda m: "Analytic (χ² / Bissell)" if m == "analytic" else "Bootstrap (2,000 resamples)")
+with section("capability_review"):
+    capability_df = compute_capability_review(cpv_df[MONITORED_PARAMETERS], SPEC_LIMITS, ci_method)
+    st.dataframe(
+        capability_df[['N', 'LSL', 'USL', 'Pp', 'Pp Lower', 'Pp Upper', 'Ppk', 'Ppk Lower', 'Ppk Upper', 'Cpk', 'Cpk Lower', 'Cpk Upper']]
+        .style.format(precision=2).map(lambda v: 'background-color: #F8D7DA; color: #721C24' if v < 1.33 else '', subset=['Ppk']),
+        use_container_width=True
+    )
 st.divider()
 
 # --- 3. Critical Material Attributes (CMAs) ---
 st.subheader("III. Critical Material Attribute (CMA) Monitoring")
 cma_col1, cma_col2 = st.columns(2)
+long_history = render_mode == 'lod' or (render_mode == 'auto' and len(cpv_df) > LOD_THRESHOLD)
 with cma_col1:
     st.markdown(f"**CMA - Resin Age (cycles)**")
-    fig = px.line(cpv_df, x='Batch ID', y='CMA - Resin Age (cycles)', markers=True, line_shape="linear")
-    fig.update_layout(height=300, margin=dict(t=20, b=20), yaxis_title="Cycles")
-    st.plotly_chart(fig, use_container_width=True)
+    with section("cma:resin_age"):
+        resin_df = cpv_df
+        if long_history:
+            resin_df = cpv_df.iloc[downsample_indices(cpv_df.index.to_numpy(), cpv_df['CMA - Resin Age (cycles)'].to_numpy(), LOD_MAX_POINTS, lod_method)]
+        fig = px.line(resin_df, x='Batch ID', y='CMA - Resin Age (cycles)', markers=not long_history, line_shape="linear",
+                      render_mode='webgl' if long_history else 'auto')
+        fig.update_layout(height=300, margin=dict(t=20, b=20), yaxis_title="Cycles")
+        st.plotly_chart(fig, use_container_width=True)
 with cma_col2:
     st.markdown(f"**CMA - Buffer Lot ID**")
-    fig = px.scatter(cpv_df, x='Batch ID', y='CMA - Buffer Lot ID', color='CMA - Buffer Lot ID')
-    fig.update_layout(height=300, margin=dict(t=20, b=20), yaxis_title=None, showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    with section("cma:buffer_lot"):
+        lot_df = cpv_df
+        if long_history:
+            # Only lot changeovers (and the latest batch) are drawn for long histories.
+            lot_ids = cpv_df['CMA - Buffer Lot ID']
+            lot_df = cpv_df[lot_ids.ne(lot_ids.shift()) | (np.arange(len(cpv_df)) == len(cpv_df) - 1)]
+        fig = px.scatter(lot_df, x='Batch ID', y='CMA - Buffer Lot ID', color='CMA - Buffer Lot ID',
+                         render_mode='webgl' if long_history else 'auto')
+        fig.update_layout(height=300, margin=dict(t=20, b=20), yaxis_title=None, showlegend=False)
+        st.plotly_chart(fig, use_container_width=True)
 st.divider()
 
 # --- 4. Multivariate Analysis & Interpretation ---
@@ -129,17 +476,43 @@ st.header("IV. Multivariate Analysis & Overall Interpretation")
 with st.container(border=True):
     st.subheader("Correlation Matrix")
     st.caption("Visualizing the relationships between all process parameters to identify key drivers of variation.")
-    numeric_df = cpv_df.select_dtypes(include=np.number)
-    corr_df = numeric_df.corr()
-    fig_corr = px.imshow(
-        corr_df,
-        text_auto=".2f",
-        aspect="auto",
-        color_continuous_scale='RdBu_r',
-        zmin=-1, zmax=1,
-        title="Correlation Heatmap of CQAs, CPPs, and CMAs"
-    )
-    st.plotly_chart(fig_corr, use_container_width=True)
+    numeric_params = list(cpv_df.select_dtypes(include=np.number).columns)
+    corr_scope = st.radio("Correlation window", ["All batches in range", "Last N batches"], horizontal=True)
+    corr_window = None
+    if corr_scope == "Last N batches":
+        corr_window = st.number_input("N (batches)", min_value=5, max_value=max(5, len(cpv_df)), value=min(20, max(5, len(cpv_df))), step=5)
+    with section("correlation_matrix"):
+        corr_df = get_correlation_engine(cpv_df, numeric_params, corr_window).corr()
+        fig_corr = px.imshow(
+            corr_df,
+            text_auto=".2f",
+            aspect="auto",
+            color_continuous_scale='RdBu_r',
+            zmin=-1, zmax=1,
+            title="Correlation Heatmap of CQAs, CPPs, and CMAs"
+        )
+        st.plotly_chart(fig_corr, use_container_width=True)
+
+    st.subheader("Rolling Correlation Screening")
+    st.caption("How the relationship between two parameters evolves batch by batch over a sliding window.")
+    roll_col1, roll_col2, roll_col3 = st.columns(3)
+    x_param = roll_col1.selectbox("Driver", numeric_params, index=numeric_params.index('CMA - Resin Age (cycles)'))
+    y_param = roll_col2.selectbox("Response", numeric_params, index=numeric_params.index('CQA - Purity (%)'))
+    roll_window = roll_col3.number_input("Window (batches)", min_value=3, max_value=max(3, len(cpv_df)), value=min(15, max(3, len(cpv_df))), step=1)
+    with section("rolling_correlation"):
+        rolling_r = rolling_correlation(cpv_df, [(x_param, y_param)], roll_window).iloc[:, 0]
+        shown = np.arange(len(rolling_r))
+        if long_history:
+            shown = downsample_indices(shown, rolling_r.to_numpy(), LOD_MAX_POINTS, lod_method)
+        fig_roll = px.line(
+            x=cpv_df['Batch ID'].iloc[shown], y=rolling_r.iloc[shown], markers=not long_history,
+            render_mode='webgl' if long_history else 'auto',
+            labels={'x': 'Batch ID', 'y': 'Pearson r'}, title=f"Rolling r (window = {roll_window}): {x_param} vs. {y_param}"
+        )
+        fig_roll.update_yaxes(range=[-1.05, 1.05])
+        fig_roll.add_hline(y=0, line_dash="dot", line_color="grey")
+        fig_roll.update_layout(height=350)
+        st.plotly_chart(fig_roll, use_container_width=True)
 
     st.subheader("Managerial Conclusion & Action Plan")
     st.markdown("""
@@ -154,3 +527,109 @@ with st.container(border=True):
     - **Corrective Action:** I will direct the project lead to issue a formal recommendation to the manufacturing site to discard the current resin pack and prepare the column with a new lot of resin.
     - **Preventive Action (Lifecycle Management):** This analysis provides the objective evidence needed to justify a change to our control strategy. I will initiate a change control to reduce the validated lifetime of the IEX resin from its current limit to a more conservative one (e.g., from 250 to 200 cycles). This is a perfect example of using the CPV program to **"drive and validate process improvements"** and ensure long-term product robustness.
     """)
+
+# --- 5. Multivariate Statistical Process Control ---
+st.header("V. Multivariate SPC: Hotelling T² & SPE Monitoring")
+st.caption("A PCA model of all numeric CQAs, CPPs and CMAs is fitted on a reference window of in-control batches. Every batch is then scored for Hotelling T² (unusual variation within the model) and SPE (a broken correlation structure the model cannot explain). Limits are at 99% confidence.")
+def render_mspc(cpv_df):
+    """Renders the T²/SPE charts and contribution plot; skipped when the range holds too few batches for PCA."""
+    if len(cpv_df) < MSPC_MIN_REFERENCE_BATCHES:
+        st.info(f"Multivariate monitoring needs at least {MSPC_MIN_REFERENCE_BATCHES} batches in the selected range.")
+        return
+    mspc_params = list(cpv_df.select_dtypes(include=np.number).columns)
+    reference_batches = st.number_input(
+        "Reference window (first N batches in range)", min_value=MSPC_MIN_REFERENCE_BATCHES, max_value=len(cpv_df),
+        value=min(20, len(cpv_df)), step=5
+    )
+    try:
+        with section("mspc_model"):
+            pca_model = fit_pca_monitor(cpv_df[mspc_params].iloc[:reference_batches])
+    except ValueError as err:
+        st.warning(str(err))
+        return
+    with section("mspc_scores"):
+        mspc_scores = get_mspc_scores(pca_model, cpv_df[mspc_params])
+    mspc_col1, mspc_col2 = st.columns(2)
+    for col, statistic, limit in ((mspc_col1, 'T²', pca_model.t2_limit_), (mspc_col2, 'SPE', pca_model.spe_limit_)):
+        with col:
+            with section(f"mspc_chart:{statistic}"):
+                alarms = mspc_scores[f'{statistic} Alarm'].to_numpy()
+                values = mspc_scores[statistic].to_numpy()
+                shown, alarm_shown = np.arange(len(mspc_scores)), np.flatnonzero(alarms)
+                if long_history:
+                    # Alarms are thinned like the I-chart OOC points before being forced into the outline.
+                    alarm_shown = thin_markers(alarms, LOD_MAX_POINTS, values)
+                    keep = np.zeros(len(alarms), dtype=bool)
+                    keep[alarm_shown] = True
+                    shown = downsample_indices(shown, values, LOD_MAX_POINTS, lod_method, keep=keep)
+                Trace = go.Scattergl if long_history else go.Scatter
+                batch_ids = cpv_df['Batch ID'].to_numpy()
+                fig = go.Figure()
+                fig.add_trace(Trace(x=batch_ids[shown], y=values[shown], mode='lines' if long_history else 'lines+markers', line_color='#0033A0', name=statistic))
+                fig.add_trace(Trace(x=batch_ids[alarm_shown], y=values[alarm_shown], mode='markers', marker=dict(color='red', size=11, symbol='x'), name='Alarm'))
+                fig.add_hline(y=limit, line_dash="dash", line_color="red", annotation_text="99% limit")
+                fig.add_vrect(x0=cpv_df['Batch ID'].iloc[0], x1=cpv_df['Batch ID'].iloc[reference_batches - 1], fillcolor="rgba(0, 122, 51, 0.08)", line_width=0, annotation_text="Reference", annotation_position="top left")
+                fig.update_layout(title=f"Hotelling {statistic}" if statistic == 'T²' else "Squared Prediction Error (SPE)", height=350, showlegend=False, margin=dict(t=50, b=20))
+                st.plotly_chart(fig, use_container_width=True)
+            st.caption(f"{int(alarms.sum())} of {len(alarms)} batches above the {statistic} limit. Model: {pca_model.n_components_} component(s) explaining {pca_model.explained_variance_ratio_.sum():.0%} of reference variance.")
+
+    st.subheader("Contribution Plot")
+    # Only the most recent alarms and the latest batch are offered; any other batch is looked up by ID.
+    alarm_positions = np.flatnonzero((mspc_scores['T² Alarm'] | mspc_scores['SPE Alarm']).to_numpy())
+    if not len(alarm_positions):
+        alarm_positions = np.array([int(np.argmax(mspc_scores['SPE'].to_numpy()))])
+    batch_ids = cpv_df['Batch ID']
+    batch_options = list(dict.fromkeys(batch_ids.iloc[alarm_positions[-CONTRIBUTION_ALARM_OPTIONS:][::-1]].tolist() + [batch_ids.iloc[-1]]))
+    contrib_col1, contrib_col2 = st.columns([1, 3])
+    with contrib_col1:
+        contrib_batch = st.selectbox("Batch (recent alarms and latest)", batch_options)
+        lookup = st.text_input("Or look up a Batch ID", placeholder="e.g. B0140").strip()
+        contrib_stat = st.radio("Statistic", ['SPE', 'T²'], horizontal=True)
+    if lookup:
+        if (batch_ids == lookup).any():
+            contrib_batch = lookup
+        else:
+            st.warning(f"Batch {lookup} is not in the selected range; showing {contrib_batch}.")
+    with contrib_col2:
+        with section("contributions"):
+            batch_row = cpv_df[mspc_params][batch_ids == contrib_batch]
+            contrib = pca_model.contributions(batch_row, contrib_stat).iloc[0].sort_values()
+            fig_contrib = px.bar(
+                x=contrib.values, y=contrib.index, orientation='h', labels={'x': f'Contribution to {contrib_stat}', 'y': ''},
+                title=f"Variable Contributions to {contrib_stat} for Batch {contrib_batch}",
+                color=contrib.values, color_continuous_scale='Reds' if contrib_stat == 'SPE' else 'RdBu_r'
+            )
+            fig_contrib.update_layout(height=350, coloraxis_showscale=False)
+            st.plotly_chart(fig_contrib, use_container_width=True)
+
+render_mspc(cpv_df)
+st.divider()
+
+# --- 6. Site-Wide CPV Sweep ---
+st.subheader("VI. Site-Wide CPV Sweep (All Products × Unit Operations)")
+st.caption("Evaluates control limits, Nelson rules and capability for every partition in the CPV store in parallel worker processes, then merges the results for the weekly CPV review.")
+site_partitions = cpv_store.partitions()
+sweep_col1, sweep_col2 = st.columns([1, 3])
+with sweep_col1:
+    st.metric("Partitions in Store", len(site_partitions))
+    st.metric("Batches in Store", f"{site_partitions['Batches'].sum():,}")
+    sweep_baseline = st.number_input("Phase II baseline (0 = live limits)", min_value=0, max_value=500, value=0, step=10, key='sweep_baseline')
+    run_sweep = st.button("Run Site Sweep", type="primary")
+if run_sweep:
+    with section("site_sweep"):
+        st.session_state['cpv_site_sweep'] = run_cached_site_sweep(cpv_store.root, site_partitions, int(sweep_baseline) or None)
+with sweep_col2:
+    site_sweep = st.session_state.get('cpv_site_sweep')
+    if site_sweep is None:
+        st.info("Run the sweep to evaluate every product and unit operation in the store.")
+    else:
+        status_colors = {'Out of Control': '#F8D7DA', 'Not Capable': '#FFF3CD', 'Run-Rule Signal': '#FFF3CD', 'In Control': '#D4EDDA'}
+        st.dataframe(
+            sweep_overview(site_sweep).style.format(precision=2)
+            .map(lambda v: f'background-color: {status_colors.get(v, "")}' if v in status_colors else '', subset=['Status']),
+            use_container_width=True, hide_index=True
+        )
+        with st.expander("Parameter-level results"):
+            st.dataframe(site_sweep.style.format(precision=2), use_container_width=True, hide_index=True)
+
+render_debug_panel()
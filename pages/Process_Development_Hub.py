@@ -4,19 +4,79 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from utils import generate_doe_data
+from doe import (FACTOR_LETTERS, STANDARD_GENERATORS, alias_structure, box_behnken, central_composite,
+                 design_table, factorial_blocks, fractional_factorial, full_factorial, resolution)
+from rsm import DesignSpaceSurface, fit_rsm, frame_hash
+from rsm_montecarlo import pos_slice, probability_of_success
+from data_access import get_doe_data
+from theme import apply_plotly_theme
+from profiling import render_debug_panel, section, start_page
+
+FACTORS = ['Temperature (°C)', 'pH']
+RESPONSE = 'Stability (% Initial)'
+
+# --- Model Fitting (cached per DOE data set) ---
+DISPLAY_POINTS = 100  # max grid points per axis sent to the browser
+
+@st.cache_data(show_spinner=False)
+def build_design(design_type, factors, fraction, alpha, center_points, blocked, randomize, seed):
+    """Generates the coded design, run sheet and alias structure for the design generator."""
+    k = len(factors)
+    generators, blocks = [], None
+    if design_type == "Full factorial":
+        coded = full_factorial(k)
+        if blocked:
+            blocks = factorial_blocks(coded, [FACTOR_LETTERS[:k]])
+    elif design_type == "Fractional factorial":
+        coded, generators = fractional_factorial(k, fraction)
+    elif design_type == "Central composite":
+        coded, portion = central_composite(k, alpha=alpha, center_points=(center_points, max(1, center_points // 2)))
+        if blocked:
+            blocks = np.where(portion == 'Axial', 2, 1)
+            blocks[len(portion) - max(1, center_points // 2):] = 2
+    else:
+        coded = box_behnken(k, center_points)
+    table = design_table(coded, dict(factors), blocks=blocks, randomize=randomize, seed=seed)
+    aliases = alias_structure(k, generators) if generators else None
+    return table, generators, aliases
+
+@st.cache_resource(show_spinner="Fitting response surface model...")
+def get_rsm_model(data_key, _doe_df, factors, response):
+    """Fits the quadratic RSM once per distinct DOE table; `data_key` is a content hash of the table."""
+    return fit_rsm(_doe_df, list(factors), response)
+
+@st.cache_resource(show_spinner="Predicting design space...")
+def get_design_space(data_key, _model, resolution):
+    """Predicts and indexes the design-space surface once per model and grid resolution."""
+    return DesignSpaceSurface(_model, resolution)
+
+@st.cache_data(show_spinner="Sampling model and process uncertainty...")
+def get_probability_of_success(data_key, _model, spec, axes, n_draws):
+    """Monte Carlo probability of meeting the stability spec over the factor grid, cached per model, spec and grid."""
+    return probability_of_success(_model, spec, [np.asarray(a) for a in axes], n_draws=n_draws, seed=2024)
+
+@st.cache_resource(show_spinner=False)
+def get_par_base_figure(data_key, resolution, _design_space):
+    """Builds the deterministic contour lines once per design space; the PAR explorer only adds the PAR overlay."""
+    temp_range, ph_range, stability_pred = _design_space.display_grid(DISPLAY_POINTS)
+    return go.Figure(go.Contour(
+        z=stability_pred.astype(np.float32), x=temp_range, y=ph_range, colorscale='Viridis', showscale=False,
+        contours=dict(coloring='lines', showlabels=True), line=dict(width=1)
+    ))
 
 st.set_page_config(
     page_title="Process Development | Grifols",
     layout="wide"
 )
+apply_plotly_theme()
+start_page("Process_Development_Hub")
 
 st.title("🔬 Process Development & Characterization Hub")
 st.markdown("### Analyzing data from development studies to establish robust and well-understood manufacturing processes.")
 
 # --- Data Generation ---
-doe_df = generate_doe_data()
+with section("load_data"):
+    doe_df = get_doe_data()
 
 # --- 1. Experimental Design & Data ---
 st.header("1. DOE Study: Reagent Formulation Robustness")
@@ -32,90 +92,188 @@ with st.expander("🔬 The Experiment & Methodology"):
     """)
     st.dataframe(doe_df, use_container_width=True)
 
+with st.expander("🧪 Design Generator (Factorial, CCD, Box-Behnken)"):
+    gen_col1, gen_col2, gen_col3 = st.columns(3)
+    design_type = gen_col1.selectbox("Design type", ["Central composite", "Full factorial", "Fractional factorial", "Box-Behnken"])
+    n_factors = gen_col1.number_input("Number of factors (k)", min_value=3 if design_type == "Box-Behnken" else 2, max_value=11, value=3 if design_type == "Box-Behnken" else 2)
+    fraction = 0
+    if design_type == "Fractional factorial":
+        fractions = sorted(p for kk, p in STANDARD_GENERATORS if kk == n_factors)
+        if not fractions:
+            st.info("No standard fractions for this number of factors; using the full factorial.")
+        fraction = gen_col2.selectbox("Fraction (p in 2^(k-p))", fractions or [0])
+    alpha = gen_col2.selectbox("Axial distance (α)", ['face', 'rotatable'], disabled=design_type != "Central composite")
+    center_points = gen_col2.number_input("Center points", min_value=0, max_value=10, value=3)
+    blocked = gen_col3.checkbox("Block (cube/axial or highest-order interaction)", disabled=design_type not in ("Full factorial", "Central composite"))
+    randomize = gen_col3.checkbox("Randomize run order", value=True)
+    design_seed = gen_col3.number_input("Randomization seed", min_value=0, value=42)
+    default_factors = pd.DataFrame({
+        'Factor': FACTORS + [f"Factor {FACTOR_LETTERS[i]}" for i in range(len(FACTORS), 11)],
+        'Low': [20.0, 7.3] + [-1.0] * (11 - len(FACTORS)), 'High': [30.0, 7.5] + [1.0] * (11 - len(FACTORS)),
+    })
+    factor_table = st.data_editor(default_factors.head(int(n_factors)), hide_index=True, use_container_width=True, key=f"doe_factors_{n_factors}")
+    factors = tuple((row.Factor, (row.Low, row.High)) for row in factor_table.itertuples())
+    with section("build_design"):
+        design_runs, generators, aliases = build_design(design_type, factors, int(fraction), alpha, int(center_points), blocked, randomize, int(design_seed))
+    summary_col1, summary_col2, summary_col3 = st.columns(3)
+    summary_col1.metric("Runs", len(design_runs))
+    summary_col2.metric("Blocks", design_runs['Block'].nunique())
+    summary_col3.metric("Resolution", "Full" if not generators else f"{resolution(generators)}")
+    st.dataframe(design_runs, use_container_width=True, hide_index=True, height=300)
+    if aliases is not None:
+        st.markdown(f"**Generators:** {', '.join(generators)}")
+        st.dataframe(aliases, use_container_width=True, hide_index=True)
+    st.download_button("Download run sheet (CSV)", design_runs.to_csv(index=False), file_name="doe_run_sheet.csv", mime="text/csv")
+    executed = st.file_uploader(f"Upload executed runs with a '{RESPONSE}' column to analyze them below", type="csv")
+    if executed is not None:
+        uploaded = pd.read_csv(executed)
+        missing = [c for c in FACTORS + [RESPONSE] if c not in uploaded.columns]
+        if missing:
+            st.error(f"Uploaded runs are missing columns: {', '.join(missing)}")
+        else:
+            doe_df = uploaded
+            st.success(f"Analyzing {len(doe_df)} uploaded runs.")
+
+with section("rsm_fit"):
+    rsm_model = get_rsm_model(frame_hash(doe_df[FACTORS + [RESPONSE]]), doe_df, tuple(FACTORS), RESPONSE)
+    optimum = rsm_model.optimum()
+
+with st.expander("📐 Fitted Quadratic Model (coded units)"):
+    fit_stats = rsm_model.summary()
+    stat_cols = st.columns(4)
+    stat_cols[0].metric("R²", f"{fit_stats['R²']:.3f}")
+    stat_cols[1].metric("Adjusted R²", "n/a" if np.isnan(fit_stats['Adjusted R²']) else f"{fit_stats['Adjusted R²']:.3f}")
+    stat_cols[2].metric("RMSE", "n/a" if np.isnan(fit_stats['RMSE']) else f"{fit_stats['RMSE']:.3f}")
+    stat_cols[3].metric("Lack-of-Fit p", "n/a" if np.isnan(fit_stats['Lack-of-Fit p-value']) else f"{fit_stats['Lack-of-Fit p-value']:.3f}",
+                        help="Requires replicated runs and more unique design points than model terms.")
+    st.dataframe(rsm_model.coefficients_.style.format(precision=4, na_rep='—'), use_container_width=True)
+    if (rsm_model.coefficients_['Estimable'] == 'Aliased').any():
+        st.warning("Some quadratic terms are aliased in this design and cannot be estimated separately. Add axial or additional levels (e.g. a central composite design) to resolve them.")
+
 # --- 2. Interactive Analysis of the Design Space ---
 st.header("2. Interactive Visualization of the Process Design Space")
 st.markdown("Use the slider to define the minimum acceptable stability. The highlighted green area on the 2D contour plot represents the **Proven Acceptable Range (PAR)**—the operating window where this criterion is met.")
 
-# --- Interactive Control ---
-stability_spec = st.slider(
-    "Minimum Acceptable Stability (% of Initial Potency)",
-    min_value=90.0, max_value=100.0, value=95.0, step=0.5
+# --- Design-Space Resolution ---
+surface_resolution = st.select_slider(
+    "Design-space grid resolution (points per axis)", options=[50, 100, 250, 500], value=100,
+    help="The surface is predicted once per model and resolution and indexed by response value, so PAR threshold changes are lookups."
 )
+with section("design_space"):
+    design_space = get_design_space(frame_hash(doe_df[FACTORS + [RESPONSE]]), rsm_model, surface_resolution)
+temp_range, ph_range, stability_pred = design_space.display_grid(DISPLAY_POINTS)
+opt_temp, opt_ph, max_stability = optimum['Temperature (°C)'], optimum['pH'], optimum[RESPONSE]
 
-# --- Generate Contour Data & Model (Simulated for this mockup) ---
-temp_range = np.linspace(doe_df['Temperature (°C)'].min(), doe_df['Temperature (°C)'].max(), 50)
-ph_range = np.linspace(doe_df['pH'].min(), doe_df['pH'].max(), 50)
-temp_grid, ph_grid = np.meshgrid(temp_range, ph_range)
-stability_pred = 99 - 0.05 * (temp_grid - 25)**2 - 150 * (ph_grid - 7.4)**2
-opt_temp, opt_ph, max_stability = 25.0, 7.4, 99.0
-
-# --- Upgraded Combined 3D Surface and 2D Contour Plot ---
-fig = make_subplots(
-    rows=1, cols=2,
-    specs=[[{'type': 'surface'}, {'type': 'contour'}]],
-    subplot_titles=('3D Response Surface', '2D Contour Map with PAR')
-)
+# --- 3D Response Surface (static per model and resolution) ---
+surface_col, optimum_col = st.columns([3, 1])
+with surface_col:
+    with section("surface"):
+        fig_surface = go.Figure()
+        fig_surface.add_trace(go.Surface(
+            z=stability_pred, x=temp_range, y=ph_range, colorscale='Viridis', showscale=False,
+            name='Response Surface'
+        ))
+        fig_surface.add_trace(go.Scatter3d(
+            x=doe_df['Temperature (°C)'], y=doe_df['pH'], z=doe_df['Stability (% Initial)'],
+            mode='markers', marker=dict(size=5, color='black', symbol='diamond'), name='DOE Points'
+        ))
+        fig_surface.add_trace(go.Scatter3d(
+            x=[opt_temp], y=[opt_ph], z=[max_stability],
+            mode='markers', marker=dict(size=10, color='red', symbol='cross'), name='Predicted Optimum'
+        ))
+        fig_surface.update_layout(
+            height=550, title_text="3D Response Surface: Stability as a Function of Temperature and pH",
+            scene=dict(xaxis=dict(title='Temperature (°C)'), yaxis=dict(title='Formulation pH'), zaxis=dict(title='Stability (%)')),
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1), margin=dict(l=0, r=0, b=0)
+        )
+    with section("surface:render"):
+        st.plotly_chart(fig_surface, use_container_width=True)
+with optimum_col:
+    st.metric("Optimal Temperature (°C)", f"{opt_temp:.1f}")
+    st.metric("Optimal pH", f"{opt_ph:.3f}")
+    st.metric("Predicted Maximum Stability (%)", f"{max_stability:.2f}",
+              help="Stationary point of the fitted quadratic" if optimum['Stationary Point'] else "Bounded numerical optimum within the studied ranges")
 
-# 3D Surface Plot
-fig.add_trace(go.Surface(
-    z=stability_pred, x=temp_range, y=ph_range, colorscale='Viridis', showscale=False,
-    name='Response Surface'
-), row=1, col=1)
-fig.add_trace(go.Scatter3d(
-    x=doe_df['Temperature (°C)'], y=doe_df['pH'], z=doe_df['Stability (% Initial)'],
-    mode='markers', marker=dict(size=5, color='black', symbol='diamond'), name='DOE Points'
-), row=1, col=1)
-fig.add_trace(go.Scatter3d(
-    x=[opt_temp], y=[opt_ph], z=[max_stability],
-    mode='markers', marker=dict(size=10, color='red', symbol='cross'), name='Predicted Optimum'
-), row=1, col=1)
-
-# 2D Contour Plot
-fig.add_trace(go.Contour(
-    z=stability_pred, x=temp_range, y=ph_range, colorscale='Viridis', showscale=False,
-    contours=dict(coloring='lines', showlabels=True), line=dict(width=1)
-), row=1, col=2)
-# Highlight the Proven Acceptable Range (PAR)
-par_mask = (stability_pred >= stability_spec)
-fig.add_trace(go.Contour(
-    z=par_mask.astype(int), x=temp_range, y=ph_range, showscale=False,
-    contours_coloring='lines', line_width=0,
-    colorscale=[[0, 'rgba(0,0,0,0)'], [1, 'rgba(0, 122, 51, 0.4)']],
-    hoverinfo='none', name='PAR'
-), row=1, col=2)
-fig.add_trace(go.Scatter(
-    x=doe_df['Temperature (°C)'], y=doe_df['pH'],
-    mode='markers', marker=dict(color='black', symbol='diamond-open', size=8), name='DOE Points'
-), row=1, col=2)
-
-
-# --- START: Corrected fig.update_layout block ---
-fig.update_layout(
-    height=700,
-    title_text="Process Robustness: Stability as a Function of Temperature and pH",
-    # Use nested dictionaries for scene axis titles
-    scene=dict(
-        xaxis=dict(title='Temperature (°C)'),
-        yaxis=dict(title='Formulation pH'),
-        zaxis=dict(title='Stability (%)')
-    ),
-    # Use nested dictionaries for 2D subplot axis titles
-    xaxis2=dict(title='Temperature (°C)'),
-    yaxis2=dict(title='Formulation pH'),
-    legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
-)
-# --- END: Corrected fig.update_layout block ---
-
-st.plotly_chart(fig, use_container_width=True)
-
-with st.container(border=True):
-    st.header("Managerial Analysis & Decision")
-    st.markdown(f"""
-    - **Process Understanding:** The 3D surface plot provides an intuitive "map" of our process, making it an excellent tool for communicating with our cross-functional partners in Manufacturing and QA. It clearly shows the "peak" of stability.
-    
-    - **Control Strategy Definition:** The 2D contour plot is where we make our key decisions. The analysis shows that our process is far more sensitive to changes in **pH** than it is to **Temperature**. The green "sweet spot" (Proven Acceptable Range) is very narrow along the pH axis. This is a critical insight.
-    
-    - **Data-Driven Decision:** Based on this data, I will direct the team to implement a tight control limit for pH (e.g., 7.40 ± 0.05) in the Master Batch Record. The acceptable range for temperature can be wider (e.g., 20-30°C), which provides operational flexibility to the manufacturing team without compromising product quality.
-    
-    - **Audit Defense:** In a regulatory inspection, I can use this interactive plot to **"describe and defend"** our control strategy. I can show the auditor our design space and use the slider to demonstrate how our chosen operating ranges ensure we consistently meet our stability specification of **{stability_spec:.1f}%**. This provides clear, objective evidence of a well-characterized and robust process.
-    """)
+# --- PAR Explorer (fragment: slider moves only rerun this block) ---
+@st.fragment
+@section("par_explorer")
+def render_par_explorer(design_space, base_figure, model, data_key):
+    """Renders the PAR threshold slider, the PAR summary and the 2D contour map (deterministic or probability of success)."""
+    stability_spec = st.slider(
+        "Minimum Acceptable Stability (% of Initial Potency)",
+        min_value=90.0, max_value=100.0, value=95.0, step=0.5
+    )
+    view = st.radio(
+        "Design-space view", ["Predicted mean (deterministic)", "Probability of success (Monte Carlo)"], horizontal=True,
+        help="The Monte Carlo view samples the fitted model's coefficient and residual uncertainty and integrates process noise, giving P(stability ≥ spec) at each setting."
+    )
+    if view.startswith("Predicted"):
+        par = design_space.par(stability_spec)
+        par_col1, par_col2, par_col3 = st.columns(3)
+        par_col1.metric("PAR Share of Design Space", f"{par['Fraction']:.1%}")
+        par_col2.metric("PAR Temperature Range (°C)", "—" if par['Cells'] == 0 else f"{par['Temperature (°C) Min']:.1f} – {par['Temperature (°C) Max']:.1f}")
+        par_col3.metric("PAR pH Range", "—" if par['Cells'] == 0 else f"{par['pH Min']:.3f} – {par['pH Max']:.3f}")
+        # The cached contour lines are reused; only the PAR polygons change with the threshold.
+        fig = go.Figure(base_figure)
+        par_x, par_y = design_space.par_outline(stability_spec, DISPLAY_POINTS)
+        fig.add_trace(go.Scatter(
+            x=par_x, y=par_y, mode='lines', fill='toself', fillcolor='rgba(0, 122, 51, 0.4)',
+            line_width=0, hoverinfo='skip', name='PAR'
+        ))
+        title = "2D Contour Map with PAR"
+    else:
+        temp_range, ph_range, _ = design_space.display_grid(DISPLAY_POINTS)
+        fig = go.Figure()
+        mc_col1, mc_col2 = st.columns(2)
+        required_pos = mc_col1.slider("Required probability of success", 0.50, 0.99, 0.90, 0.01)
+        n_draws = mc_col2.select_slider("Posterior draws", options=[500, 1000, 2000, 5000], value=2000)
+        try:
+            with section("probability_of_success"):
+                pos = get_probability_of_success(data_key, model, stability_spec, (tuple(temp_range), tuple(ph_range)), n_draws)
+        except ValueError as err:
+            st.warning(str(err))
+            return
+        pos_grid = pos_slice(pos, FACTORS, 'Temperature (°C)', 'pH')
+        meets = pos_grid >= required_pos
+        pos_col1, pos_col2 = st.columns(2)
+        pos_col1.metric("Design Space Meeting Required PoS", f"{meets.mean():.1%}")
+        pos_col2.metric("Best Achievable PoS", f"{pos_grid.max():.1%}")
+        fig.add_trace(go.Contour(
+            z=pos_grid, x=temp_range, y=ph_range, colorscale='RdYlGn', zmin=0, zmax=1,
+            contours=dict(coloring='heatmap', showlabels=True, start=0.1, end=0.9, size=0.2),
+            colorbar=dict(title='P(success)'), line=dict(width=1), name='PoS'
+        ))
+        fig.add_trace(go.Contour(
+            z=pos_grid, x=temp_range, y=ph_range, showscale=False,
+            contours=dict(type='constraint', operation='>=', value=required_pos),
+            fillcolor='rgba(0, 0, 0, 0)', line=dict(color='black', width=3, dash='dash'), hoverinfo='none', name='Required PoS'
+        ))
+        title = f"Probability of Stability ≥ {stability_spec:.1f}% ({n_draws:,} posterior draws)"
+    fig.add_trace(go.Scatter(
+        x=doe_df['Temperature (°C)'], y=doe_df['pH'],
+        mode='markers', marker=dict(color='black', symbol='diamond-open', size=8), name='DOE Points'
+    ))
+    fig.update_layout(
+        height=550, title_text=title,
+        xaxis=dict(title='Temperature (°C)'), yaxis=dict(title='Formulation pH'),
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    with section("contour:render"):
+        st.plotly_chart(fig, use_container_width=True)
+
+    with st.container(border=True):
+        st.header("Managerial Analysis & Decision")
+        st.markdown(f"""
+        - **Process Understanding:** The 3D surface plot provides an intuitive "map" of our process, making it an excellent tool for communicating with our cross-functional partners in Manufacturing and QA. It clearly shows the "peak" of stability.
+        
+        - **Control Strategy Definition:** The 2D contour plot is where we make our key decisions. The analysis shows that our process is far more sensitive to changes in **pH** than it is to **Temperature**. The green "sweet spot" (Proven Acceptable Range) is very narrow along the pH axis. This is a critical insight.
+        
+        - **Data-Driven Decision:** Based on this data, I will direct the team to implement a tight control limit for pH (e.g., 7.40 ± 0.05) in the Master Batch Record. The acceptable range for temperature can be wider (e.g., 20-30°C), which provides operational flexibility to the manufacturing team without compromising product quality.
+        
+        - **Audit Defense:** In a regulatory inspection, I can use this interactive plot to **"describe and defend"** our control strategy. I can show the auditor our design space and use the slider to demonstrate how our chosen operating ranges ensure we consistently meet our stability specification of **{stability_spec:.1f}%**. This provides clear, objective evidence of a well-characterized and robust process.
+        """)
+
+doe_key = frame_hash(doe_df[FACTORS + [RESPONSE]])
+render_par_explorer(design_space, get_par_base_figure(doe_key, surface_resolution, design_space), rsm_model, doe_key)
+
+render_debug_panel()
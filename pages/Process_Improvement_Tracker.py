@@ -1,11 +1,11 @@
 # pages/Process_Improvement_Tracker.py
 
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
 # FIX: Import the single source of truth from utils.py
-from utils import generate_improvement_data
+from data_access import get_improvement_data
+from theme import apply_plotly_theme
+from profiling import render_debug_panel, section, start_page
 
 # FIX: Removed the local, redundant data generation function
 
@@ -13,20 +13,24 @@ st.set_page_config(
     page_title="Process Improvement | Grifols",
     layout="wide"
 )
+apply_plotly_theme()
+start_page("Process_Improvement_Tracker")
 
 st.title("🚀 Process Improvement Tracker")
 st.markdown("### Directing and tracking initiatives to enhance the efficiency, compliance, and robustness of our validation and manufacturing processes.")
 
 # --- Data Generation from central utility ---
-improvement_df = generate_improvement_data()
+with section("load_data"):
+    improvement_df = get_improvement_data()
 
 
 # --- OpEx Program KPIs ---
 st.header("Process Improvement Program KPIs")
-total_initiatives = len(improvement_df)
-completed_initiatives = improvement_df[improvement_df['Status'] == 'Complete'].shape[0]
-inprogress_initiatives = improvement_df[improvement_df['Status'] == 'In Progress'].shape[0]
-total_budget_allocated = improvement_df['Budget ($K)'].sum()
+with section("kpis"):
+    total_initiatives = len(improvement_df)
+    completed_initiatives = improvement_df[improvement_df['Status'] == 'Complete'].shape[0]
+    inprogress_initiatives = improvement_df[improvement_df['Status'] == 'In Progress'].shape[0]
+    total_budget_allocated = improvement_df['Budget ($K)'].sum()
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Total Active Initiatives", total_initiatives)
@@ -41,45 +45,47 @@ st.header("Initiative Prioritization Matrix")
 st.caption("Visualizing all initiatives on an Impact vs. Effort matrix to strategically focus resources.")
 
 # Map text to numerical values for plotting
-impact_map = {'Low': 1, 'Medium': 2, 'High': 3}
-effort_map = {'Low': 1, 'Medium': 2, 'High': 3}
-plot_df = improvement_df.copy()
-plot_df['Impact_Num'] = plot_df['Impact'].map(impact_map)
-plot_df['Effort_Num'] = plot_df['Effort'].map(effort_map)
-
-fig = px.scatter(
-    plot_df,
-    x='Effort_Num',
-    y='Impact_Num',
-    size='Budget ($K)',
-    color='Status',
-    hover_name='Initiative Name',
-    text='Initiative ID',
-    size_max=60,
-    color_discrete_map={
-        'In Progress': '#007A33', 'Complete': '#0033A0',
-        'Planned': '#6C6F70', 'At Risk': '#DA291C'
-    }
-)
-
-# Add quadrant lines and labels
-fig.add_vline(x=2.5, line_dash="dash")
-fig.add_hline(y=2.5, line_dash="dash")
-fig.add_annotation(x=1.5, y=3.2, text="<b>Quick Wins</b>", showarrow=False, font_size=14, font_color="green")
-fig.add_annotation(x=1.5, y=1.8, text="Fill-Ins", showarrow=False)
-fig.add_annotation(x=3.2, y=3.2, text="<b>Strategic Initiatives</b>", showarrow=False, font_size=14, font_color="blue")
-fig.add_annotation(x=3.2, y=1.8, text="Thankless Tasks", showarrow=False)
-
-fig.update_layout(
-    height=500,
-    title='Impact vs. Effort Portfolio View',
-    xaxis_title='Effort Required',
-    yaxis_title='Strategic Impact',
-    xaxis=dict(tickvals=list(effort_map.values()), ticktext=list(effort_map.keys())),
-    yaxis=dict(tickvals=list(impact_map.values()), ticktext=list(impact_map.keys()))
-)
-fig.update_traces(textposition='top center')
-st.plotly_chart(fig, use_container_width=True)
+with section("impact_effort"):
+    impact_map = {'Low': 1, 'Medium': 2, 'High': 3}
+    effort_map = {'Low': 1, 'Medium': 2, 'High': 3}
+    plot_df = improvement_df.copy()
+    plot_df['Impact_Num'] = plot_df['Impact'].map(impact_map)
+    plot_df['Effort_Num'] = plot_df['Effort'].map(effort_map)
+
+    fig = px.scatter(
+        plot_df,
+        x='Effort_Num',
+        y='Impact_Num',
+        size='Budget ($K)',
+        color='Status',
+        hover_name='Initiative Name',
+        text='Initiative ID',
+        size_max=60,
+        color_discrete_map={
+            'In Progress': '#007A33', 'Complete': '#0033A0',
+            'Planned': '#6C6F70', 'At Risk': '#DA291C'
+        }
+    )
+
+    # Add quadrant lines and labels
+    fig.add_vline(x=2.5, line_dash="dash")
+    fig.add_hline(y=2.5, line_dash="dash")
+    fig.add_annotation(x=1.5, y=3.2, text="<b>Quick Wins</b>", showarrow=False, font_size=14, font_color="green")
+    fig.add_annotation(x=1.5, y=1.8, text="Fill-Ins", showarrow=False)
+    fig.add_annotation(x=3.2, y=3.2, text="<b>Strategic Initiatives</b>", showarrow=False, font_size=14, font_color="blue")
+    fig.add_annotation(x=3.2, y=1.8, text="Thankless Tasks", showarrow=False)
+
+    fig.update_layout(
+        height=500,
+        title='Impact vs. Effort Portfolio View',
+        xaxis_title='Effort Required',
+        yaxis_title='Strategic Impact',
+        xaxis=dict(tickvals=list(effort_map.values()), ticktext=list(effort_map.keys())),
+        yaxis=dict(tickvals=list(impact_map.values()), ticktext=list(impact_map.keys()))
+    )
+    fig.update_traces(textposition='top center')
+with section("impact_effort:render"):
+    st.plotly_chart(fig, use_container_width=True)
 
 st.divider()
 
@@ -87,19 +93,20 @@ st.divider()
 st.header("Detailed Initiative Tracker")
 st.caption("A comprehensive list of all process improvement projects, their drivers, and progress.")
 
-st.dataframe(
-    improvement_df,
-    use_container_width=True,
-    hide_index=True,
-    column_config={
-        "Progress (%)": st.column_config.ProgressColumn(
-            "Progress", min_value=0, max_value=100, format="%d%%"
-        ),
-        "Budget ($K)": st.column_config.NumberColumn(
-            "Budget", format="$%dK"
-        )
-    }
-)
+with section("initiative_table"):
+    st.dataframe(
+        improvement_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Progress (%)": st.column_config.ProgressColumn(
+                "Progress", min_value=0, max_value=100, format="%d%%"
+            ),
+            "Budget ($K)": st.column_config.NumberColumn(
+                "Budget", format="$%dK"
+            )
+        }
+    )
 
 with st.container(border=True):
     st.header("Managerial Analysis & Action Plan")
@@ -112,3 +119,5 @@ with st.container(border=True):
     
     - **Driving the Culture:** By visualizing our projects this way, I can clearly communicate the 'why' to my team. We are not just doing projects; we are strategically investing our time and resources into initiatives that provide the greatest value to Grifols. This fosters an engaged and motivated team environment.
     """)
+
+render_debug_panel()
@@ -4,68 +4,38 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from utils import generate_validation_portfolio_data
+from data_access import get_transfer_schedule, get_validation_portfolio_data
+from theme import apply_plotly_theme
+from profiling import render_debug_panel, section, start_page
+from rsm import frame_hash
 
 st.set_page_config(
     page_title="Tech Transfer Hub | Grifols",
     layout="wide"
 )
+apply_plotly_theme()
+start_page("Technology_Transfer_Hub")
 
 st.title("✈️ Technology Transfer Hub")
 st.markdown("### Directing the end-to-end transfer of new or improved processes into GMP manufacturing.")
 
-# --- Mock data for the checklist ---
-def generate_tech_transfer_checklist_data():
-    """Generates a more detailed dataframe for Gantt chart plotting."""
-    data = {
-        'Task': [
-            'Tech Transfer Plan & Protocol (Approved)', 'Form Cross-Functional Transfer Team',
-            'Transfer Process Description & Flow Diagrams', 'Transfer Bill of Materials (BOM)',
-            'Execute Lab-Scale Demonstration Runs', 'Gap Analysis & Facility Fit Assessment',
-            'Raw Material & Consumable Qualification', 'Execute Engineering / Feasibility Batch',
-            'Execute Process Validation (PV) Batches', 'Complete PV Summary Report', 'Update Master Batch Record (Approved)'
-        ],
-        'Start': pd.to_datetime([
-            '2024-05-01', '2024-05-05', '2024-05-15', '2024-05-20', '2024-06-01',
-            '2024-06-15', '2024-06-20', '2024-08-01', '2024-09-01', '2024-10-15', '2024-11-01'
-        ]),
-        'Finish': pd.to_datetime([
-            '2024-05-14', '2024-05-10', '2024-06-14', '2024-06-20', '2024-06-30',
-            '2024-07-15', '2024-09-30', '2024-08-15', '2024-10-14', '2024-10-31', '2024-11-15'
-        ]),
-        'Phase': ["Planning", "Planning", "Knowledge Transfer", "Knowledge Transfer", "Knowledge Transfer",
-                  "Facility Fit", "Facility Fit", "Engineering", "Validation", "Validation", "Closeout"],
-        'Lead Department': ['Validation', 'Sr. Manager', 'R&D/MTS', 'Supply Chain', 'R&D',
-                          'Engineering/MTS', 'Validation/QC', 'Manufacturing', 'Manufacturing', 'Validation', 'QA/Mfg'],
-        'Status': ['Complete', 'Complete', 'Complete', 'Complete', 'Complete',
-                   'In Progress', 'At Risk', 'Planned', 'Planned', 'Planned', 'Planned']
-    }
-    return pd.DataFrame(data)
+# --- Checklist data (scheduled by the shared critical-path engine) ---
+@section("load_checklist")
+def load_checklist_data(schedule, project_name):
+    """Loads one project's deliverable checklist with its CPM dates, total float and critical flag.
 
-# --- Select Project to View ---
-portfolio_df = generate_validation_portfolio_data()
-transfer_projects = portfolio_df[portfolio_df['Project Type'] == 'Tech Transfer']['Project Name'].tolist()
-
-if not transfer_projects:
-    st.warning("No active Technology Transfer projects found in the portfolio.")
-    st.stop()
+    Not cached here: data_access already caches the schedule (TTL and "Refresh all data sources"),
+    so the checklist always comes from the same schedule as the KPIs and the what-if baseline.
+    """
+    return schedule.to_frame(project_name).drop(columns='Project')
 
-project_name = st.selectbox(
-    "Select an active Technology Transfer project to view its status:",
-    transfer_projects
-)
-st.header(f"Status for: **{project_name}**")
-st.divider()
-
-# --- Upgraded Visualizations ---
-col1, col2 = st.columns(2)
-with col1:
-    st.subheader("Project Health Funnel")
-    st.caption("Visualizing progress through the phase-gate process.")
-    
-    checklist_df = generate_tech_transfer_checklist_data()
+@section("project_figures")
+@st.cache_resource(show_spinner=False)
+def build_project_figures(data_key, _checklist_df):
+    """Builds the phase funnel and Gantt figures once per checklist content; `data_key` is a hash of the checklist."""
+    checklist_df = _checklist_df
     phase_counts = checklist_df['Phase'].value_counts().reindex(["Planning", "Knowledge Transfer", "Facility Fit", "Engineering", "Validation", "Closeout"])
-    
+
     fig_funnel = go.Figure(go.Funnel(
         y=phase_counts.index,
         x=phase_counts.values,
@@ -73,31 +43,25 @@ with col1:
         marker={"color": ["#0033A0", "#007A33", "#FFC72C", "#6C6F70", "#A2AAAD", "#DA291C"]},
     ))
     fig_funnel.update_layout(title_text="Deliverables per Project Phase", height=500, margin=dict(t=50, b=0))
-    st.plotly_chart(fig_funnel, use_container_width=True)
 
-with col2:
-    st.subheader("Detailed Project Gantt Chart")
-    st.caption("An interactive timeline of all project tasks and deliverables.")
-    
+    # Bars show the projected (early) schedule; critical-path tasks get a red outline.
     fig_gantt = px.timeline(
         checklist_df,
-        x_start="Start",
-        x_end="Finish",
+        x_start="Early Start",
+        x_end="Early Finish",
         y="Task",
         color="Lead Department",
-        title="Interactive Project Timeline",
+        title="Projected Project Timeline (critical path outlined)",
         hover_name="Task",
-        hover_data={"Status": True}
+        hover_data={"Status": True, "Start": "|%Y-%m-%d", "Finish": "|%Y-%m-%d", "Total Float (days)": True, "Critical": True}
     )
+    critical = checklist_df.set_index('Task')['Critical']
+    for trace in fig_gantt.data:
+        flags = critical.reindex(trace.y).fillna(False).to_numpy(dtype=bool)
+        trace.marker.line = dict(color='#DA291C', width=[3 if flag else 0 for flag in flags])
     fig_gantt.update_yaxes(categoryorder="total descending")
     fig_gantt.update_layout(height=500, margin=dict(t=50, b=0))
-    st.plotly_chart(fig_gantt, use_container_width=True)
-
-st.divider()
-
-# --- Detailed Deliverable Checklist ---
-st.header("Detailed Deliverable & Task Status")
-st.caption("A granular, auditable checklist of all required tasks for the selected project.")
+    return fig_funnel, fig_gantt
 
 def style_status(val):
     if val == 'Complete': return 'background-color: #D4EDDA; color: #155724'
@@ -106,20 +70,125 @@ def style_status(val):
     if val == 'Planned': return 'background-color: #EAEAEA'
     return ''
 
-st.dataframe(
-    checklist_df.style.apply(lambda x: x.map(style_status) if x.name == 'Status' else ['']*len(x), axis=1),
-    use_container_width=True,
-    hide_index=True
-)
+# --- Select Project to View ---
+with section("load_data"):
+    portfolio_df = get_validation_portfolio_data()
+    transfer_projects = portfolio_df[portfolio_df['Project Type'] == 'Tech Transfer']['Project Name'].tolist()
+
+if not transfer_projects:
+    st.warning("No active Technology Transfer projects found in the portfolio.")
+    st.stop()
+
+# --- Project Status (fragment: switching projects reruns only this block) ---
+@st.fragment
+@section("project_status")
+def render_project_status(transfer_projects):
+    """Renders the project selector and the selected project's funnel, Gantt chart and deliverable checklist."""
+    project_name = st.selectbox(
+        "Select an active Technology Transfer project to view its status:",
+        transfer_projects
+    )
+    st.header(f"Status for: **{project_name}**")
+    st.divider()
+
+    schedule = get_transfer_schedule()
+    checklist_df = load_checklist_data(schedule, project_name)
+    fig_funnel, fig_gantt = build_project_figures(frame_hash(checklist_df), checklist_df)
+
+    # --- Schedule Health (critical-path analysis) ---
+    with section("schedule_kpis"):
+        summary = schedule.project_summary(project_name).iloc[0]
+        critical_tasks = schedule.critical_path(project_name)
+    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+    kpi1.metric("Planned Finish", f"{summary['Planned Finish']:%Y-%m-%d}")
+    kpi2.metric("Projected Finish", f"{summary['Projected Finish']:%Y-%m-%d}",
+                delta=f"{summary['Slip (days)']:+d} days", delta_color="inverse")
+    kpi3.metric("Critical Tasks", int(summary['Critical Tasks']))
+    kpi4.metric("Open Tasks", int((checklist_df['Status'] != 'Complete').sum()))
+    if critical_tasks:
+        task_names = checklist_df.set_index('Task ID')['Task']
+        st.caption("**Critical path:** " + " → ".join(task_names[t] for t in critical_tasks))
+    st.divider()
+
+    # --- Upgraded Visualizations ---
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Project Health Funnel")
+        st.caption("Visualizing progress through the phase-gate process.")
+        with section("funnel:render"):
+            st.plotly_chart(fig_funnel, use_container_width=True)
+
+    with col2:
+        st.subheader("Detailed Project Gantt Chart")
+        st.caption("An interactive timeline of all project tasks and deliverables.")
+        with section("gantt:render"):
+            st.plotly_chart(fig_gantt, use_container_width=True)
+
+    st.divider()
+
+    # --- Detailed Deliverable Checklist ---
+    st.header("Detailed Deliverable & Task Status")
+    st.caption("A granular, auditable checklist of all required tasks for the selected project.")
+    table_columns = ['Task ID', 'Task', 'Phase', 'Lead Department', 'Status', 'Predecessors', 'Start', 'Finish',
+                     'Early Start', 'Early Finish', 'Total Float (days)', 'Critical']
+    with section("checklist_table"):
+        st.dataframe(
+            checklist_df[table_columns].style.apply(lambda x: x.map(style_status) if x.name == 'Status' else ['']*len(x), axis=1),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Start": st.column_config.DateColumn("Planned Start", format="YYYY-MM-DD"),
+                "Finish": st.column_config.DateColumn("Planned Finish", format="YYYY-MM-DD"),
+                "Early Start": st.column_config.DateColumn("Projected Start", format="YYYY-MM-DD"),
+                "Early Finish": st.column_config.DateColumn("Projected Finish", format="YYYY-MM-DD"),
+                "Critical": st.column_config.CheckboxColumn("Critical Path"),
+            }
+        )
+
+    render_what_if(project_name, schedule, checklist_df)
+
+# --- What-If Analysis (fragment: only the scenario reruns) ---
+@st.fragment
+@section("what_if")
+def render_what_if(project_name, schedule, checklist_df):
+    """Slips one open task on a copy of the schedule and shows the downstream impact (incremental CPM recompute)."""
+    st.subheader("What-If: Task Slip Impact")
+    open_tasks = checklist_df[checklist_df['Status'] != 'Complete']
+    if open_tasks.empty:
+        st.info("All tasks are complete.")
+        return
+    col_task, col_days = st.columns([3, 1])
+    task_id = col_task.selectbox("Task", open_tasks['Task ID'], format_func=lambda t: f"{t} – {open_tasks.set_index('Task ID').at[t, 'Task']}", key="what_if_task")
+    slip_days = col_days.number_input("Slip (days)", min_value=-60, max_value=180, value=14, step=1, key="what_if_slip")
+
+    task = open_tasks.set_index('Task ID').loc[task_id]
+    scenario = schedule.copy()
+    slip = pd.Timedelta(days=int(slip_days))
+    recomputed = scenario.update_task(project_name, task_id, start=task['Start'] + slip, finish=task['Finish'] + slip)
+    baseline = checklist_df.set_index('Task ID')['Early Finish']
+    moved = scenario.to_frame(project_name).set_index('Task ID')['Early Finish'] - baseline
+    moved = moved[moved != pd.Timedelta(0)]
+    projected = scenario.project_summary(project_name).iloc[0]['Projected Finish']
+    finish_change = (projected - baseline.max()).days
+
+    col_a, col_b = st.columns(2)
+    col_a.metric("Scenario Projected Finish", f"{projected:%Y-%m-%d}", delta=f"{finish_change:+d} days", delta_color="inverse")
+    col_b.metric("Tasks Moved", len(moved), help=f"{recomputed} tasks rescheduled incrementally.")
+    if not moved.empty:
+        st.caption("Shifted: " + ", ".join(f"{t} ({d.days:+d} d)" for t, d in moved.items()))
+
+render_project_status(transfer_projects)
 
 with st.container(border=True):
     st.header("Managerial Analysis & Action Plan")
     st.markdown("""
     - **High-Level Status:** The **Project Health Funnel** shows that we are through the initial planning and knowledge transfer phases, but now entering the more complex 'Facility Fit' phase. This is a known point of risk in any tech transfer.
     
-    - **Critical Path Identified:** The **Gantt Chart** and the detailed table immediately highlight the **'At Risk'** item: **Raw Material & Consumable Qualification**. Its long duration on the Gantt chart shows it is a critical path activity. A delay here will have a direct, cascading impact on the start of the Engineering and Validation batches.
+    - **Critical Path Identified:** The critical-path analysis shows that the **'At Risk'** item, **Raw Material & Consumable Qualification**, has zero float. PV batches cannot start until it is complete, so it drives the projected finish about a month past plan. Any further delay will cascade day for day into the Validation batches, the PV report and the Master Batch Record update.
     
     - **Leading Cross-Functional Action:** As the Senior Manager, my immediate action is to call a focused meeting with the leads of this task: **Validation, QC, and Supply Chain**. The purpose is not to assign blame, but to understand the specific blockers (e.g., supplier lead time, QC lab capacity, unexpected test results) and to use my authority to remove those roadblocks.
     
     - **Strategic Coordination:** I will use this data to clearly communicate the project status to our leadership and to the receiving manufacturing site. We must be transparent about the potential timeline impact and the mitigation plan we are putting in place. This is a core function of my role in coordinating these complex projects.
     """)
+
+render_debug_panel()
@@ -2,13 +2,15 @@
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 from datetime import date
+from data_access import get_date_index, get_travel_plan_data, get_vendor_list_data
+from profiling import render_debug_panel, section, start_page
 
 st.set_page_config(
     page_title="Travel & Vendor Mgmt | Grifols",
     layout="wide"
 )
+start_page("Travel_Vendor_Management")
 
 st.title("✈️ Travel & Vendor Management Hub")
 st.markdown("### Planning and tracking essential on-site travel and managing key vendor relationships.")
@@ -23,59 +25,55 @@ with st.expander("🌐 My Role as Manager: On-Site Oversight and Partnership", e
     - **Cross-Functional Visibility:** It provides visibility to my leadership and cross-functional partners on my engagement with external sites, reinforcing our commitment to strong partnerships.
     """)
 
-# --- Mock Data Generation ---
-def generate_travel_plan_data():
-    data = {
-        'Trip ID': ['TVL-24-005', 'TVL-24-006', 'TVL-24-007'],
-        'Lead Traveler': ['David L.', 'Sr. Manager', 'Anna K.'],
-        'Destination': ['Grifols - Clayton, NC', 'Supplier HQ - Germany', 'Grifols - Emeryville, CA'],
-        'Purpose': ['Person-in-plant for PV Batch #1', 'Key Supplier Audit & QBR', 'Tech Transfer Kick-off Meeting'],
-        'Project': ['New Antigen Tech Transfer', 'All', 'New Reagent Development'],
-        'Status': ['Complete', 'Planned', 'Planned'],
-        'Dates': ['2024-08-12 to 2024-08-16', '2024-10-21 to 2024-10-25', '2024-11-04 to 2024-11-05']
-    }
-    return pd.DataFrame(data)
-
-def generate_vendor_list_data():
-    data = {
-        'Vendor Name': ['Pharma-Validate Inc.', 'Bio-Assay Labs', 'GMP Consumables Co.'],
-        'Service / Product': ['Validation Protocol Authoring', 'External Potency Testing', 'Sterile Vials & Stoppers'],
-        'Status': ['Active MSA', 'Active MSA', 'Approved Supplier'],
-        'Last Audit Date': [pd.to_datetime('2023-11-15'), pd.to_datetime('2024-02-20'), pd.to_datetime('2023-09-01')],
-        'Notes': ['Primary partner for protocol writing support.', 'Used for release testing of development lots.', 'Sole supplier for DG Gel Card vials - High Risk.']
-    }
-    return pd.DataFrame(data)
-
-travel_df = generate_travel_plan_data()
-vendor_df = generate_vendor_list_data()
+# --- Data Loading ---
+with section("load_data"):
+    travel_df = get_travel_plan_data()
+    vendor_df = get_vendor_list_data()
 
 
 # --- Travel Plan Section ---
 st.header("Departmental Travel Plan & History")
 st.caption("A log of all planned and completed travel to Grifols sites and external vendors.")
 
-st.dataframe(
-    travel_df,
-    use_container_width=True,
-    hide_index=True,
-    column_config={
-        "Dates": st.column_config.TextColumn("Planned Dates")
-    }
-)
+span = (travel_df['Start Date'].min().date(), travel_df['End Date'].max().date())
+window = st.slider("Trips between", min_value=span[0], max_value=span[1], value=span, format="YYYY-MM-DD", key="travel_window")
+
+# Window and "away today" lookups use the shared interval index over trip dates.
+with section("travel_window"):
+    travel_index = get_date_index('travel', 'Start Date', 'End Date')
+    trips_in_window = travel_df.loc[travel_index.overlapping(window[0], window[1])]
+    away_today = travel_df.loc[travel_index.active_on(pd.Timestamp(date.today())), 'Lead Traveler']
+
+col1, col2, col3 = st.columns(3)
+col1.metric("Trips in Window", len(trips_in_window))
+col2.metric("Planned Trips in Window", int((trips_in_window['Status'] == 'Planned').sum()))
+col3.metric("Travelers Away Today", len(away_today), help=", ".join(away_today) or None)
+
+with section("travel_table"):
+    st.dataframe(
+        trips_in_window,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Start Date": st.column_config.DateColumn("Departs", format="YYYY-MM-DD"),
+            "End Date": st.column_config.DateColumn("Returns", format="YYYY-MM-DD")
+        }
+    )
 
 # --- Vendor Management Section ---
 st.divider()
 st.header("Key Vendor & Supplier Management")
 st.caption("A list of critical vendors for services and materials, including their status and key notes.")
 
-st.dataframe(
-    vendor_df,
-    use_container_width=True,
-    hide_index=True,
-    column_config={
-        "Last Audit Date": st.column_config.DateColumn("Last Audit", format="YYYY-MM-DD")
-    }
-)
+with section("vendor_table"):
+    st.dataframe(
+        vendor_df,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Last Audit Date": st.column_config.DateColumn("Last Audit", format="YYYY-MM-DD")
+        }
+    )
 
 with st.expander("📝 My Role as Manager: Strategic Use of This Data"):
     st.markdown("""
@@ -89,3 +87,5 @@ with st.expander("📝 My Role as Manager: Strategic Use of This Data"):
 
     4.  **Budgeting:** The planned trips and active vendor services are tangible items with real costs. I use this information to build an accurate forecast for the 'Travel' and 'External Testing/Consulting' categories in my **Budget Tracker**, ensuring there are no financial surprises.
     """)
+
+render_debug_panel()
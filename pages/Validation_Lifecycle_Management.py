@@ -3,13 +3,17 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from datetime import date, datetime
-from utils import generate_revalidation_data
+from datetime import date
+from data_access import get_date_index, get_high_risk_count, get_revalidation_data, get_status_counts
+from theme import apply_plotly_theme
+from profiling import render_debug_panel, section, start_page
 
 st.set_page_config(
     page_title="Validation Lifecycle Mgmt | Grifols",
     layout="wide"
 )
+apply_plotly_theme()
+start_page("Validation_Lifecycle_Management")
 
 st.title("🔄 Validation Lifecycle Management Dashboard")
 st.markdown("### Overseeing the revalidation and requalification schedule for all validated processes and equipment to ensure continuous compliance.")
@@ -24,22 +28,30 @@ with st.expander("🌐 My Role as Manager: Ensuring Ongoing Compliance", expande
     """)
 
 # --- Data Generation and Correction ---
-revalidation_df = generate_revalidation_data()
+@section("load_data")
+def load_revalidation_data():
+    """Loads the revalidation register (shared cache) with date columns as pandas datetimes."""
+    df = get_revalidation_data()
+    # FIX: Ensure date columns are in the correct pandas datetime format before any operations
+    df['Last Validation Date'] = pd.to_datetime(df['Last Validation Date'])
+    df['Next Assessment Due'] = pd.to_datetime(df['Next Assessment Due'])
+    return df
 
-# FIX: Ensure date columns are in the correct pandas datetime format before any operations
-revalidation_df['Last Validation Date'] = pd.to_datetime(revalidation_df['Last Validation Date'])
-revalidation_df['Next Assessment Due'] = pd.to_datetime(revalidation_df['Next Assessment Due'])
+revalidation_df = load_revalidation_data()
 
 
-# --- KPIs for Lifecycle Management ---
+# --- KPIs for Lifecycle Management (counted in the database) ---
 st.header("Program Compliance Status")
-total_packages = len(revalidation_df)
-due_for_reval = revalidation_df[revalidation_df['Status'] == 'Due'].shape[0]
-high_risk_due = revalidation_df[(revalidation_df['Status'] == 'Due') & (revalidation_df['Risk Score'] >= 8)].shape[0]
-due_next_90_days = revalidation_df[
-    (revalidation_df['Next Assessment Due'] > pd.to_datetime(date.today())) &
-    (revalidation_df['Next Assessment Due'] < pd.to_datetime(date.today()) + pd.DateOffset(days=90))
-].shape[0]
+with section("kpis"):
+    status_counts = get_status_counts('revalidation')
+    total_packages = int(status_counts.sum())
+    due_for_reval = int(status_counts.get('Due', 0))
+    high_risk_due = get_high_risk_count('revalidation', 8, status='Due')
+    # Date-window lookups use the shared interval index over the due dates instead of scanning rows.
+    due_index = get_date_index('revalidation', 'Next Assessment Due')
+    today = pd.Timestamp(date.today())
+    due_next_90_days = due_index.count_overlapping(today + pd.Timedelta(days=1), today + pd.Timedelta(days=89))
+    due_soon = set(due_index.overlapping(None, today + pd.Timedelta(days=89)))
 
 col1, col2, col3, col4 = st.columns(4)
 col1.metric("Total Validated Systems", total_packages)
@@ -58,38 +70,51 @@ def highlight_status(row):
     style = ''
     if row['Status'] == 'Due':
         style = 'background-color: #F8D7DA; color: #721C24'
-    elif (row['Next Assessment Due'] - pd.to_datetime(date.today())).days < 90:
+    elif row.name in due_soon:
         style = 'background-color: #FFF3CD'
     return [style] * len(row)
 
 # FIX: The buggy tz_localize lines that caused the error have been removed,
 # as the columns are now correctly formatted as timezone-naive datetimes above.
 
-# Use st.data_editor to get selected rows
-selection = st.data_editor(
-    revalidation_df.style.apply(highlight_status, axis=1),
-    hide_index=True,
-    use_container_width=True,
-    column_config={
-        "Risk Score": st.column_config.ProgressColumn(
-            "Risk Score", help="Risk score based on complexity and impact (higher is more critical)",
-            min_value=0, max_value=10, format="%d 🔥"
-        ),
-        "Last Validation Date": st.column_config.DateColumn("Last Validation", format="YYYY-MM-DD"),
-        "Next Assessment Due": st.column_config.DateColumn("Next Due Date", format="YYYY-MM-DD"),
-    },
-    key="selection_table"
-)
-
-st.divider()
-
-# --- Detailed Drill-Down View ---
-st.header("Detailed System View")
-
-# Check if a row is selected
-if len(selection) > 0:
-    # Get the data for the first selected row
-    selected_system_data = pd.DataFrame(selection).iloc[0]
+# --- Master List & Drill-Down (fragment: row selection reruns only this block) ---
+@st.fragment
+@section("master_list")
+def render_master_list(revalidation_df):
+    """Renders the selectable master list and the drill-down view for the selected system."""
+    event = st.dataframe(
+        revalidation_df.style.apply(highlight_status, axis=1),
+        hide_index=True,
+        use_container_width=True,
+        column_config={
+            "Risk Score": st.column_config.ProgressColumn(
+                "Risk Score", help="Risk score based on complexity and impact (higher is more critical)",
+                min_value=0, max_value=10, format="%d 🔥"
+            ),
+            "Last Validation Date": st.column_config.DateColumn("Last Validation", format="YYYY-MM-DD"),
+            "Next Assessment Due": st.column_config.DateColumn("Next Due Date", format="YYYY-MM-DD"),
+        },
+        on_select="rerun",
+        selection_mode="single-row",
+        key="selection_table"
+    )
+
+    st.divider()
+
+    # --- Detailed Drill-Down View ---
+    st.header("Detailed System View")
+
+    # Check if a row is selected
+    selected_rows = event.selection.rows
+    if selected_rows:
+        selected_system_data = revalidation_df.iloc[selected_rows[0]]
+        render_system_detail(selected_system_data)
+    else:
+        st.info("Select a row from the master list above to see a detailed drill-down view.")
+
+@section("system_detail")
+def render_system_detail(selected_system_data):
+    """Renders key information and the validation/change history for one system."""
     st.subheader(f"System: **{selected_system_data['Process/System']}**")
 
     # Mock data for the selected system's history
@@ -125,10 +150,10 @@ if len(selection) > 0:
         )
         fig_hist.update_traces(marker_size=15)
         fig_hist.update_layout(yaxis_title=None)
-        st.plotly_chart(fig_hist, use_container_width=True)
+        with section("history:render"):
+            st.plotly_chart(fig_hist, use_container_width=True)
 
-else:
-    st.info("Select a row from the master list above to see a detailed drill-down view.")
+render_master_list(revalidation_df)
 
 with st.expander("📝 My Role as Manager: Taking Action on This Data", expanded=True):
     st.markdown("""
@@ -139,3 +164,5 @@ with st.expander("📝 My Role as Manager: Taking Action on This Data", expanded
     3.  **Justifying Budgets:** The upcoming revalidations, especially for high-complexity systems, require significant financial resources. This dashboard provides the clear, data-driven justification I need when I "manage and set department budgets" for the next fiscal year.
     4.  **Leading Technical Discussions:** In a cross-functional meeting, I can use the "Detailed System View" to walk QA, MTS, and Manufacturing through the validation history of a specific process, providing context for the upcoming revalidation and ensuring alignment on the project scope. This showcases my ability to "lead discussions of data with peers."
     """)
+
+render_debug_panel()
@@ -0,0 +1,88 @@
+# portfolio_timeline.py
+
+import numpy as np
+import pandas as pd
+
+MAX_DETAIL_BARS = 150       # individual project bars drawn at most; wider windows fall back to lanes
+STATUS_COLORS = {
+    'In Progress': '#007A33', 'At Risk': '#DA291C', 'On Hold': '#6C6F70',
+    'Complete - On Time': '#0033A0', 'Not Started': '#9BA3A8',
+}
+# Lane blocks are coloured by their worst project status, in this order of severity.
+STATUS_SEVERITY = ['At Risk', 'On Hold', 'In Progress', 'Not Started', 'Complete - On Time']
+
+# --- Lane Aggregation (coarse zoom) ---
+def lead_lanes(portfolio_df):
+    """Merges each lead's overlapping projects into busy blocks with project counts and the worst status.
+
+    Projects are sorted by start within each lead; a new block begins where a start falls
+    after the running maximum end of the lead's earlier projects. One row per block.
+    """
+    df = portfolio_df.sort_values(['Project Lead', 'Start Date'])
+    running_end = df.groupby('Project Lead')['End Date'].cummax()
+    previous_end = running_end.groupby(df['Project Lead']).shift()
+    block = (previous_end.isna() | (df['Start Date'] > previous_end)).cumsum()
+    severity = pd.Categorical(df['Status'], categories=STATUS_SEVERITY, ordered=True).codes
+    severity = np.where(severity < 0, len(STATUS_SEVERITY), severity)
+    lanes = df.assign(Block=block.to_numpy(), Severity=severity, Flagged=df['Status'] == 'At Risk').groupby('Block').agg(**{
+        'Project Lead': ('Project Lead', 'first'),
+        'Start Date': ('Start Date', 'min'),
+        'End Date': ('End Date', 'max'),
+        'Projects': ('Project Name', 'size'),
+        'At Risk': ('Flagged', 'sum'),
+        'Severity': ('Severity', 'min'),
+    })
+    statuses = np.array(STATUS_SEVERITY + ['Other'])
+    lanes['Worst Status'] = statuses[lanes.pop('Severity').to_numpy()]
+    return lanes.reset_index(drop=True)
+
+# --- Figures ---
+def _duration_ms(start, end):
+    return (pd.to_datetime(end) - pd.to_datetime(start)).dt.total_seconds().to_numpy() * 1000
+
+def lanes_figure(lanes):
+    """One horizontal lane per lead; each bar is a busy block labelled with its project count."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(
+        base=lanes['Start Date'],
+        x=_duration_ms(lanes['Start Date'], lanes['End Date']),
+        y=lanes['Project Lead'],
+        orientation='h',
+        marker_color=[STATUS_COLORS.get(s, '#9BA3A8') for s in lanes['Worst Status']],
+        text=lanes['Projects'].astype(str) + ' proj.',
+        textposition='inside',
+        customdata=lanes[['End Date', 'Projects', 'At Risk', 'Worst Status']],
+        hovertemplate=("<b>%{y}</b><br>%{base|%Y-%m-%d} → %{customdata[0]|%Y-%m-%d}<br>Projects: %{customdata[1]}<br>"
+                       "At Risk: %{customdata[2]}<br>Worst Status: %{customdata[3]}<extra></extra>"),
+    ))
+    fig.update_xaxes(type='date')
+    fig.update_yaxes(autorange='reversed')
+    fig.update_layout(title="Project Load by Lead (busy blocks)", height=max(300, 60 * lanes['Project Lead'].nunique() + 120),
+                      showlegend=False, bargap=0.3)
+    return fig
+
+def detail_figure(projects):
+    """Individual project bars grouped under their lead, coloured by status (one trace, so lead order is kept)."""
+    import plotly.graph_objects as go
+
+    projects = projects.sort_values(['Project Lead', 'Start Date'])
+    fig = go.Figure(go.Bar(
+        base=projects['Start Date'],
+        x=_duration_ms(projects['Start Date'], projects['End Date']),
+        y=[projects['Project Lead'], projects['Project Name']],
+        orientation='h',
+        marker_color=projects['Status'].map(STATUS_COLORS).fillna('#9BA3A8'),
+        customdata=projects[['Project Name', 'End Date', 'Status']],
+        hovertemplate="<b>%{customdata[0]}</b><br>%{base|%Y-%m-%d} → %{customdata[1]|%Y-%m-%d}<br>%{customdata[2]}<extra></extra>",
+        showlegend=False,
+    ))
+    # Legend-only entries for the statuses present.
+    for status in projects['Status'].unique():
+        fig.add_trace(go.Bar(x=[None], y=[[None], [None]], orientation='h', name=status,
+                             marker_color=STATUS_COLORS.get(status, '#9BA3A8')))
+    fig.update_xaxes(type='date')
+    fig.update_yaxes(autorange='reversed')
+    fig.update_layout(title="Active Projects by Lead Engineer", barmode='overlay',
+                      height=max(300, 28 * len(projects) + 150), legend_title_text='Status')
+    return fig
@@ -0,0 +1,213 @@
+# profiling.py
+
+import contextlib
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+import weakref
+from datetime import datetime
+
+PROFILE_ENV = 'GRIFOLS_PROFILE'
+PROFILE_LOG_PATH = os.environ.get(
+    'GRIFOLS_PROFILE_LOG', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'profile.jsonl')
+)
+
+# --- Per-Rerun State ---
+# Each Streamlit rerun executes in its own script thread, so the current run lives in a thread-local.
+_state = threading.local()
+_log_lock = threading.Lock()
+
+# tracemalloc is process-wide: it runs while at least one profiled rerun is open and is
+# stopped when the last one finishes (unless something else had already started it).
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+_tracing_owned = False
+
+def _acquire_tracing():
+    global _tracing_runs, _tracing_owned
+    with _tracing_lock:
+        if _tracing_runs == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_runs += 1
+
+def _release_tracing():
+    global _tracing_runs, _tracing_owned
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+class _RunToken:
+    """Lives in the rerun's thread-local; if the script thread ends without finish_page, collecting it releases tracing."""
+
+def profiling_requested():
+    """Profiling is opt-in: GRIFOLS_PROFILE=1 in the environment or ?profile=1 in the page URL."""
+    if os.environ.get(PROFILE_ENV, '') not in ('', '0'):
+        return True
+    try:
+        import streamlit as st
+        return st.query_params.get('profile') == '1'
+    except Exception:
+        return False
+
+def start_page(page, enabled=None):
+    """Starts a new profiled run for `page`; sections recorded afterwards belong to this rerun."""
+    finish_page()
+    _state.enabled = profiling_requested() if enabled is None else enabled
+    _state.page = page
+    _state.run_id = uuid.uuid4().hex[:12]
+    _state.started = time.perf_counter()
+    _state.records = []
+    _state.stack = []
+    _state.fragment = None
+    if _state.enabled:
+        _acquire_tracing()
+        _state.token = _RunToken()
+        _state.release = weakref.finalize(_state.token, _release_tracing)
+
+def finish_page():
+    """Ends the current profiled run; tracemalloc stops once no other profiled rerun is open."""
+    release = getattr(_state, 'release', None)
+    if release is not None:
+        release()
+    _state.release = _state.token = None
+    _state.enabled = False
+
+def is_enabled():
+    """Whether the current rerun is being profiled."""
+    return getattr(_state, 'enabled', False)
+
+def current_records():
+    """Section records of the current rerun, in completion order."""
+    return list(getattr(_state, 'records', []))
+
+def _append_log(record):
+    directory = os.path.dirname(PROFILE_LOG_PATH)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with _log_lock, open(PROFILE_LOG_PATH, 'a', encoding='utf-8') as handle:
+        handle.write(json.dumps(record) + '\n')
+
+class section(contextlib.ContextDecorator):
+    """Records wall time and memory of a named block, as a context manager or a decorator.
+
+    Nested sections form a path (e.g. 'risk_matrix/risk_agg'). Memory is the net
+    allocation and the peak traced by tracemalloc while the block ran. When profiling
+    is off, entering and leaving a section only checks a flag.
+
+    A fragment-only rerun runs in a fresh script thread without start_page. There, the
+    outermost section opens its own profiled run, logged with the page 'fragment:<name>',
+    and finishes it on exit, so fragments must be decorated with a section for all of
+    their inner sections to be recorded.
+
+    tracemalloc counts allocations process-wide and reset_peak() is global. Memory
+    figures are only meaningful when a single session is being profiled; concurrent
+    profiled sessions add to (and reset) each other's numbers. Wall times are unaffected.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def _recreate_cm(self):
+        # A fresh instance per decorated call keeps concurrent and recursive calls independent.
+        return section(self.name)
+
+    def __enter__(self):
+        if not hasattr(_state, 'run_id'):
+            start_page(f"fragment:{self.name}")
+            _state.fragment = self
+        self._active = is_enabled()
+        if not self._active:
+            return self
+        stack = _state.stack
+        if stack:
+            # Fold the parent's peak so far into its running max before the child resets it.
+            stack[-1]['peak'] = max(stack[-1]['peak'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        stack.append({'name': self.name, 'start': time.perf_counter(), 'memory': current, 'peak': current})
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if not self._active:
+            return False
+        ended = time.perf_counter()
+        current, peak = tracemalloc.get_traced_memory()
+        stack = _state.stack
+        frame = stack.pop()
+        peak = max(frame['peak'], peak)
+        if stack:
+            stack[-1]['peak'] = max(stack[-1]['peak'], peak)
+        record = {
+            'timestamp': datetime.now().isoformat(timespec='milliseconds'),
+            'run_id': _state.run_id,
+            'page': _state.page,
+            'section': self.name,
+            'path': '/'.join([f['name'] for f in stack] + [self.name]),
+            'depth': len(stack),
+            'start_ms': round((frame['start'] - _state.started) * 1000, 3),
+            'wall_ms': round((ended - frame['start']) * 1000, 3),
+            'alloc_kb': round((current - frame['memory']) / 1024, 1),
+            'peak_kb': round((peak - frame['memory']) / 1024, 1),
+            'error': exc_type.__name__ if exc_type else None,
+        }
+        _state.records.append(record)
+        try:
+            _append_log(record)
+        except OSError:
+            pass
+        if _state.fragment is self:
+            finish_page()
+        return False
+
+# --- Debug Panel ---
+def flame_figure(records):
+    """Flame-style chart of a rerun: one bar per section from its start offset, stacked by nesting depth."""
+    import plotly.graph_objects as go
+
+    fig = go.Figure(go.Bar(
+        base=[r['start_ms'] for r in records],
+        x=[max(r['wall_ms'], 0.01) for r in records],
+        y=[r['depth'] for r in records],
+        orientation='h',
+        text=[r['section'] for r in records],
+        textposition='inside',
+        insidetextanchor='start',
+        customdata=[[r['path'], r['wall_ms'], r['peak_kb']] for r in records],
+        hovertemplate="<b>%{customdata[0]}</b><br>Wall: %{customdata[1]:.1f} ms<br>Peak: %{customdata[2]:,.0f} KB<extra></extra>",
+        marker=dict(color=[r['wall_ms'] for r in records], colorscale='YlOrRd'),
+    ))
+    fig.update_layout(
+        height=120 + 40 * (max((r['depth'] for r in records), default=0) + 1),
+        margin=dict(t=10, b=30, l=10, r=10),
+        bargap=0.05,
+        xaxis_title="Time since page start (ms)",
+        yaxis=dict(autorange='reversed', title='Depth', dtick=1),
+    )
+    return fig
+
+def render_debug_panel():
+    """Shows the current rerun's section breakdown in a sidebar expander (only when profiling is enabled)."""
+    if not is_enabled():
+        return
+    import pandas as pd
+    import streamlit as st
+
+    records = current_records()
+    total = (time.perf_counter() - _state.started) * 1000
+    finish_page()
+    with st.sidebar.expander(f"Render Profile ({_state.page})", expanded=False):
+        if not records:
+            st.caption("No sections recorded in this rerun.")
+            return
+        st.caption(f"Run {_state.run_id} · {total:.0f} ms · log: {PROFILE_LOG_PATH}")
+        st.caption("Fragment-only reruns do not refresh this panel; they are logged as 'fragment:<name>' runs. "
+                   "Memory is traced process-wide, so alloc/peak figures are only valid while a single session is profiled.")
+        st.plotly_chart(flame_figure(records), use_container_width=True)
+        table = pd.DataFrame(records)[['path', 'wall_ms', 'alloc_kb', 'peak_kb']]
+        st.dataframe(table.sort_values('wall_ms', ascending=False), hide_index=True, use_container_width=True)
@@ -0,0 +1,249 @@
+# repository.py
+
+import os
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import date
+
+import pandas as pd
+
+import utils
+
+DEFAULT_DB_PATH = os.environ.get(
+    'GRIFOLS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'grifols.db')
+)
+SCHEMA_VERSION = 4
+
+# --- Schema ---
+# Table -> (column, SQL type). DATE/TIMESTAMP columns are stored as ISO text and parsed back on read.
+SCHEMA = {
+    'portfolio': [
+        ('Project Name', 'TEXT PRIMARY KEY'), ('Project Type', 'TEXT'), ('Product Line', 'TEXT'), ('Project Lead', 'TEXT'),
+        ('Status', 'TEXT'), ('Allocation (%)', 'REAL'), ('Start Date', 'TIMESTAMP'), ('End Date', 'TIMESTAMP'),
+        ('Target Completion', 'TIMESTAMP'),
+    ],
+    'risks': [
+        ('Risk ID', 'TEXT PRIMARY KEY'), ('Project', 'TEXT'), ('Risk Description', 'TEXT'), ('Impact', 'INTEGER'),
+        ('Probability', 'INTEGER'), ('Owner', 'TEXT'), ('Status', 'TEXT'), ('Risk Score', 'INTEGER'),
+    ],
+    'revalidation': [
+        ('Process/System', 'TEXT'), ('Validation Package ID', 'TEXT PRIMARY KEY'), ('Last Validation Date', 'DATE'),
+        ('Revalidation Interval (Years)', 'INTEGER'), ('Status', 'TEXT'), ('Risk Score', 'INTEGER'),
+        ('Complexity', 'TEXT'), ('Next Assessment Due', 'TIMESTAMP'),
+    ],
+    'cpv_batches': [('Batch ID', 'TEXT PRIMARY KEY'), ('Final Potency (%)', 'REAL'), ('Fill Volume (mL)', 'REAL')],
+    'pv_results': [('Batch', 'TEXT'), ('Parameter', 'TEXT'), ('Value', 'REAL'), ('Spec', 'TEXT'), ('Result', 'TEXT')],
+    'budget': [
+        ('Category', 'TEXT PRIMARY KEY'), ('FY Budget ($K)', 'REAL'), ('Actuals YTD ($K)', 'REAL'),
+        ('Variance ($K)', 'REAL'), ('% Spent', 'REAL'),
+    ],
+    'staff': [
+        ('Team Member', 'TEXT PRIMARY KEY'), ('Role', 'TEXT'), ('Q3 Goals Completed (%)', 'REAL'),
+        ('Required Training Complete (%)', 'REAL'), ('Performance Review Status', 'TEXT'), ('Development Goal', 'TEXT'),
+    ],
+    'improvements': [
+        ('Initiative ID', 'TEXT PRIMARY KEY'), ('Initiative Name', 'TEXT'), ('Lead', 'TEXT'), ('Improvement Type', 'TEXT'),
+        ('Business Driver', 'TEXT'), ('Status', 'TEXT'), ('Progress (%)', 'REAL'), ('Impact', 'TEXT'), ('Effort', 'TEXT'),
+        ('Budget ($K)', 'REAL'), ('Target Completion', 'TIMESTAMP'),
+    ],
+    'tech_transfer_tasks': [
+        ('Project', 'TEXT'), ('Task ID', 'TEXT'), ('Task', 'TEXT'), ('Start', 'TIMESTAMP'), ('Finish', 'TIMESTAMP'),
+        ('Phase', 'TEXT'), ('Lead Department', 'TEXT'), ('Status', 'TEXT'), ('Predecessors', 'TEXT'),
+    ],
+    'audit_findings': [('Finding Source', 'TEXT PRIMARY KEY'), ('Count', 'INTEGER')],
+    'key_documents': [
+        ('Document ID', 'TEXT PRIMARY KEY'), ('Document Title', 'TEXT'), ('Status', 'TEXT'), ('Last Review', 'DATE'),
+    ],
+    'travel': [
+        ('Trip ID', 'TEXT PRIMARY KEY'), ('Lead Traveler', 'TEXT'), ('Destination', 'TEXT'), ('Purpose', 'TEXT'),
+        ('Project', 'TEXT'), ('Status', 'TEXT'), ('Start Date', 'DATE'), ('End Date', 'DATE'),
+    ],
+    'vendors': [
+        ('Vendor Name', 'TEXT PRIMARY KEY'), ('Service / Product', 'TEXT'), ('Status', 'TEXT'),
+        ('Last Audit Date', 'TIMESTAMP'), ('Notes', 'TEXT'),
+    ],
+}
+INDEXES = {
+    'portfolio': ['Status', 'Start Date'], 'risks': ['Risk Score', 'Impact'], 'revalidation': ['Status', 'Next Assessment Due'],
+    'tech_transfer_tasks': ['Project'], 'improvements': ['Status'],
+}
+# Seed sources for an empty database (the former in-code mock generators).
+SEED_SOURCES = {
+    'portfolio': utils.generate_validation_portfolio_data, 'risks': utils.generate_program_risk_data,
+    'revalidation': utils.generate_revalidation_data, 'cpv_batches': utils.generate_cpv_data,
+    'pv_results': utils.generate_pv_data, 'budget': utils.generate_budget_data,
+    'staff': utils.generate_staff_performance_data, 'improvements': utils.generate_improvement_data,
+    'tech_transfer_tasks': utils.generate_tech_transfer_checklist_data, 'audit_findings': utils.generate_audit_findings_data,
+    'key_documents': utils.generate_key_documents_data, 'travel': utils.generate_travel_plan_data,
+    'vendors': utils.generate_vendor_list_data,
+}
+
+# Columns made unique when the seed data is replicated (GRIFOLS_DATA_SCALE > 1).
+SCALE_KEYS = {
+    'portfolio': ['Project Name'], 'risks': ['Risk ID'], 'revalidation': ['Process/System', 'Validation Package ID'],
+    'cpv_batches': ['Batch ID'], 'pv_results': ['Batch'], 'budget': ['Category'], 'staff': ['Team Member'],
+    'improvements': ['Initiative ID'], 'tech_transfer_tasks': ['Project'], 'audit_findings': ['Finding Source'],
+    'key_documents': ['Document ID'], 'travel': ['Trip ID'], 'vendors': ['Vendor Name'],
+}
+
+def quote(identifier):
+    """Quotes a column or table name for SQL (names contain spaces, %, $ and parentheses)."""
+    return '"' + str(identifier).replace('"', '""') + '"'
+
+# --- Repository Interface ---
+class Repository(ABC):
+    """Backend-agnostic access to program data. Filters and aggregations are pushed into the backend."""
+
+    @abstractmethod
+    def table(self, name, columns=None, where=None, params=(), order_by=None, limit=None):
+        """Returns rows of a table as a DataFrame, optionally filtered by a parameterized `where` clause."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def count(self, name, where=None, params=()):
+        """Returns the number of rows matching a parameterized `where` clause."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def status_counts(self, name, column='Status', where=None, params=()):
+        """Returns row counts per value of `column` as a Series."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def due_within(self, name, date_column, days, as_of=None, columns=None):
+        """Returns rows whose `date_column` falls after `as_of` and within `days` days of it."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def bulk_insert(self, name, df):
+        """Inserts all rows of `df` into a table in one batched statement."""
+        raise NotImplementedError
+
+# --- SQLite Implementation ---
+class SQLiteRepository(Repository):
+    """SQLite-backed repository with a small pool of connections shared across sessions and threads.
+
+    The database is created on first use and seeded from the mock generators when empty,
+    replicated `scale` times; a schema-version mismatch rebuilds it. Reads run in WAL mode so concurrent sessions do
+    not block each other.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH, pool_size=4, scale=utils.DATA_SCALE):
+        self.path = path
+        self.pool_size = pool_size
+        self.scale = scale
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._initialize()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False, detect_types=0)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrows a pooled connection (opening a new one while the pool is below its size)."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._created < self.pool_size
+                self._created += can_open
+            conn = self._connect() if can_open else self._pool.get()
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def _initialize(self):
+        with self.connection() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version != SCHEMA_VERSION:
+                with conn:
+                    for name in SCHEMA:
+                        conn.execute(f'DROP TABLE IF EXISTS {quote(name)}')
+            with conn:
+                for name, columns in SCHEMA.items():
+                    column_sql = ', '.join(f'{quote(c)} {t}' for c, t in columns)
+                    conn.execute(f'CREATE TABLE IF NOT EXISTS {quote(name)} ({column_sql})')
+                    for column in INDEXES.get(name, []):
+                        conn.execute(f'CREATE INDEX IF NOT EXISTS {quote(f"ix_{name}_{column}")} ON {quote(name)} ({quote(column)})')
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        for name, source in SEED_SOURCES.items():
+            if self.count(name) == 0:
+                self.bulk_insert(name, utils.scale_dataset(source(), self.scale, SCALE_KEYS[name]))
+
+    def _parse(self, name, df):
+        types = dict(SCHEMA[name])
+        for column in df.columns:
+            if types.get(column) in ('DATE', 'TIMESTAMP'):
+                df[column] = pd.to_datetime(df[column])
+        return df
+
+    def query(self, sql, params=()):
+        """Runs a parameterized SELECT and returns the result as a DataFrame."""
+        with self.connection() as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def table(self, name, columns=None, where=None, params=(), order_by=None, limit=None):
+        select = ', '.join(quote(c) for c in columns) if columns else '*'
+        sql = f'SELECT {select} FROM {quote(name)}'
+        if where:
+            sql += f' WHERE {where}'
+        if order_by:
+            sql += ' ORDER BY ' + ', '.join(quote(c[1:]) + ' DESC' if c.startswith('-') else quote(c) for c in order_by)
+        if limit is not None:
+            sql += f' LIMIT {int(limit)}'
+        return self._parse(name, self.query(sql, params))
+
+    def count(self, name, where=None, params=()):
+        sql = f'SELECT COUNT(*) FROM {quote(name)}' + (f' WHERE {where}' if where else '')
+        with self.connection() as conn:
+            return conn.execute(sql, params).fetchone()[0]
+
+    def status_counts(self, name, column='Status', where=None, params=()):
+        sql = (f'SELECT {quote(column)} AS value, COUNT(*) AS n FROM {quote(name)}'
+               + (f' WHERE {where}' if where else '') + f' GROUP BY {quote(column)}')
+        result = self.query(sql, params)
+        return pd.Series(result['n'].to_numpy(), index=pd.Index(result['value'], name=column), name='Count')
+
+    def due_within(self, name, date_column, days, as_of=None, columns=None):
+        as_of = pd.Timestamp(as_of or date.today())
+        where = f'{quote(date_column)} > ? AND {quote(date_column)} < ?'
+        params = (as_of.isoformat(sep=' '), (as_of + pd.DateOffset(days=days)).isoformat(sep=' '))
+        return self.table(name, columns=columns, where=where, params=params, order_by=[date_column])
+
+    def bulk_insert(self, name, df):
+        columns = [c for c, _ in SCHEMA[name] if c in df.columns]
+        types = dict(SCHEMA[name])
+        values = df[columns].copy()
+        for column in columns:
+            if types[column] in ('DATE', 'TIMESTAMP'):
+                # ISO text keeps lexicographic order equal to chronological order for range filters.
+                values[column] = pd.to_datetime(values[column]).dt.strftime('%Y-%m-%d %H:%M:%S')
+        placeholders = ', '.join('?' for _ in columns)
+        sql = f'INSERT INTO {quote(name)} ({", ".join(quote(c) for c in columns)}) VALUES ({placeholders})'
+        rows = [tuple(None if pd.isna(v) else v.item() if hasattr(v, 'item') else v for v in row)
+                for row in values.itertuples(index=False, name=None)]
+        with self.connection() as conn, conn:
+            conn.executemany(sql, rows)
+        return len(rows)
+
+_repository = None
+_repository_lock = threading.Lock()
+
+def get_repository():
+    """Returns the process-wide repository (SQLite at GRIFOLS_DB_PATH)."""
+    global _repository
+    with _repository_lock:
+        if _repository is None:
+            _repository = SQLiteRepository()
+        return _repository
@@ -0,0 +1,86 @@
+# resource_loading.py
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_ALLOCATION = 100.0      # assignments without an allocation count as full-time
+OVER_ALLOCATION_THRESHOLD = 100.0
+ONE_DAY = pd.Timedelta(days=1)
+
+# --- Sweep Line ---
+def load_segments(assignments, person='Project Lead', start='Start Date', end='End Date', allocation='Allocation (%)'):
+    """Piecewise-constant load per person from assignment intervals, built in one sorted sweep.
+
+    Every assignment contributes +allocation on its start day and -allocation the day after
+    its (inclusive) end. Sorting the events per person and taking running sums gives each
+    person's load between consecutive event dates. Returns one row per segment with
+    non-zero load: Person, Start, End (inclusive), Load (%) and the number of active Projects.
+    """
+    if allocation in assignments:
+        load = assignments[allocation].fillna(DEFAULT_ALLOCATION).to_numpy(dtype=float)
+    else:
+        load = np.full(len(assignments), DEFAULT_ALLOCATION)
+    events = pd.DataFrame({
+        'Person': np.concatenate([assignments[person].to_numpy(), assignments[person].to_numpy()]),
+        'Date': np.concatenate([pd.to_datetime(assignments[start]).to_numpy(),
+                                (pd.to_datetime(assignments[end]) + ONE_DAY).to_numpy()]),
+        'Delta': np.concatenate([load, -load]),
+        'Count': np.repeat([1, -1], len(assignments)),
+    })
+    events = events.groupby(['Person', 'Date'], sort=True).sum().reset_index()
+    by_person = events.groupby('Person')
+    events['Load (%)'] = by_person['Delta'].cumsum().round(6)
+    events['Projects'] = by_person['Count'].cumsum()
+    events['End'] = by_person['Date'].shift(-1) - ONE_DAY
+    segments = events[events['End'].notna() & (events['Projects'] > 0)]
+    return segments.rename(columns={'Date': 'Start'})[['Person', 'Start', 'End', 'Load (%)', 'Projects']].reset_index(drop=True)
+
+# --- Load Curves ---
+def load_curve(segments, freq='W', start=None, end=None, how='mean'):
+    """Person x period matrix of load (%): daily values, or their weekly/monthly mean or max.
+
+    The daily grid is filled with a difference array (load added at each segment start,
+    removed after its end) and one cumulative sum per row, so the cost is linear in
+    segments plus grid size.
+    """
+    start = pd.Timestamp(start) if start is not None else segments['Start'].min()
+    end = pd.Timestamp(end) if end is not None else segments['End'].max()
+    days = pd.date_range(start, end, freq='D')
+    people = pd.Index(segments['Person'].unique(), name='Person')
+    grid = np.zeros((len(people), len(days) + 1))
+    row = people.get_indexer(segments['Person'])
+    first = np.clip((segments['Start'] - start).dt.days.to_numpy(), 0, len(days))
+    last = np.clip((segments['End'] - start).dt.days.to_numpy() + 1, 0, len(days))
+    np.add.at(grid, (row, first), segments['Load (%)'].to_numpy())
+    np.add.at(grid, (row, last), -segments['Load (%)'].to_numpy())
+    daily = pd.DataFrame(np.cumsum(grid, axis=1)[:, :-1].round(6), index=people, columns=days)
+    if freq == 'D':
+        return daily
+    return daily.T.resample(freq).agg(how).T
+
+def load_at(segments, as_of):
+    """Load (%) of every person on one date; people with no active assignment are omitted."""
+    as_of = pd.Timestamp(as_of)
+    active = segments[(segments['Start'] <= as_of) & (segments['End'] >= as_of)]
+    return active.set_index('Person')['Load (%)']
+
+def busiest_date(segments):
+    """First date on which the summed load of all people peaks."""
+    return load_curve(segments, freq='D').sum(axis=0).idxmax()
+
+# --- Over-Allocation ---
+def over_allocations(segments, threshold=OVER_ALLOCATION_THRESHOLD):
+    """Periods where a person's load exceeds `threshold`, adjacent segments merged, with peak load and projects."""
+    over = segments[segments['Load (%)'] > threshold]
+    if over.empty:
+        return pd.DataFrame(columns=['Person', 'From', 'To', 'Days', 'Peak Load (%)', 'Max Projects'])
+    contiguous = (over['Person'] == over['Person'].shift()) & (over['Start'] == over['End'].shift() + ONE_DAY)
+    periods = over.groupby((~contiguous).cumsum()).agg(**{
+        'Person': ('Person', 'first'),
+        'From': ('Start', 'min'),
+        'To': ('End', 'max'),
+        'Peak Load (%)': ('Load (%)', 'max'),
+        'Max Projects': ('Projects', 'max'),
+    })
+    periods.insert(3, 'Days', (periods['To'] - periods['From']).dt.days + 1)
+    return periods.sort_values(['Peak Load (%)', 'Days'], ascending=False).reset_index(drop=True)
@@ -0,0 +1,32 @@
+# risk_matrix.py
+
+import numpy as np
+
+CELL_KEYS = ['Impact', 'Probability']
+DETAIL_TOP_N = 5            # risks listed in a bubble's hover text; the rest load on click
+DESCRIPTION_CHARS = 90      # hover descriptions are cut to this length
+BUBBLE_PX_PER_RISK = 20     # diameter of a single-risk bubble
+BUBBLE_MIN_PX, BUBBLE_MAX_PX = 15, 70
+
+# --- Cell Aggregation ---
+def aggregate_cells(risks_df, top_n=DETAIL_TOP_N):
+    """Per Impact/Probability cell: risk count, max score and hover text listing the `top_n` highest-scored risks."""
+    cells = risks_df.groupby(CELL_KEYS).agg(**{
+        'Risk Count': ('Risk ID', 'size'),
+        'Max Risk Score': ('Risk Score', 'max'),
+    })
+    ranked = risks_df.sort_values(['Risk Score', 'Risk ID'], ascending=[False, True])
+    top = ranked[ranked.groupby(CELL_KEYS).cumcount() < top_n]
+    description = top['Risk Description'].astype(str)
+    description = description.where(description.str.len() <= DESCRIPTION_CHARS,
+                                    description.str.slice(0, DESCRIPTION_CHARS - 1) + '…')
+    lines = '<b>' + top['Risk ID'].astype(str) + '</b> (Score: ' + top['Risk Score'].astype(str) + '): ' + description
+    details = lines.groupby([top[k] for k in CELL_KEYS]).agg('<br>'.join).reindex(cells.index)
+    hidden = (cells['Risk Count'] - top_n).clip(lower=0)
+    more = ('<br><i>… and ' + hidden.astype(str) + ' more (click the bubble for the full list)</i>').where(hidden > 0, '')
+    cells['Risk Details'] = details + more
+    return cells.reset_index()
+
+def bubble_sizes(counts, min_px=BUBBLE_MIN_PX, max_px=BUBBLE_MAX_PX):
+    """Marker diameters that grow with the square root of the count (area ~ volume), clipped to [min_px, max_px]."""
+    return np.clip(BUBBLE_PX_PER_RISK * np.sqrt(np.asarray(counts, dtype=float)), min_px, max_px)
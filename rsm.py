@@ -0,0 +1,245 @@
+# rsm.py
+
+import hashlib
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+
+# --- Design Matrix Helpers ---
+def quadratic_terms(factors):
+    """Returns the term names of a full quadratic model: intercept, linear, two-factor interactions and squares."""
+    return (['Intercept'] + list(factors) + [f"{a} × {b}" for a, b in combinations(factors, 2)]
+            + [f"{f}²" for f in factors])
+
+def quadratic_design_matrix(coded):
+    """Expands coded factor settings (runs × k) into the full quadratic model matrix in `quadratic_terms` order."""
+    coded = np.atleast_2d(np.asarray(coded, dtype=float))
+    n, k = coded.shape
+    i, j = np.triu_indices(k, 1)
+    return np.hstack([np.ones((n, 1)), coded, coded[:, i] * coded[:, j], coded ** 2])
+
+def frame_hash(df):
+    """Stable content hash of a DataFrame (values and column names), used as a model cache key."""
+    digest = hashlib.sha1(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update("|".join(map(str, df.columns)).encode())
+    return digest.hexdigest()
+
+# --- Quadratic Response Surface Model ---
+class QuadraticRSM:
+    """Least-squares second-order response surface model fitted in coded units (-1 to +1).
+
+    Factors are coded from the ranges in the DOE table. Terms that the design cannot
+    estimate (aliased columns) are detected with a pivoted QR decomposition and
+    reported as aliased instead of receiving arbitrary coefficients. Lack of fit is
+    tested against pure error from replicated runs when the design has them.
+    """
+
+    def __init__(self, factors, response):
+        self.factors = list(factors)
+        self.response = response
+
+    def code(self, real):
+        """Converts real factor settings (runs × k) to coded units."""
+        return (np.asarray(real, dtype=float) - self.center_) / self.half_range_
+
+    def decode(self, coded):
+        """Converts coded factor settings (runs × k) back to real units."""
+        return np.asarray(coded, dtype=float) * self.half_range_ + self.center_
+
+    def fit(self, doe_df):
+        """Fits the model to the DOE table and computes the coefficient table and fit statistics."""
+        from scipy.linalg import qr
+        from scipy.stats import f, t
+
+        data = doe_df[self.factors + [self.response]].dropna()
+        real = data[self.factors].to_numpy(dtype=float)
+        y = data[self.response].to_numpy(dtype=float)
+        lo, hi = real.min(axis=0), real.max(axis=0)
+        self.center_ = (hi + lo) / 2
+        self.half_range_ = np.where(hi > lo, (hi - lo) / 2, 1.0)
+        self.bounds_ = np.column_stack([lo, hi])
+        self.design_ = real
+        coded = self.code(real)
+        X = quadratic_design_matrix(coded)
+        n, p = X.shape
+        self.terms_ = quadratic_terms(self.factors)
+
+        # Pivoted QR keeps the best-conditioned subset of columns; the remaining ones are aliased.
+        _, r, pivots = qr(X, mode='economic', pivoting=True)
+        diag = np.abs(np.diag(r))
+        rank = int(np.sum(diag > diag[0] * max(n, p) * np.finfo(float).eps * 1e3)) if len(diag) else 0
+        estimable = np.sort(pivots[:rank])
+        beta_est, *_ = np.linalg.lstsq(X[:, estimable], y, rcond=None)
+        self.coef_ = np.zeros(p)
+        self.coef_[estimable] = beta_est
+        self.estimable_ = np.zeros(p, dtype=bool)
+        self.estimable_[estimable] = True
+
+        fitted = X @ self.coef_
+        residuals = y - fitted
+        sse = float(residuals @ residuals)
+        sst = float(((y - y.mean()) ** 2).sum())
+        dof_resid = n - rank
+        self.n_runs_, self.rank_ = n, rank
+        self.r2_ = 1 - sse / sst if sst > 0 else np.nan
+        self.adj_r2_ = 1 - (sse / dof_resid) / (sst / (n - 1)) if dof_resid > 0 and sst > 0 else np.nan
+        self.rmse_ = np.sqrt(sse / dof_resid) if dof_resid > 0 else np.nan
+
+        # Coefficient standard errors from the estimable block of (X'X)^-1.
+        std_err = np.full(p, np.nan)
+        if dof_resid > 0:
+            xtx_inv = np.linalg.pinv(X[:, estimable].T @ X[:, estimable])
+            std_err[estimable] = np.sqrt(np.diag(xtx_inv) * sse / dof_resid)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            t_stat = self.coef_ / std_err
+        self.coefficients_ = pd.DataFrame({
+            'Coefficient (coded)': np.where(self.estimable_, self.coef_, np.nan),
+            'Std Error': std_err, 't': t_stat,
+            'p-value': 2 * t.sf(np.abs(t_stat), dof_resid) if dof_resid > 0 else np.nan,
+            'Estimable': np.where(self.estimable_, 'Yes', 'Aliased'),
+        }, index=pd.Index(self.terms_, name='Term'))
+
+        # Lack of fit: residual SS split into pure error (replicates) and lack-of-fit SS.
+        groups = pd.DataFrame(coded).round(9).groupby(list(range(coded.shape[1]))).ngroup().to_numpy()
+        group_means = pd.Series(y).groupby(groups).transform('mean').to_numpy()
+        ss_pe = float(((y - group_means) ** 2).sum())
+        dof_pe = n - len(np.unique(groups))
+        dof_lof = dof_resid - dof_pe
+        lof_f = lof_p = np.nan
+        if dof_pe > 0 and dof_lof > 0 and ss_pe > 0:
+            lof_f = ((sse - ss_pe) / dof_lof) / (ss_pe / dof_pe)
+            lof_p = f.sf(lof_f, dof_lof, dof_pe)
+        self.lack_of_fit_ = {'F': lof_f, 'p-value': lof_p, 'DF Lack of Fit': dof_lof, 'DF Pure Error': dof_pe}
+        return self
+
+    def predict_coded(self, coded):
+        """Predicts the response at coded settings (runs × k)."""
+        return quadratic_design_matrix(coded) @ self.coef_
+
+    def predict(self, real):
+        """Predicts the response at real settings given as a runs × k array or a DataFrame of the factors."""
+        if isinstance(real, pd.DataFrame):
+            real = real[self.factors].to_numpy(dtype=float)
+        return self.predict_coded(self.code(real))
+
+    def predict_grid(self, axes):
+        """Predicts the response over the Cartesian grid of real-unit `axes` (one 1-D array per factor).
+
+        Returns an array shaped (len(axes[-1]), ..., len(axes[0])) in meshgrid 'xy' order for two factors,
+        i.e. ready for Plotly surface/contour z values.
+        """
+        mesh = np.meshgrid(*axes, indexing='ij')
+        flat = np.column_stack([m.ravel() for m in mesh])
+        z = self.predict(flat).reshape(mesh[0].shape)
+        return z.T if len(axes) == 2 else z
+
+    def optimum(self, maximize=True, n_starts=8, seed=0):
+        """Locates the best predicted response within the studied factor ranges.
+
+        Uses the stationary point of the quadratic when it is an interior maximum (minimum),
+        otherwise a bounded multi-start L-BFGS-B search over the coded cube.
+        Returns a dict of real-unit factor settings plus the predicted response.
+        """
+        from scipy.optimize import minimize
+
+        k = len(self.factors)
+        sign = -1.0 if maximize else 1.0
+        b = self.coef_[1:k + 1]
+        B = np.diag(self.coef_[-k:])
+        i, j = np.triu_indices(k, 1)
+        B[i, j] = B[j, i] = self.coef_[k + 1:k + 1 + len(i)] / 2
+        candidates = []
+        eigenvalues = np.linalg.eigvalsh(B)
+        definite = np.all(eigenvalues < 0) if maximize else np.all(eigenvalues > 0)
+        if definite:
+            stationary = np.linalg.solve(B, -b / 2)
+            if np.all(np.abs(stationary) <= 1):
+                candidates.append(stationary)
+
+        rng = np.random.default_rng(seed)
+        starts = np.vstack([np.zeros(k), rng.uniform(-1, 1, (n_starts - 1, k))])
+        objective = lambda x: sign * self.predict_coded(x[None, :])[0]
+        for start in starts:
+            result = minimize(objective, start, method='L-BFGS-B', bounds=[(-1, 1)] * k)
+            candidates.append(result.x)
+        candidates = np.array(candidates)
+        values = self.predict_coded(candidates)
+        best = int(np.argmax(values) if maximize else np.argmin(values))
+        result = dict(zip(self.factors, self.decode(candidates[best])))
+        result[self.response] = float(values[best])
+        result['Stationary Point'] = len(candidates) > len(starts) and best == 0
+        return result
+
+    def summary(self):
+        """Returns the fit statistics as a Series."""
+        return pd.Series({
+            'Runs': self.n_runs_, 'Estimable Terms': self.rank_, 'R²': self.r2_, 'Adjusted R²': self.adj_r2_,
+            'RMSE': self.rmse_, 'Lack-of-Fit F': self.lack_of_fit_['F'], 'Lack-of-Fit p-value': self.lack_of_fit_['p-value'],
+        })
+
+def fit_rsm(doe_df, factors, response):
+    """Fits a quadratic response surface model to a DOE table."""
+    return QuadraticRSM(factors, response).fit(doe_df)
+
+# --- Threshold-Indexed Design Space ---
+class DesignSpaceSurface:
+    """Predicted response over a 2-factor grid, indexed by response value for instant threshold queries.
+
+    The surface is predicted once at `resolution` × `resolution`. Grid cells are sorted by
+    descending response and the running min/max of each coordinate along that order is
+    stored, so the region meeting `response >= threshold` (the PAR) is a prefix of the
+    order: its size and bounding box come from one binary search.
+    """
+
+    def __init__(self, model, resolution=100, bounds=None):
+        bounds = model.bounds_ if bounds is None else np.asarray(bounds, dtype=float)
+        self.factors = model.factors[:2]
+        self.resolution = int(resolution)
+        self.axes = [np.linspace(lo, hi, self.resolution) for lo, hi in bounds[:2]]
+        self.z = model.predict_grid(self.axes)
+        flat = self.z.ravel()
+        order = np.argsort(-flat, kind='stable')
+        self.sorted_values = flat[order]
+        rows, cols = np.divmod(order, self.resolution)
+        x, y = self.axes[0][cols], self.axes[1][rows]
+        self._x_min, self._x_max = np.minimum.accumulate(x), np.maximum.accumulate(x)
+        self._y_min, self._y_max = np.minimum.accumulate(y), np.maximum.accumulate(y)
+        self._ascending = self.sorted_values[::-1]
+
+    def count_at_least(self, threshold):
+        """Number of grid cells with a predicted response >= `threshold` (binary search)."""
+        return len(self._ascending) - int(np.searchsorted(self._ascending, threshold, side='left'))
+
+    def par(self, threshold):
+        """Returns the PAR fraction of the design space and its bounding box for a response threshold."""
+        n = self.count_at_least(threshold)
+        result = {'Cells': n, 'Fraction': n / self.sorted_values.size}
+        names = [f"{f} {side}" for f in self.factors for side in ('Min', 'Max')]
+        if n == 0:
+            return {**result, **dict.fromkeys(names, np.nan)}
+        bounds = (self._x_min[n - 1], self._x_max[n - 1], self._y_min[n - 1], self._y_max[n - 1])
+        return {**result, **dict(zip(names, bounds))}
+
+    def display_grid(self, max_points=100):
+        """Returns (x axis, y axis, z) decimated to at most `max_points` per axis for rendering."""
+        step = max(1, int(np.ceil(self.resolution / max_points)))
+        return self.axes[0][::step], self.axes[1][::step], self.z[::step, ::step]
+
+    def par_outline(self, threshold, max_points=100):
+        """Returns (x, y) polygons covering the PAR on the display grid, NaN-separated for a `fill='toself'` trace.
+
+        Each run of consecutive passing cells in a grid row becomes one rectangle, so the
+        outline grows with the PAR boundary rather than with the grid.
+        """
+        xs, ys, z = self.display_grid(max_points)
+        x_edges = np.concatenate([xs[:1], (xs[:-1] + xs[1:]) / 2, xs[-1:]])
+        y_edges = np.concatenate([ys[:1], (ys[:-1] + ys[1:]) / 2, ys[-1:]])
+        inside = np.pad(z >= threshold, ((0, 0), (1, 1))).astype(np.int8)
+        rows, first = np.nonzero(np.diff(inside, axis=1) == 1)
+        _, stop = np.nonzero(np.diff(inside, axis=1) == -1)
+        x0, x1, y0, y1 = x_edges[first], x_edges[stop], y_edges[rows], y_edges[rows + 1]
+        gap = np.full(len(rows), np.nan)
+        x = np.column_stack([x0, x1, x1, x0, x0, gap]).ravel()
+        y = np.column_stack([y0, y0, y1, y1, y0, gap]).ravel()
+        return x, y
@@ -0,0 +1,86 @@
+# rsm_montecarlo.py
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from rsm import quadratic_design_matrix
+
+PARALLEL_MIN_EVALUATIONS = 20_000_000   # grid points × draws below which the pool is not worth starting
+
+# --- Posterior Sampling ---
+def posterior_draws(model, n_draws=2000, seed=None):
+    """Draws (coefficients, sigma) from the posterior of a fitted QuadraticRSM under the standard noninformative prior.
+
+    σ² ~ SSE / χ²(n - p) and β | σ² ~ N(β̂, σ² (X'X)⁻¹) over the estimable terms;
+    aliased terms stay at zero. Returns arrays of shape (n_draws, p) and (n_draws,).
+    """
+    dof = model.n_runs_ - model.rank_
+    if dof <= 0:
+        raise ValueError("The design leaves no residual degrees of freedom, so model uncertainty cannot be sampled.")
+    rng = np.random.default_rng(seed)
+    estimable = model.estimable_
+    X = quadratic_design_matrix(model.code(model.design_))[:, estimable]
+    cov_unscaled = np.linalg.pinv(X.T @ X)
+    chol = np.linalg.cholesky(cov_unscaled + np.eye(len(cov_unscaled)) * 1e-12)
+    sigma = model.rmse_ * np.sqrt(dof / rng.chisquare(dof, n_draws))
+    betas = np.zeros((n_draws, len(estimable)))
+    betas[:, estimable] = model.coef_[estimable] + sigma[:, None] * (rng.standard_normal((n_draws, estimable.sum())) @ chol.T)
+    return betas, sigma
+
+# --- Probability of Success over an N-Factor Grid ---
+def _grid_points(axes_coded, start, stop):
+    """Coded settings of flat grid positions start..stop (C order over `axes_coded`) without building the full grid."""
+    idx = np.unravel_index(np.arange(start, stop), [len(a) for a in axes_coded])
+    return np.column_stack([axis[i] for axis, i in zip(axes_coded, idx)])
+
+def _pos_chunk(axes_coded, start, stop, betas, sigma, spec, upper):
+    """P(response meets spec) for one chunk of grid positions, averaged over the posterior draws.
+
+    Process noise is integrated analytically for each draw: P(y >= spec | β, σ) = Φ((x'β - spec) / σ).
+    """
+    from scipy.special import ndtr
+    mean = quadratic_design_matrix(_grid_points(axes_coded, start, stop)) @ betas.T
+    z = (spec - mean) / sigma if upper else (mean - spec) / sigma
+    return ndtr(z).mean(axis=1)
+
+def probability_of_success(model, spec, axes, n_draws=2000, upper=False, seed=None,
+                           max_chunk_bytes=32 * 2**20, max_workers=1):
+    """Computes P(response >= spec) (or <= spec with upper=True) over the grid spanned by real-unit `axes`.
+
+    `axes` holds one 1-D array per model factor, so any number of factors is supported.
+    Grid positions are evaluated in chunks of at most `max_chunk_bytes` of (points × draws)
+    work. The chunks run in-process unless the caller opts in to a process pool with
+    `max_workers` > 1 (or None for every core), which is then used only for grids of at
+    least PARALLEL_MIN_EVALUATIONS. Interactive pages keep the default so a Streamlit
+    rerun never forks workers. Returns an array shaped (len(axes[0]), ..., len(axes[-1])).
+    """
+    betas, sigma = posterior_draws(model, n_draws, seed)
+    axes_coded = [(np.asarray(a, dtype=float) - c) / h for a, c, h in zip(axes, model.center_, model.half_range_)]
+    shape = tuple(len(a) for a in axes_coded)
+    n_points = int(np.prod(shape))
+    chunk = max(1, max_chunk_bytes // (8 * n_draws * 3))
+    bounds = [(start, min(start + chunk, n_points)) for start in range(0, n_points, chunk)]
+    workers = min(max_workers or os.cpu_count() or 1, len(bounds))
+
+    if workers <= 1 or n_points * n_draws < PARALLEL_MIN_EVALUATIONS:
+        parts = [_pos_chunk(axes_coded, start, stop, betas, sigma, spec, upper) for start, stop in bounds]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_pos_chunk, axes_coded, start, stop, betas, sigma, spec, upper) for start, stop in bounds]
+            parts = [future.result() for future in futures]
+    return np.concatenate(parts).reshape(shape)
+
+def pos_slice(pos, factors, x_factor, y_factor, fixed_index=None):
+    """Extracts a 2D slice of an N-factor probability grid for contour plotting (rows = y_factor, columns = x_factor).
+
+    Factors other than the two plotted ones are held at `fixed_index[factor]` (default: the middle level).
+    """
+    fixed_index = fixed_index or {}
+    selector = tuple(
+        slice(None) if f in (x_factor, y_factor) else fixed_index.get(f, pos.shape[i] // 2)
+        for i, f in enumerate(factors)
+    )
+    plane = pos[selector]
+    return plane.T if factors.index(x_factor) < factors.index(y_factor) else plane
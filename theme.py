@@ -0,0 +1,36 @@
+# theme.py
+
+import threading
+
+# --- Custom Plotly Template for Grifols ---
+grifols_template = {
+    "layout": {
+        "font": {"family": "Arial, sans-serif", "size": 12, "color": "#333333"},
+        "title": {"font": {"family": "Arial, sans-serif", "size": 18, "color": "#DA291C"}, "x": 0.05},
+        "plot_bgcolor": "#FFFFFF",
+        "paper_bgcolor": "#FFFFFF",
+        "colorway": ["#DA291C", "#007A33", "#0033A0", "#FFC72C", "#6C6F70", "#A2AAAD"],
+        "xaxis": {"gridcolor": "#EAEAEA", "linecolor": "#B0B0B0", "zerolinecolor": "#EAEAEA", "title_font": {"size": 14}},
+        "yaxis": {"gridcolor": "#EAEAEA", "linecolor": "#B0B0B0", "zerolinecolor": "#EAEAEA", "title_font": {"size": 14}},
+        "legend": {"bgcolor": "rgba(255,255,255,0.85)", "bordercolor": "#CCCCCC", "borderwidth": 1}
+    }
+}
+
+_registered = False
+_lock = threading.Lock()
+
+def apply_plotly_theme():
+    """Registers the Grifols template as the Plotly default, once per process.
+
+    Plotly is imported here rather than at module import, so data-only modules and
+    pages that render no charts never pay for it. Later calls are a flag check.
+    """
+    global _registered
+    if _registered:
+        return
+    with _lock:
+        if not _registered:
+            import plotly.io as pio
+            pio.templates["grifols"] = grifols_template
+            pio.templates.default = "grifols"
+            _registered = True
@@ -2,26 +2,24 @@
 
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.io as pio
+import os
 from datetime import date, timedelta
 
-# --- Custom Plotly Template for Grifols ---
-grifols_template = {
-    "layout": {
-        "font": {"family": "Arial, sans-serif", "size": 12, "color": "#333333"},
-        "title": {"font": {"family": "Arial, sans-serif", "size": 18, "color": "#DA291C"}, "x": 0.05},
-        "plot_bgcolor": "#FFFFFF",
-        "paper_bgcolor": "#FFFFFF",
-        "colorway": ["#DA291C", "#007A33", "#0033A0", "#FFC72C", "#6C6F70", "#A2AAAD"],
-        "xaxis": {"gridcolor": "#EAEAEA", "linecolor": "#B0B0B0", "zerolinecolor": "#EAEAEA", "title_font": {"size": 14}},
-        "yaxis": {"gridcolor": "#EAEAEA", "linecolor": "#B0B0B0", "zerolinecolor": "#EAEAEA", "title_font": {"size": 14}},
-        "legend": {"bgcolor": "rgba(255,255,255,0.85)", "bordercolor": "#CCCCCC", "borderwidth": 1}
-    }
-}
-pio.templates["grifols"] = grifols_template
-pio.templates.default = "grifols"
+# Multiplier applied when seeding data stores (e.g. GRIFOLS_DATA_SCALE=100 for load testing).
+DATA_SCALE = max(1, int(os.environ.get('GRIFOLS_DATA_SCALE', '1')))
+
+# === DATA SCALING (Load and Performance Testing) ===
+
+def scale_dataset(df, factor, key_columns):
+    """Replicates a data set `factor` times; copies after the first get '-<n>' suffixes on `key_columns` so keys stay unique."""
+    if factor <= 1:
+        return df
+    copy_index = np.repeat(np.arange(factor), len(df))
+    scaled = pd.concat([df] * factor, ignore_index=True)
+    suffix = ('-' + pd.Series(copy_index).astype(str)).where(copy_index > 0, '')
+    for column in key_columns:
+        scaled[column] = scaled[column].astype(str) + suffix
+    return scaled
 
 # === CORE DATA GENERATION (Validation Program Management) ===
 
@@ -40,6 +38,7 @@ def generate_validation_portfolio_data():
         'Product Line': ['NAT', 'BTS', 'BTS', 'NAT', 'All', 'All'],
         'Project Lead': ['Anna K.', 'David L.', 'Maria S.', 'Anna K.', 'David L.', 'Maria S.'],
         'Status': ['In Progress', 'At Risk', 'Complete - On Time', 'In Progress', 'On Hold', 'Not Started'],
+        'Allocation (%)': [60, 70, 75, 60, 50, 50],
         'Start Date': [date(2024, 7, 1), date(2024, 5, 15), date(2024, 4, 1), date(2024, 8, 1), date(2025, 1, 1), date(2025, 1, 15)],
         'End Date': [date(2024, 11, 30), date(2024, 10, 31), date(2024, 7, 30), date(2024, 12, 15), date(2025, 3, 31), date(2025, 6, 30)],
         'Target Completion': [pd.to_datetime(d) for d in ['2024-11-30', '2024-10-15', '2024-07-30', '2024-12-15', '2025-03-31', '2025-06-30']]
@@ -75,7 +74,6 @@ def generate_staff_performance_data():
     data = {
         'Team Member': ['Anna K.', 'David L.', 'Maria S.', 'New Hire'],
         'Role': ['Principal Engineer', 'Senior Engineer', 'Engineer II', 'Engineer I'],
-        'Utilization (%)': [110, 90, 75, 50],
         'Q3 Goals Completed (%)': [100, 85, 95, 100],
         'Required Training Complete (%)': [100, 100, 90, 75],
         'Performance Review Status': ['Complete', 'Scheduled', 'Complete', 'Due'],
@@ -125,16 +123,132 @@ def generate_cpv_data():
     df.loc[20:, 'Final Potency (%)'] -= np.linspace(0, 2.5, 10)
     return df
 
+# Monitored parameters per (product line, unit operation): (mean, std dev, LSL, USL); None marks a one-sided spec.
+SITE_CPV_CATALOG = {
+    ('NAT', 'Reagent Formulation'): {'Assay (%)': (100.0, 0.8, 97.0, 103.0), 'pH': (7.40, 0.03, 7.30, 7.50), 'Osmolality (mOsm/kg)': (290, 4, 275, 305)},
+    ('NAT', 'Oligo Synthesis'): {'Coupling Efficiency (%)': (99.2, 0.15, 98.5, None), 'Full-Length Purity (%)': (92.0, 1.0, 88.0, None)},
+    ('NAT', 'Lyophilization'): {'Residual Moisture (%)': (1.2, 0.15, None, 2.0), 'Cake Appearance Score': (4.6, 0.2, 4.0, None), 'Shelf Temp (°C)': (-40.0, 0.6, -43.0, -37.0)},
+    ('BTS', 'Gel Card Filling'): {'Fill Volume (µL)': (50.0, 0.4, 48.5, 51.5), 'Gel Height (mm)': (12.0, 0.12, 11.6, 12.4)},
+    ('BTS', 'Antisera Blending'): {'Titer (log2)': (7.0, 0.25, 6.0, 8.0), 'Protein (g/L)': (5.0, 0.12, 4.6, 5.4), 'Bioburden (CFU/mL)': (2.0, 0.8, None, 10.0)},
+    ('BTS', 'Red Cell Reagent Wash'): {'Hemolysis (%)': (0.4, 0.08, None, 0.8), 'Cell Concentration (%)': (3.0, 0.06, 2.8, 3.2)},
+}
+
+def generate_site_cpv_specs():
+    """Generates the spec limits (LSL/USL) for every monitored (product line, unit operation) at the site."""
+    return {
+        key: pd.DataFrame(
+            [(lsl, usl) for _, _, lsl, usl in parameters.values()], columns=['LSL', 'USL'],
+            index=pd.Index(list(parameters), name='Parameter'), dtype=float
+        )
+        for key, parameters in SITE_CPV_CATALOG.items()
+    }
+
+def generate_site_cpv_data(n_batches=120):
+    """Generates CPV batch histories for every monitored (product line, unit operation) at the site."""
+    rng = np.random.default_rng(2024)
+    site = {}
+    for (product_line, unit_operation), parameters in SITE_CPV_CATALOG.items():
+        df = pd.DataFrame({'Batch ID': [f"{product_line}-{unit_operation[:3].upper()}-{i + 1:04d}" for i in range(n_batches)]})
+        for name, (mean, sd, _, _) in parameters.items():
+            df[name] = rng.normal(mean, sd, n_batches)
+        # Simulate a slow drift on one parameter of every other unit operation
+        if len(site) % 2 == 1:
+            first = next(iter(parameters))
+            df.loc[n_batches // 2:, first] += np.linspace(0, 3 * parameters[first][1], n_batches - n_batches // 2)
+        site[(product_line, unit_operation)] = df
+    return site
+
 def generate_doe_data():
-    """Generates DOE data for a formulation robustness study."""
+    """Generates DOE data for a formulation robustness study (face-centered central composite design)."""
+    from doe import central_composite, design_table
     np.random.seed(42)
-    temp_levels = np.array([-1, 1, -1, 1, 0, 0])
-    ph_levels = np.array([-1, -1, 1, 1, 0, 0])
-    temp_real = temp_levels * 5 + 25
-    ph_real = ph_levels * 0.1 + 7.4
+    coded, _ = central_composite(2, alpha='face', center_points=(3, 2))
+    runs = design_table(coded, {'Temperature (°C)': (20, 30), 'pH': (7.3, 7.5)}, randomize=True, seed=42)
+    temp_levels, ph_levels = runs['Temperature (°C) (coded)'], runs['pH (coded)']
     true_stability = 98 - (2 * ph_levels**2) - (1 * temp_levels**2)
-    measured_stability = true_stability + np.random.normal(0, 0.5, len(temp_real))
-    return pd.DataFrame({'Temperature (°C)': temp_real, 'pH': ph_real, 'Stability (% Initial)': measured_stability})
+    runs['Stability (% Initial)'] = true_stability + np.random.normal(0, 0.5, len(runs))
+    return runs[['Run Order', 'Temperature (°C)', 'pH', 'Stability (% Initial)']]
+
+# === TECHNOLOGY TRANSFER DATA ===
+def generate_tech_transfer_checklist_data(project_name='New Antigen Test Tech Transfer'):
+    """Generates the deliverable checklist of a tech transfer project for Gantt chart plotting."""
+    data = {
+        'Project': project_name,
+        'Task ID': [f'TT-{i:02d}' for i in range(1, 12)],
+        'Task': [
+            'Tech Transfer Plan & Protocol (Approved)', 'Form Cross-Functional Transfer Team',
+            'Transfer Process Description & Flow Diagrams', 'Transfer Bill of Materials (BOM)',
+            'Execute Lab-Scale Demonstration Runs', 'Gap Analysis & Facility Fit Assessment',
+            'Raw Material & Consumable Qualification', 'Execute Engineering / Feasibility Batch',
+            'Execute Process Validation (PV) Batches', 'Complete PV Summary Report', 'Update Master Batch Record (Approved)'
+        ],
+        'Start': pd.to_datetime([
+            '2024-05-01', '2024-05-05', '2024-05-15', '2024-05-20', '2024-06-01',
+            '2024-06-15', '2024-06-20', '2024-08-01', '2024-09-01', '2024-10-15', '2024-11-01'
+        ]),
+        'Finish': pd.to_datetime([
+            '2024-05-14', '2024-05-10', '2024-06-14', '2024-06-20', '2024-06-30',
+            '2024-07-15', '2024-09-30', '2024-08-15', '2024-10-14', '2024-10-31', '2024-11-15'
+        ]),
+        'Phase': ["Planning", "Planning", "Knowledge Transfer", "Knowledge Transfer", "Knowledge Transfer",
+                  "Facility Fit", "Facility Fit", "Engineering", "Validation", "Validation", "Closeout"],
+        'Lead Department': ['Validation', 'Sr. Manager', 'R&D/MTS', 'Supply Chain', 'R&D',
+                          'Engineering/MTS', 'Validation/QC', 'Manufacturing', 'Manufacturing', 'Validation', 'QA/Mfg'],
+        'Status': ['Complete', 'Complete', 'Complete', 'Complete', 'Complete',
+                   'In Progress', 'At Risk', 'Planned', 'Planned', 'Planned', 'Planned'],
+        # Finish-to-start dependencies (comma-separated Task IDs of the same project).
+        'Predecessors': ['', '', 'TT-01', 'TT-02', 'TT-01, TT-02', 'TT-03', 'TT-03', 'TT-05, TT-06', 'TT-07, TT-08', 'TT-09', 'TT-10']
+    }
+    return pd.DataFrame(data)
+
+# === COMPLIANCE, TRAVEL & VENDOR DATA ===
+def generate_audit_findings_data():
+    """Generates historical audit finding counts by category."""
+    data = {
+        'Finding Source': [
+            'Data Integrity & ALCOA+', 'Justification of Acceptance Criteria',
+            'Investigation & Deviation Handling', 'Training Records & Effectiveness',
+            'Validation Master Plan (VMP) Adherence', 'Supplier Qualification',
+            'CPV Program Execution'
+        ],
+        'Count': [8, 5, 4, 3, 2, 2, 1]
+    }
+    return pd.DataFrame(data).sort_values('Count', ascending=False)
+
+def generate_key_documents_data():
+    """Generates the status of key audit documents."""
+    data = {
+        'Document ID': ['VMP-001', 'SOP-VAL-001', 'PV-NAT-FORM-001', 'SOP-CPV-001', 'SOP-TT-001'],
+        'Document Title': ['Site Validation Master Plan', 'SOP for Process Validation', 'NAT Reagent Formulation PV Report', 'SOP for Continued Process Verification', 'SOP for Technology Transfer'],
+        'Status': ['Current', 'Current', 'Current', 'Current', 'Current'],
+        'Last Review': [date(2024, 1, 15), date(2024, 3, 10), date(2023, 11, 20), date(2024, 5, 5), date(2024, 6, 1)]
+    }
+    return pd.DataFrame(data)
+
+def generate_travel_plan_data():
+    """Generates the departmental travel plan."""
+    data = {
+        'Trip ID': ['TVL-24-005', 'TVL-24-006', 'TVL-24-007'],
+        'Lead Traveler': ['David L.', 'Sr. Manager', 'Anna K.'],
+        'Destination': ['Grifols - Clayton, NC', 'Supplier HQ - Germany', 'Grifols - Emeryville, CA'],
+        'Purpose': ['Person-in-plant for PV Batch #1', 'Key Supplier Audit & QBR', 'Tech Transfer Kick-off Meeting'],
+        'Project': ['New Antigen Tech Transfer', 'All', 'New Reagent Development'],
+        'Status': ['Complete', 'Planned', 'Planned'],
+        'Start Date': pd.to_datetime(['2024-08-12', '2024-10-21', '2024-11-04']),
+        'End Date': pd.to_datetime(['2024-08-16', '2024-10-25', '2024-11-05'])
+    }
+    return pd.DataFrame(data)
+
+def generate_vendor_list_data():
+    """Generates the list of key vendors and suppliers."""
+    data = {
+        'Vendor Name': ['Pharma-Validate Inc.', 'Bio-Assay Labs', 'GMP Consumables Co.'],
+        'Service / Product': ['Validation Protocol Authoring', 'External Potency Testing', 'Sterile Vials & Stoppers'],
+        'Status': ['Active MSA', 'Active MSA', 'Approved Supplier'],
+        'Last Audit Date': [pd.to_datetime('2023-11-15'), pd.to_datetime('2024-02-20'), pd.to_datetime('2023-09-01')],
+        'Notes': ['Primary partner for protocol writing support.', 'Used for release testing of development lots.', 'Sole supplier for DG Gel Card vials - High Risk.']
+    }
+    return pd.DataFrame(data)
 
 # === OPERATIONAL EXCELLENCE DATA ===
 def generate_improvement_data():